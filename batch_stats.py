@@ -0,0 +1,130 @@
+"""
+批次卡方檢定 / Cramér's V
+- 一次處理多個列聯表：補零成 3-D 次數陣列 (表數, 列, 欄)，以 NumPy 向量運算求期望次數、
+  χ²、自由度、p 值、Cramér's V 與「期望次數 ≤ 1」旗標，取代逐表呼叫 chi2_contingency
+- 計算方式與 scipy.stats.chi2_contingency 相同（自由度為 1 時套用 Yates 連續性校正）
+- 邊際總和為 0 的列或欄視為補零（不計入自由度與期望次數），與 pd.crosstab 只列出
+  實際出現類別的結果一致
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2 as chi2_distribution
+
+
+def pad_tables(tables):
+    """將多個 2-D 列聯表（DataFrame 或陣列）補零成 3-D 次數陣列，並回傳各表原本的 (列數, 欄數)"""
+    arrays = [np.atleast_2d(np.asarray(t.values if isinstance(t, pd.DataFrame) else t, dtype=np.float64)) for t in tables]
+    shapes = np.array([a.shape for a in arrays], dtype=np.int64).reshape(len(arrays), 2)
+    n_rows = int(shapes[:, 0].max()) if len(arrays) else 0
+    n_cols = int(shapes[:, 1].max()) if len(arrays) else 0
+    counts = np.zeros((len(arrays), n_rows, n_cols), dtype=np.float64)
+    for i, a in enumerate(arrays):
+        counts[i, :a.shape[0], :a.shape[1]] = a
+    return counts, shapes
+
+
+def chi_square_batch(tables, correction=True):
+    """
+    批次卡方獨立性檢定
+    tables: 2-D 列聯表的列表，或已補零的 3-D 次數陣列 (表數, 列, 欄)
+    correction: 自由度為 1 時是否套用 Yates 校正（同 chi2_contingency 預設）
+    回傳 dict（每個值皆為長度 = 表數的陣列，expected 為 3-D）：
+      chi2, p_value, dof, n: 檢定結果與總樣本數
+      rows, cols: 實際（邊際總和 > 0）的列數與欄數
+      expected: 期望次數（補零處為 0）
+      min_expected: 實際儲存格的最小期望次數
+      low_expected: 最小期望次數 ≤ 1（各分析流程以此略過檢定）
+      low_expected_pct: 期望次數 < 5 的儲存格百分比
+      cramers_v: Cramér's V（列或欄只有一類時為 NaN）
+      valid: 有資料可檢定（n > 0）
+      shapes: 輸入各表原本的 (列數, 欄數)
+    """
+    if isinstance(tables, np.ndarray) and tables.ndim == 3:
+        counts = tables.astype(np.float64)
+        shapes = np.tile(np.array(counts.shape[1:], dtype=np.int64), (len(counts), 1))
+    else:
+        counts, shapes = pad_tables(list(tables))
+
+    row_sums = counts.sum(axis=2)
+    col_sums = counts.sum(axis=1)
+    n = row_sums.sum(axis=1)
+    row_ok = row_sums > 0
+    col_ok = col_sums > 0
+    cell_ok = row_ok[:, :, None] & col_ok[:, None, :]
+    rows = row_ok.sum(axis=1)
+    cols = col_ok.sum(axis=1)
+    dof = np.maximum(rows - 1, 0) * np.maximum(cols - 1, 0)
+    valid = n > 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = row_sums[:, :, None] * col_sums[:, None, :] / n[:, None, None]
+        expected = np.where(cell_ok, expected, 0.0)
+
+        observed = counts
+        if correction:
+            # Yates 連續性校正：觀察值向期望值靠近最多 0.5
+            diff = expected - counts
+            adjusted = counts + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+            observed = np.where((dof == 1)[:, None, None], adjusted, counts)
+
+        terms = np.where(cell_ok, (observed - expected) ** 2 / np.where(cell_ok, expected, 1.0), 0.0)
+        chi2 = terms.sum(axis=(1, 2))
+        chi2 = np.where(dof == 0, 0.0, chi2)
+        p_value = np.where(dof == 0, 1.0, chi2_distribution.sf(chi2, np.maximum(dof, 1)))
+
+        min_expected = np.where(cell_ok, expected, np.inf).min(axis=(1, 2)) if counts.size else np.full(len(counts), np.inf)
+        n_cells = cell_ok.sum(axis=(1, 2))
+        low_cells = (cell_ok & (expected < 5)).sum(axis=(1, 2))
+        low_expected_pct = np.where(n_cells > 0, low_cells / np.maximum(n_cells, 1) * 100, 0.0)
+
+        k = np.minimum(rows, cols) - 1
+        cramers_v = np.where((k > 0) & valid, np.sqrt(chi2 / (n * np.maximum(k, 1))), np.nan)
+
+    chi2 = np.where(valid, chi2, np.nan)
+    p_value = np.where(valid, p_value, np.nan)
+    min_expected = np.where(valid, min_expected, np.nan)
+
+    return {
+        'chi2': chi2,
+        'p_value': p_value,
+        'dof': dof,
+        'n': n,
+        'rows': rows,
+        'cols': cols,
+        'expected': expected,
+        'min_expected': min_expected,
+        'low_expected': ~(min_expected > 1),
+        'low_expected_pct': low_expected_pct,
+        'cramers_v': cramers_v,
+        'valid': valid,
+        'shapes': shapes,
+    }
+
+
+def expected_table(result, i):
+    """取出第 i 個表的期望次數矩陣（原本的列、欄大小）"""
+    n_rows, n_cols = result['shapes'][i]
+    return result['expected'][i, :n_rows, :n_cols]
+
+
+def chi_square_result(result, i):
+    """取出第 i 個表的結果（純量 dict），方便逐題使用"""
+    return {
+        'chi2': float(result['chi2'][i]),
+        'p_value': float(result['p_value'][i]),
+        'dof': int(result['dof'][i]),
+        'n': float(result['n'][i]),
+        'rows': int(result['rows'][i]),
+        'cols': int(result['cols'][i]),
+        'min_expected': float(result['min_expected'][i]),
+        'low_expected': bool(result['low_expected'][i]),
+        'low_expected_pct': float(result['low_expected_pct'][i]),
+        'cramers_v': float(result['cramers_v'][i]),
+        'valid': bool(result['valid'][i]),
+        'expected': expected_table(result, i),
+    }
+
+
+def chi_square_test(table, correction=True):
+    """單一列聯表的卡方檢定（批次引擎的單表版本）"""
+    return chi_square_result(chi_square_batch([table], correction=correction), 0)
@@ -0,0 +1,283 @@
+"""
+類別答案的順序（序位）服務
+- 原本 cloud_app 與 Word 報告各有一份 smart_sort_categories，每次呼叫都對每個類別重跑多個正規表示式；
+  這裡依答案文字計算一次排序鍵並快取（整個工作階段共用），相同的類別清單也快取排序結果
+- 兩份排序規則已各自演變（Word 報告另外處理「以下／以上」、階段與是／否），
+  以 scheme 區分：'app' 與 'report'，各自維持原本的排序結果
+- 快取筆數上限可由環境變數 CATEGORY_ORDER_CACHE_SIZE 調整（預設 65536）
+"""
+import os
+import re
+from functools import lru_cache
+
+CATEGORY_ORDER_CACHE_SIZE = int(os.environ.get('CATEGORY_ORDER_CACHE_SIZE', 65536))
+
+# 8. 處理中文程度詞（完整的五級量表和各種變體）
+_DEGREE_PATTERNS = {
+    # === 否定程度（1-2分）===
+    '非常不': 1.0,
+    '極不': 1.0,
+    '完全不': 1.0,
+    '絕對不': 1.0,
+    '非常不同意': 1.0,
+    '非常不滿意': 1.0,
+    '非常不重要': 1.0,
+    '非常不符合': 1.0,
+
+    '不': 2.0,
+    '不同意': 2.0,
+    '不滿意': 2.0,
+    '不重要': 2.0,
+    '不符合': 2.0,
+    '沒有': 2.0,
+    '無': 2.0,
+    '較不': 2.0,
+    '有點不': 2.0,
+
+    # === 中立程度（3分）===
+    '普通': 3.0,
+    '中立': 3.0,
+    '一般': 3.0,
+    '還好': 3.0,
+    '尚可': 3.0,
+    '中等': 3.0,
+    '部分': 3.0,
+    '有時': 3.0,
+    '偶爾': 3.0,
+
+    # === 肯定程度（4-5分）===
+    '同意': 4.0,
+    '滿意': 4.0,
+    '重要': 4.0,
+    '符合': 4.0,
+    '有': 4.0,
+    '是': 4.0,
+    '大部分': 4.0,
+    '大多': 4.0,
+    '較': 4.0,
+    '相當': 4.0,
+    '算': 4.0,
+
+    '非常': 5.0,
+    '非常同意': 5.0,
+    '非常滿意': 5.0,
+    '非常重要': 5.0,
+    '非常符合': 5.0,
+    '極': 5.0,
+    '極為': 5.0,
+    '完全': 5.0,
+    '完全同意': 5.0,
+    '絕對': 5.0,
+    '最': 5.0,
+
+    # === 特殊處理：程度副詞 + 形容詞 ===
+    '非常低': 1.0,
+    '很低': 2.0,
+    '低': 2.0,
+    '偏低': 2.5,
+    '中': 3.0,
+    '中等': 3.0,
+    '偏高': 3.5,
+    '高': 4.0,
+    '很高': 4.5,
+    '非常高': 5.0,
+
+    # === 頻率相關 ===
+    '從不': 1.0,
+    '很少': 2.0,
+    '極少': 2.0,
+    '偶爾': 3.0,
+    '有時': 3.0,
+    '經常': 4.0,
+    '常常': 4.0,
+    '總是': 5.0,
+    '一直': 5.0,
+    '始終': 5.0,
+}
+
+# 複合詞優先（較長的樣式先比對）
+_DEGREE_PATTERNS_LONGEST_FIRST = sorted(_DEGREE_PATTERNS.items(), key=lambda x: len(x[0]), reverse=True)
+
+
+def _app_sort_key(item):
+    """app（cloud_app）的排序鍵"""
+    item_str = str(item).strip()
+
+    # 1. 處理百分比範圍 (如 10-20%, 20%-30%)
+    percent_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[%％]', item_str)
+    if percent_match:
+        return (0, float(percent_match.group(1)))
+
+    # 單一百分比 (如 30%)
+    single_percent = re.match(r'(\d+\.?\d*)\s*[%％]', item_str)
+    if single_percent:
+        return (0, float(single_percent.group(1)))
+
+    # 2. 處理年份範圍 (如 1-5年, 5-10年)
+    year_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*年', item_str)
+    if year_match:
+        return (1, float(year_match.group(1)))
+
+    # 3. 處理金額範圍 (如 100-500萬, 1000-5000萬)
+    money_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[萬億]', item_str)
+    if money_match:
+        return (2, float(money_match.group(1)))
+
+    # 4. 處理月份範圍 (如 1-3個月, 3-6個月)
+    month_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*個?月', item_str)
+    if month_match:
+        return (3, float(month_match.group(1)))
+
+    # 5. 處理人數範圍 (如 1-10人, 10-50人)
+    people_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*人', item_str)
+    if people_match:
+        return (4, float(people_match.group(1)))
+
+    # 6. 處理次數 (如 每月1次, 每季1次, 每年1次)
+    freq_order = {'每週': 1, '每月': 2, '每季': 3, '每半年': 4, '每年': 5, '不定期': 6, '無': 7}
+    for key, value in freq_order.items():
+        if key in item_str:
+            return (5, value)
+
+    # 7. 處理階段 (第一階段, 第二階段, 第三階段)
+    stage_match = re.search(r'[第]?([一二三四五1234])[階段期]', item_str)
+    if stage_match:
+        stage_num = {'一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '1': 1, '2': 2, '3': 3, '4': 4}.get(stage_match.group(1), 0)
+        return (6, stage_num)
+
+    # 8. 處理中文程度詞（精確匹配，優先處理複合詞）
+    for pattern, score in _DEGREE_PATTERNS_LONGEST_FIRST:
+        if pattern in item_str:
+            return (7, score)
+
+    # 9. 處理「完全沒有」到「完全有」的具體變體
+    completion_order = {
+        '完全沒有': 1,
+        '大部分沒有': 2,
+        '部分沒有': 2.5,
+        '部分': 3,
+        '部分有': 3.5,
+        '大部分有': 4,
+        '完全有': 5,
+        '完全': 5
+    }
+    for key, value in completion_order.items():
+        if key in item_str:
+            return (7, value)
+
+    # 10. 處理比較級 (低於, 符合, 高於)
+    compare_order = {'低於': 1, '低': 1, '符合': 2, '相當': 2, '高於': 3, '高': 3, '超過': 3}
+    for key, value in compare_order.items():
+        if key in item_str:
+            return (8, value)
+
+    # 11. 處理純數字開頭
+    num_match = re.match(r'^(\d+\.?\d*)', item_str)
+    if num_match:
+        return (9, float(num_match.group(1)))
+
+    # 11. 特殊處理：「以上」應該排在最後
+    if '以上' in item_str or '或以上' in item_str or '以上' in item_str:
+        # 提取數字
+        num_in_above = re.search(r'(\d+\.?\d*)', item_str)
+        if num_in_above:
+            return (10, float(num_in_above.group(1)))
+
+    # 12. 預設：按字典順序
+    return (99, item_str)
+
+
+def _report_sort_key(item):
+    """Word 報告的排序鍵（另外處理「以下／以上」、階段與是／否）"""
+    item_str = str(item).strip()
+
+    # 1. 百分比範圍和特殊情況
+    # 先檢查"以下"（應該排在最前）
+    if '以下' in item_str:
+        below_match = re.search(r'(\d+\.?\d*)\s*[%％]?\s*以下', item_str)
+        if below_match:
+            return (0, -1, float(below_match.group(1)))  # 用 -1 確保排在範圍前
+
+    # 檢查"以上"（應該排在最後）
+    if '以上' in item_str:
+        above_match = re.search(r'(\d+\.?\d*)\s*[%％]?\s*以上', item_str)
+        if above_match:
+            return (0, 1000, float(above_match.group(1)))  # 用 1000 確保排在最後
+
+    # 百分比範圍 (如 10-20%, 20%-30%)
+    percent_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[%％]', item_str)
+    if percent_match:
+        return (0, 0, float(percent_match.group(1)))
+
+    # 單一百分比 (如 30%)
+    single_percent = re.match(r'(\d+\.?\d*)\s*[%％]', item_str)
+    if single_percent:
+        return (0, 0, float(single_percent.group(1)))
+
+    # 2. 年份範圍
+    year_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*年', item_str)
+    if year_match:
+        return (1, 0, float(year_match.group(1)))
+
+    # 3. 金額範圍
+    money_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[萬億]', item_str)
+    if money_match:
+        return (2, 0, float(money_match.group(1)))
+
+    # 4. 月份範圍
+    month_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*個?月', item_str)
+    if month_match:
+        return (3, 0, float(month_match.group(1)))
+
+    # 8. 階段
+    if '第一階段' in item_str or '階段1' in item_str:
+        return (7, 0, 1)
+    if '第二階段' in item_str or '階段2' in item_str:
+        return (7, 0, 2)
+    if '第三階段' in item_str or '階段3' in item_str:
+        return (7, 0, 3)
+
+    # 9. 是/否
+    if item_str in ['是', 'Yes', 'yes', '有']:
+        return (8, 0, 1)
+    if item_str in ['否', 'No', 'no', '無']:
+        return (8, 0, 2)
+
+    # 9. 一般文字
+    return (10, 0, item_str)
+
+SORT_KEYS = {'app': _app_sort_key, 'report': _report_sort_key}
+
+
+@lru_cache(maxsize=CATEGORY_ORDER_CACHE_SIZE)
+def category_sort_key(label, scheme='app'):
+    """單一答案文字的排序鍵（依文字快取）"""
+    return SORT_KEYS[scheme](label)
+
+
+@lru_cache(maxsize=CATEGORY_ORDER_CACHE_SIZE // 16 or 1)
+def _sorted_positions(labels, scheme):
+    try:
+        return tuple(sorted(range(len(labels)), key=lambda i: category_sort_key(labels[i], scheme)))
+    except Exception:
+        # 如果排序失敗，維持原順序
+        return None
+
+
+def sort_categories(categories, scheme='app'):
+    """
+    智慧排序類別資料（穩定排序，排序鍵相同時維持原順序）
+    1. 百分比範圍 (如 10-20%, 20-30%)
+    2. 數值範圍 (如 1-5年, 5-10年)
+    3. 金額範圍 (如 100-500萬, 500-1000萬)
+    4. 階段 (第一階段, 第二階段, 第三階段)
+    5. 一般文字 (按原順序或字母排序)
+    """
+    if len(categories) == 0:
+        return []
+    categories_list = list(categories)
+    positions = _sorted_positions(tuple(str(c) for c in categories_list), scheme)
+    if positions is None:
+        return categories_list
+    return [categories_list[i] for i in positions]
+
@@ -0,0 +1,249 @@
+"""
+Word 報告圖表批次渲染
+- 維持一組常駐的渲染程序（ProcessPoolExecutor，以 spawn 啟動：不複製呼叫端的執行緒與 kaleido 狀態，
+  在 Streamlit 等多執行緒的主程序中也安全），每個程序啟動時先渲染一張小圖讓 kaleido 暖機，
+  之後同一次報告的所有圖表（以及之後再次產生報告）都重複使用，不必每張圖重新啟動瀏覽器程序
+- 報告組裝時以 ChartQueue 先預留圖表段落並收集圖表，全部議題處理完後一次平行渲染，
+  再依加入順序把 PNG bytes 插回各自的段落
+- 每張圖先以 1000×600、scale 2 渲染，失敗時改用 800×500、scale 1 再試一次
+- CHART_RENDER_WORKERS 設定程序數（預設為 CPU 核心數；1 表示在主程序依序渲染）
+- 渲染結果以圖表規格（資料、版面、尺寸、scale）的雜湊為鍵存放於 .survey_cache/chart_images/，
+  圖表內容不變時直接讀回 PNG，只有數字變動的圖表需要重新渲染；
+  總大小上限為 CHART_CACHE_MAX_MB（預設 512），每份報告渲染完（ChartQueue.flush）檢查一次，
+  超過時依最後使用時間淘汰最久未用的圖檔；
+  與 CSV 解析快取共用 SURVEY_CACHE 開關
+"""
+import os
+import atexit
+import hashlib
+import threading
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from survey_loader import CACHE_ENABLED, CACHE_DIR_NAME
+
+CHART_RENDER_WORKERS = int(os.environ.get('CHART_RENDER_WORKERS', os.cpu_count() or 1))
+
+# (width, height, scale)：依序嘗試，第一個成功的結果即採用
+RENDER_ATTEMPTS = ((1000, 600, 2), (800, 500, 1))
+
+CHART_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_DIR_NAME, 'chart_images')
+CHART_CACHE_MAX_BYTES = int(float(os.environ.get('CHART_CACHE_MAX_MB', 512)) * 1024 * 1024)
+# 渲染方式（引擎、輸出格式）變更時請遞增，讓舊圖檔自動失效
+CHART_CACHE_VERSION = 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _render_spec(fig_json):
+    """由圖表 JSON 渲染 PNG；回傳 bytes，全部嘗試都失敗時回傳 None（在渲染程序內執行）"""
+    import plotly.io as pio
+    fig = pio.from_json(fig_json)
+    for attempt, (width, height, scale) in enumerate(RENDER_ATTEMPTS):
+        try:
+            return pio.to_image(fig, format='png', width=width, height=height, scale=scale, engine="kaleido")
+        except Exception as e:
+            if attempt + 1 < len(RENDER_ATTEMPTS):
+                print(f"圖表儲存失敗: {e}")
+                print("嘗試使用較低品質設定...")
+            else:
+                print(f"圖表儲存再次失敗: {e}")
+    return None
+
+
+def _warm_up():
+    """渲染程序初始化：先渲染一張空白小圖，讓 kaleido 的瀏覽器程序在第一張真正的圖表前就緒"""
+    try:
+        import plotly.graph_objects as go
+        import plotly.io as pio
+        pio.to_image(go.Figure(), format='png', width=10, height=10, engine="kaleido")
+    except Exception:
+        pass
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def get_render_pool():
+    """取得常駐的渲染程序池（第一次使用時建立）；CHART_RENDER_WORKERS 為 1 時回傳 None"""
+    global _pool
+    if CHART_RENDER_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # fork 會複製主程序中其他執行緒持有的鎖與 kaleido 子程序，改以 spawn 建立乾淨的程序
+            _pool = ProcessPoolExecutor(max_workers=CHART_RENDER_WORKERS, initializer=_warm_up,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_shutdown_pool)
+        return _pool
+
+
+def chart_key(fig_json):
+    """圖表規格雜湊：圖表 JSON（資料與版面）加上各次嘗試的尺寸與 scale"""
+    h = hashlib.sha256()
+    h.update(f"v{CHART_CACHE_VERSION}|{RENDER_ATTEMPTS!r}|".encode('utf-8'))
+    h.update(fig_json.encode('utf-8'))
+    return h.hexdigest()
+
+
+def _cache_file(key):
+    return os.path.join(CHART_CACHE_DIR, f"{key}.png")
+
+
+def _load_cached(key):
+    """讀回快取圖檔並更新最後使用時間；未命中或讀取失敗時回傳 None"""
+    if not CACHE_ENABLED:
+        return None
+    path = _cache_file(key)
+    try:
+        with open(path, 'rb') as f:
+            image = f.read()
+        os.utime(path)
+        return image or None
+    except Exception:
+        return None
+
+
+def _store_cached(key, image):
+    """寫入快取（先寫暫存檔再置換，避免並行讀取到不完整的檔案）"""
+    if not CACHE_ENABLED:
+        return
+    try:
+        os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+        path = _cache_file(key)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_file, path)
+    except Exception as e:
+        print(f"寫入圖表快取失敗（不影響報告產生）：{e}")
+
+
+def evict_chart_cache(max_bytes=None):
+    """圖檔總大小超過上限時，依最後使用時間由舊到新刪除，回傳刪除的檔案數"""
+    if max_bytes is None:
+        max_bytes = CHART_CACHE_MAX_BYTES
+    try:
+        entries = []
+        with os.scandir(CHART_CACHE_DIR) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.png'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        return 0
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except Exception:
+            pass
+    return removed
+
+
+def _render_specs(specs):
+    """渲染多份圖表 JSON（未經快取），回傳同順序的 PNG bytes 列表；程序池不可用時改在目前程序依序渲染"""
+    pool = get_render_pool() if len(specs) > 1 else None
+    if pool is not None:
+        try:
+            # map 依輸入順序回傳結果
+            return list(pool.map(_render_spec, specs))
+        except BrokenProcessPool as e:
+            print(f"圖表渲染程序池無法使用，改為依序渲染：{e}")
+            _shutdown_pool()
+    return [_render_spec(spec) for spec in specs]
+
+
+def render_png(fig):
+    """在目前程序渲染單張圖表（先查圖表快取），回傳 PNG bytes；失敗時回傳 None"""
+    return render_many([fig])[0]
+
+
+def render_many(figs):
+    """
+    批次渲染多張圖表，回傳與 figs 同順序的 PNG bytes 列表（失敗者為 None）
+    規格相同的圖表（含先前執行渲染過的）直接讀回快取，只有未命中的圖表送去渲染；失敗結果不寫入快取
+    不在這裡淘汰圖檔（每次都要掃描整個快取目錄），由呼叫端在整批工作結束後呼叫 evict_chart_cache()
+    """
+    specs = [fig.to_json() for fig in figs]
+    keys = [chart_key(spec) for spec in specs]
+    images = [_load_cached(key) for key in keys]
+
+    # 同一批次內規格相同的圖表只渲染一次
+    missing = {}
+    for i, image in enumerate(images):
+        if image is None:
+            missing.setdefault(keys[i], []).append(i)
+    if missing:
+        rendered = _render_specs([specs[positions[0]] for positions in missing.values()])
+        for (key, positions), image in zip(missing.items(), rendered):
+            if image is None:
+                continue
+            _store_cached(key, image)
+            for i in positions:
+                images[i] = image
+    if len(figs) > 1:
+        print(f"圖表快取：命中 {len(figs) - sum(len(p) for p in missing.values())} 張，重新渲染 {len(missing)} 張")
+    return images
+
+
+def _remove_paragraph(paragraph):
+    element = paragraph._element
+    element.getparent().remove(element)
+
+
+class ChartQueue:
+    """
+    延後渲染的圖表佇列：add() 先在文件目前位置預留圖表段落，flush() 一次批次渲染，
+    再依加入順序把圖片插回預留段落並置中；渲染失敗時移除預留段落，或改寫為 failure_text（不置中）
+    """
+
+    def __init__(self, width=None):
+        self.width = width
+        self._pending = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, doc, fig, failure_text=None):
+        placeholder = doc.add_paragraph()
+        spacer = doc.add_paragraph()
+        self._pending.append((fig, placeholder, spacer, failure_text))
+
+    def flush(self, render=True):
+        """
+        渲染並插入所有待處理的圖表，回傳成功插入的張數
+        render: False 時不渲染（例如 dry-run），直接移除預留段落
+        """
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        pending, self._pending = self._pending, []
+        images = render_many([fig for fig, _, _, _ in pending]) if render and pending else [None] * len(pending)
+        if render and pending:
+            # 整份報告的圖表寫入快取後只檢查一次大小上限
+            evict_chart_cache()
+        inserted = 0
+        for (_, placeholder, spacer, failure_text), image in zip(pending, images):
+            if image is not None:
+                placeholder.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                placeholder.add_run().add_picture(BytesIO(image), width=self.width)
+                inserted += 1
+                continue
+            _remove_paragraph(spacer)
+            if failure_text and render:
+                placeholder.add_run(failure_text)
+            else:
+                _remove_paragraph(placeholder)
+        return inserted
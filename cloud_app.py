@@ -5,12 +5,25 @@ import plotly.graph_objects as go
 import warnings
 import os
 import re
-from scipy.stats import chi2_contingency, kruskal, mannwhitneyu, fisher_exact
+from scipy.stats import kruskal, mannwhitneyu, fisher_exact
 from datetime import datetime
 import io
 from difflib import SequenceMatcher
-from professional_report_enhanced import generate_government_style_report
+from professional_report_enhanced import build_government_model
 from descriptive_report_generator import generate_full_descriptive_report
+from report_model import ReportModel, render_markdown, render_html, bold, italic
+from survey_loader import load_survey_files
+from response_matrix import build_response_matrix, answer_counts, answer_group_table, answer_group_counts
+from completeness import build_completeness, completeness_frame, missing_rate, non_null_count
+from long_answers import (build_long_answers, option_labels, option_counts, option_group_table,
+                          option_presence_counts, option_presence_table)
+from batch_stats import chi_square_batch, chi_square_result, chi_square_test
+from category_order import sort_categories
+from question_types import build_question_types, question_type
+from stats_cache import dataset_fingerprint, get_or_compute, lookup, store
+from merge_mapping import get_merge_mapping, merged_mapping_from, coalesce_merged_columns, method_version
+from question_normalize import normalize_question_v2, rules_version
+from text_memo import memoized, save_memo
 
 warnings.filterwarnings('ignore')
 
@@ -23,196 +36,8 @@ pio.templates.default = "plotly_white_cjk"
 
 # --- 智慧排序函式 ---
 def smart_sort_categories(categories):
-    """
-    智慧排序類別資料，處理：
-    1. 百分比範圍 (如 10-20%, 20-30%)
-    2. 數值範圍 (如 1-5年, 5-10年)
-    3. 金額範圍 (如 100-500萬, 500-1000萬)
-    4. 階段 (第一階段, 第二階段, 第三階段)
-    5. 一般文字 (按原順序或字母排序)
-    """
-    if len(categories) == 0:
-        return []
-    
-    categories_list = list(categories)
-    
-    # 定義排序鍵函式
-    def sort_key(item):
-        item_str = str(item).strip()
-        
-        # 1. 處理百分比範圍 (如 10-20%, 20%-30%)
-        percent_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[%％]', item_str)
-        if percent_match:
-            return (0, float(percent_match.group(1)))
-        
-        # 單一百分比 (如 30%)
-        single_percent = re.match(r'(\d+\.?\d*)\s*[%％]', item_str)
-        if single_percent:
-            return (0, float(single_percent.group(1)))
-        
-        # 2. 處理年份範圍 (如 1-5年, 5-10年)
-        year_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*年', item_str)
-        if year_match:
-            return (1, float(year_match.group(1)))
-        
-        # 3. 處理金額範圍 (如 100-500萬, 1000-5000萬)
-        money_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[萬億]', item_str)
-        if money_match:
-            return (2, float(money_match.group(1)))
-        
-        # 4. 處理月份範圍 (如 1-3個月, 3-6個月)
-        month_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*個?月', item_str)
-        if month_match:
-            return (3, float(month_match.group(1)))
-        
-        # 5. 處理人數範圍 (如 1-10人, 10-50人)
-        people_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*人', item_str)
-        if people_match:
-            return (4, float(people_match.group(1)))
-        
-        # 6. 處理次數 (如 每月1次, 每季1次, 每年1次)
-        freq_order = {'每週': 1, '每月': 2, '每季': 3, '每半年': 4, '每年': 5, '不定期': 6, '無': 7}
-        for key, value in freq_order.items():
-            if key in item_str:
-                return (5, value)
-        
-        # 7. 處理階段 (第一階段, 第二階段, 第三階段)
-        stage_match = re.search(r'[第]?([一二三四五1234])[階段期]', item_str)
-        if stage_match:
-            stage_num = {'一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '1': 1, '2': 2, '3': 3, '4': 4}.get(stage_match.group(1), 0)
-            return (6, stage_num)
-        
-        # 8. 處理中文程度詞（完整的五級量表和各種變體）
-        degree_patterns = {
-            # === 否定程度（1-2分）===
-            '非常不': 1.0,
-            '極不': 1.0,
-            '完全不': 1.0,
-            '絕對不': 1.0,
-            '非常不同意': 1.0,
-            '非常不滿意': 1.0,
-            '非常不重要': 1.0,
-            '非常不符合': 1.0,
-            
-            '不': 2.0,
-            '不同意': 2.0,
-            '不滿意': 2.0,
-            '不重要': 2.0,
-            '不符合': 2.0,
-            '沒有': 2.0,
-            '無': 2.0,
-            '較不': 2.0,
-            '有點不': 2.0,
-            
-            # === 中立程度（3分）===
-            '普通': 3.0,
-            '中立': 3.0,
-            '一般': 3.0,
-            '還好': 3.0,
-            '尚可': 3.0,
-            '中等': 3.0,
-            '部分': 3.0,
-            '有時': 3.0,
-            '偶爾': 3.0,
-            
-            # === 肯定程度（4-5分）===
-            '同意': 4.0,
-            '滿意': 4.0,
-            '重要': 4.0,
-            '符合': 4.0,
-            '有': 4.0,
-            '是': 4.0,
-            '大部分': 4.0,
-            '大多': 4.0,
-            '較': 4.0,
-            '相當': 4.0,
-            '算': 4.0,
-            
-            '非常': 5.0,
-            '非常同意': 5.0,
-            '非常滿意': 5.0,
-            '非常重要': 5.0,
-            '非常符合': 5.0,
-            '極': 5.0,
-            '極為': 5.0,
-            '完全': 5.0,
-            '完全同意': 5.0,
-            '絕對': 5.0,
-            '最': 5.0,
-            
-            # === 特殊處理：程度副詞 + 形容詞 ===
-            '非常低': 1.0,
-            '很低': 2.0,
-            '低': 2.0,
-            '偏低': 2.5,
-            '中': 3.0,
-            '中等': 3.0,
-            '偏高': 3.5,
-            '高': 4.0,
-            '很高': 4.5,
-            '非常高': 5.0,
-            
-            # === 頻率相關 ===
-            '從不': 1.0,
-            '很少': 2.0,
-            '極少': 2.0,
-            '偶爾': 3.0,
-            '有時': 3.0,
-            '經常': 4.0,
-            '常常': 4.0,
-            '總是': 5.0,
-            '一直': 5.0,
-            '始終': 5.0,
-        }
-        
-        # 精確匹配（優先處理複合詞）
-        for pattern, score in sorted(degree_patterns.items(), key=lambda x: len(x[0]), reverse=True):
-            if pattern in item_str:
-                return (7, score)
-        
-        # 9. 處理「完全沒有」到「完全有」的具體變體
-        completion_order = {
-            '完全沒有': 1,
-            '大部分沒有': 2,
-            '部分沒有': 2.5,
-            '部分': 3,
-            '部分有': 3.5,
-            '大部分有': 4,
-            '完全有': 5,
-            '完全': 5
-        }
-        for key, value in completion_order.items():
-            if key in item_str:
-                return (7, value)
-        
-        # 10. 處理比較級 (低於, 符合, 高於)
-        compare_order = {'低於': 1, '低': 1, '符合': 2, '相當': 2, '高於': 3, '高': 3, '超過': 3}
-        for key, value in compare_order.items():
-            if key in item_str:
-                return (8, value)
-        
-        # 11. 處理純數字開頭
-        num_match = re.match(r'^(\d+\.?\d*)', item_str)
-        if num_match:
-            return (9, float(num_match.group(1)))
-        
-        # 11. 特殊處理：「以上」應該排在最後
-        if '以上' in item_str or '或以上' in item_str or '以上' in item_str:
-            # 提取數字
-            num_in_above = re.search(r'(\d+\.?\d*)', item_str)
-            if num_in_above:
-                return (10, float(num_in_above.group(1)))
-        
-        # 12. 預設：按字典順序
-        return (99, item_str)
-    
-    # 執行排序
-    try:
-        sorted_categories = sorted(categories_list, key=sort_key)
-        return sorted_categories
-    except:
-        # 如果排序失敗，返回原順序
-        return categories_list
+    """智慧排序類別資料（排序規則與快取見 category_order）"""
+    return sort_categories(categories, scheme='app')
 
 # --- 統計函式定義 ---
 def format_p_value(p):
@@ -308,14 +133,12 @@ def generate_academic_conclusion(test_type, p_value, effect_size=None, groups_in
     return conclusion
 
 def _cramers_v_from_table(table):
-    try:
-        chi2, p, dof, exp = chi2_contingency(table)
-        if np.nanmin(exp) <= 1:
-            return None, None, exp
-        n = table.values.sum()
-        return np.sqrt(chi2 / (n * (min(table.shape) - 1))), p, exp
-    except Exception:
+    result = chi_square_test(table)
+    if not result['valid']:
         return None, None, None
+    if result['low_expected']:
+        return None, None, result['expected']
+    return result['cramers_v'], result['p_value'], result['expected']
 
 def compute_and_display_categorical_stats(df, series):
     if PHASE_COLUMN_NAME in df.columns and df[PHASE_COLUMN_NAME].notna().any() and df[PHASE_COLUMN_NAME].nunique() > 1:
@@ -369,32 +192,68 @@ def compute_and_display_numeric_stats(df, series):
     else:
         st.write("未包含多個階段，未進行跨階段數值檢定。")
 
-def compute_and_display_multiselect_option_tests(df, original_series, option_list):
+def compute_and_display_multiselect_option_tests(df, original_series, option_list, long_answers=None, fingerprint=None):
     if PHASE_COLUMN_NAME in df.columns and df[PHASE_COLUMN_NAME].notna().any() and df[PHASE_COLUMN_NAME].nunique() > 1:
         st.markdown("**複選題選項跨階段統計（Presence/Absence 卡方）**")
-        phases = df[PHASE_COLUMN_NAME].fillna('未標註階段')
-        for opt in option_list:
-            pres = original_series.astype(str).fillna('').apply(lambda s: opt in [x.strip() for x in s.split('\n') if x.strip()!=''])
-            table = pd.crosstab(pres, phases)
-            if table.size == 0 or table.values.sum() == 0 or table.shape[0] < 2:
+        # 只計入有作答的受訪者，階段缺失另成一組
+        tests = get_or_compute(
+            fingerprint, original_series.name, 'phase', 'answered_missing_phase_grouped_first10', 'option_chi_square',
+            lambda: _option_chi_square(_long_answers_for(df, original_series.name, long_answers), original_series.name,
+                                       'phase', option_list, universe=df.index.isin(original_series.index),
+                                       missing_group_label='未標註階段'))
+        for test in tests:
+            opt = test['option']
+            if test['size'] == 0 or test['total'] == 0 or test['shape'][0] < 2:
                 st.write(f"選項 '{opt}'：樣本或分類不足，無法進行卡方檢定。")
                 continue
-            try:
-                chi2, p, dof, exp = chi2_contingency(table)
-                if np.nanmin(exp) <= 1:
-                    st.write(f"選項 '{opt}'：期望次數過小 (≤1)，跳過檢定。")
-                else:
-                    n = table.values.sum()
-                    cramers = np.sqrt(chi2 / (n * (min(table.shape) - 1))) if n and min(table.shape) > 1 else None
-                    st.write(f"選項 '{opt}'：{format_p_value(p)}" + (f"；Cramer's V={cramers:.3f} ({interpret_effect_size(cramers_v=cramers)})" if cramers is not None else ""))
-            except Exception as e:
-                st.write(f"選項 '{opt}' 無法計算卡方檢定：{e}")
+            if test['low_expected']:
+                st.write(f"選項 '{opt}'：期望次數過小 (≤1)，跳過檢定。")
+            else:
+                p = test['p_value']
+                cramers = test['cramers_v'] if not np.isnan(test['cramers_v']) else None
+                st.write(f"選項 '{opt}'：{format_p_value(p)}" + (f"；Cramer's V={cramers:.3f} ({interpret_effect_size(cramers_v=cramers)})" if cramers is not None else ""))
     else:
         st.write("未包含多個階段，未進行複選題跨階段檢定。")
 
-def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeric=False, is_multiselect=False):
+def _long_answers_for(df, col_name, long_answers=None):
+    """取得包含指定題目的複選題長表；未預先建立時只針對該題建立"""
+    if long_answers is None or col_name not in long_answers['slices']:
+        return build_long_answers(df, [col_name])
+    return long_answers
+
+def _option_chi_square(long_answers, col_name, group, options, universe=None, missing_group_label=None):
+    """
+    各選項 有選/未選 × 分組 的卡方檢定：人數由指示矩陣一次算出，檢定一次批次計算
+    回傳每個選項一筆 dict（option, shape/size/total 為列聯表大小與總數, low_expected, p_value, cramers_v），
+    只保留檢定結果，可直接存入統計結果快取
+    """
+    present, totals = option_presence_counts(long_answers, col_name, group, universe=universe,
+                                             missing_group_label=missing_group_label)
+    tables = [option_presence_table(present, totals, opt) for opt in options]
+    results = chi_square_batch(tables)
+    return [{
+        'option': opt,
+        'shape': table.shape,
+        'size': table.size,
+        'total': table.values.sum(),
+        'low_expected': bool(results['low_expected'][i]),
+        'p_value': results['p_value'][i],
+        'cramers_v': results['cramers_v'][i],
+    } for i, (opt, table) in enumerate(zip(options, tables))]
+
+def _respondent_filter_key(df):
+    """
+    身分篩選條件的快取鍵：資料中只有公司方/投資方時，「限公司方與投資方」與「全部身分」
+    是同一群受訪者，報告推薦與逐題分析的卡方檢定可共用同一筆結果
+    """
+    roles = set(df['respondent_type'].dropna().unique()) if 'respondent_type' in df.columns else set()
+    return 'all_roles' if roles <= {'公司方', '投資方'} else 'company_investor'
+
+def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeric=False, is_multiselect=False, long_answers=None, fingerprint=None):
     """
     綜合統計分析：分析公司方 vs 投資方、不同階段之間的差異
+    long_answers: 預先建立的複選題長表（build_long_answers），複選題選項直接由此取得
+    fingerprint: 資料集指紋（stats_cache.dataset_fingerprint），提供時檢定結果先查統計結果快取
     """
     st.markdown("---")
     st.markdown("### 📈 統計分析報告")
@@ -436,7 +295,9 @@ def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeri
                     }), use_container_width=True)
                     
                     try:
-                        stat, p = mannwhitneyu(company_vals, investor_vals, alternative='two-sided')
+                        stat, p = get_or_compute(
+                            fingerprint, col_name, 'respondent_type', 'company_investor_numeric', 'mann_whitney',
+                            lambda: mannwhitneyu(company_vals, investor_vals, alternative='two-sided'))
                         st.markdown("**Mann-Whitney U 檢定結果：**")
                         st.write(f"- U 統計量 = {stat:.2f}")
                         st.write(f"- {format_p_value(p)}")
@@ -464,29 +325,19 @@ def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeri
             elif is_multiselect:
                 # 複選題：對每個選項進行卡方檢定
                 st.markdown("**複選題選項分析（公司方 vs 投資方）：**")
-                exploded = col_data.astype(str).str.split('\n').explode().str.strip()
-                exploded = exploded[(exploded != '') & (exploded != 'nan') & exploded.notna()]
+                options = option_labels(_long_answers_for(df, col_name, long_answers), col_name)
                 
-                if not exploded.empty:
-                    options = exploded.unique()
-                    for opt in options[:10]:  # 限制前10個選項避免過多
-                        has_opt = col_data.astype(str).apply(lambda x: opt in [s.strip() for s in str(x).split('\n') if s.strip()])
-                        opt_data = pd.DataFrame({
-                            'has_option': has_opt[respondent_data.isin(['公司方', '投資方'])],
-                            'respondent': respondent_data[respondent_data.isin(['公司方', '投資方'])]
-                        }).dropna()
-                        
-                        if len(opt_data) > 0:
-                            table = pd.crosstab(opt_data['has_option'], opt_data['respondent'])
-                            if table.shape[0] >= 2 and table.shape[1] >= 2:
-                                try:
-                                    chi2, p, dof, exp = chi2_contingency(table)
-                                    if np.nanmin(exp) > 1:
-                                        n = table.values.sum()
-                                        cramers = np.sqrt(chi2 / (n * (min(table.shape) - 1)))
-                                        st.write(f"**選項「{opt}」：** {format_p_value(p)}，Cramér's V = {cramers:.3f}")
-                                except Exception:
-                                    pass
+                if len(options) > 0:
+                    # 有作答且身分為公司方/投資方的受訪者，限制前10個選項避免過多
+                    tests = get_or_compute(
+                        fingerprint, col_name, 'respondent_type', 'answered_company_investor_first10', 'option_chi_square',
+                        lambda: _option_chi_square(
+                            _long_answers_for(df, col_name, long_answers), col_name, 'respondent_type', options[:10],
+                            universe=df.index.isin(col_data.index) & df['respondent_type'].isin(['公司方', '投資方']).to_numpy()))
+                    for test in tests:
+                        if test['total'] > 0 and test['shape'][0] >= 2 and test['shape'][1] >= 2:
+                            if not test['low_expected']:
+                                st.write(f"**選項「{test['option']}」：** {format_p_value(test['p_value'])}，Cramér's V = {test['cramers_v']:.3f}")
             
             else:
                 # 類別型資料：卡方檢定
@@ -502,11 +353,12 @@ def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeri
                     
                     if table.shape[0] >= 2 and table.shape[1] >= 2:
                         try:
-                            chi2, p, dof, exp = chi2_contingency(table)
+                            # 與報告推薦的身分卡方檢定為同一組受訪者時共用快取結果
+                            result = get_or_compute(fingerprint, col_name, 'respondent_type', _respondent_filter_key(df),
+                                                    'chi_square', lambda: chi_square_test(table))
+                            chi2, p, dof, cramers = result['chi2'], result['p_value'], result['dof'], result['cramers_v']
                             
-                            if np.nanmin(exp) > 1:
-                                n = table.values.sum()
-                                cramers = np.sqrt(chi2 / (n * (min(table.shape) - 1)))
+                            if not result['low_expected']:
                                 
                                 st.markdown("**卡方檢定結果：**")
                                 st.write(f"- χ² = {chi2:.2f}, df = {dof}")
@@ -575,7 +427,8 @@ def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeri
                     }), use_container_width=True)
                     
                     try:
-                        stat, p = kruskal(*groups)
+                        stat, p = get_or_compute(fingerprint, col_name, PHASE_COLUMN_NAME, 'numeric_missing_phase_grouped',
+                                                 'kruskal', lambda: kruskal(*groups))
                         st.markdown("**Kruskal-Wallis H 檢定結果：**")
                         st.write(f"- H 統計量 = {stat:.2f}")
                         st.write(f"- {format_p_value(p)}")
@@ -593,7 +446,7 @@ def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeri
                 # 複選題：對每個選項進行階段間卡方檢定
                 st.markdown("**複選題選項階段分析：**")
                 compute_and_display_multiselect_option_tests(df, col_data, 
-                    col_data.astype(str).str.split('\n').explode().str.strip().unique()[:10])
+                    option_labels(_long_answers_for(df, col_name, long_answers), col_name)[:10], long_answers, fingerprint)
             
             else:
                 # 類別型資料：卡方檢定
@@ -609,11 +462,11 @@ def perform_comprehensive_statistical_analysis(df, col_data, col_name, is_numeri
                     
                     if table.shape[0] >= 2 and table.shape[1] >= 2:
                         try:
-                            chi2, p, dof, exp = chi2_contingency(table)
+                            result = get_or_compute(fingerprint, col_name, PHASE_COLUMN_NAME, 'valid_labels_missing_phase_grouped',
+                                                    'chi_square', lambda: chi_square_test(table))
+                            chi2, p, dof, cramers = result['chi2'], result['p_value'], result['dof'], result['cramers_v']
                             
-                            if np.nanmin(exp) > 1:
-                                n = table.values.sum()
-                                cramers = np.sqrt(chi2 / (n * (min(table.shape) - 1)))
+                            if not result['low_expected']:
                                 
                                 st.markdown("**卡方檢定結果：**")
                                 st.write(f"- χ² = {chi2:.2f}, df = {dof}")
@@ -635,59 +488,8 @@ st.set_page_config(layout="wide", page_title="問卷互動分析報告")
 
 @st.cache_data
 def load_and_concat(file_paths):
-    all_dfs = []
-    for path in file_paths:
-        if not isinstance(path, str) or path.strip() == "":
-            continue
-        if not os.path.exists(path):
-            continue
-        df = None
-        for enc in ("utf-8", "utf-8-sig", "latin1"):
-            try:
-                # 先讀取前2行檢查格式
-                df_check = pd.read_csv(path, encoding=enc, nrows=2)
-                
-                # 檢查第一列的第一個欄位值是否包含檔案名稱格式
-                first_col = df_check.columns[0]
-                first_val = str(df_check.iloc[0, 0]) if len(df_check) > 0 else ''
-                
-                # 如果第一列第一個值看起來像檔名，或第一欄名稱包含STANDARD_，則跳過第一行
-                should_skip = False
-                if 'STANDARD_' in first_col or 'STANDARD_' in first_val:
-                    should_skip = True
-                # 或者檢查是否第一列所有值都是NaN（表示第一行只是檔名）
-                elif len(df_check) > 0 and df_check.iloc[0].isna().all():
-                    should_skip = True
-                
-                if should_skip:
-                    df = pd.read_csv(path, encoding=enc, skiprows=1)
-                else:
-                    df = pd.read_csv(path, encoding=enc)
-                break
-            except Exception:
-                pass
-        if df is None:
-            continue
-        try:
-            df.columns = df.columns.str.replace(r'【.*?】', '', regex=True).str.strip()
-            df.columns = df.columns.str.replace('\n', ' ', regex=False)
-        except Exception:
-            pass
-        try:
-            if PHASE_COLUMN_NAME in df.columns:
-                extracted = df[PHASE_COLUMN_NAME].astype(str).str.extract(r'(第一階段|第二階段|第三階段)', expand=False)
-                df[PHASE_COLUMN_NAME] = extracted.where(extracted.notna(), df[PHASE_COLUMN_NAME])
-            else:
-                m = re.search(r'(第一階段|第二階段|第三階段)', os.path.basename(path))
-                if m:
-                    df[PHASE_COLUMN_NAME] = m.group(1)
-        except Exception:
-            pass
-        df['_source_file'] = os.path.basename(path)
-        all_dfs.append(df)
-    if not all_dfs:
-        return pd.DataFrame()
-    return pd.concat(all_dfs, ignore_index=True, sort=False)
+    # 解析結果以檔案內容雜湊快取於 .survey_cache，冷啟動時不需重新解析 CSV
+    return load_survey_files(file_paths)
 
 st.title("📊 問卷資料互動分析報告")
 st.markdown("請先選擇分析模式，然後再根據提示選擇要查看的資料範圍。")
@@ -718,12 +520,15 @@ analysis_mode = st.radio("**步驟一：請選擇分析模式**", ('逐題瀏覽
 df_to_analyze = None
 report_title = ""
 files_to_load = []
+# 目前的資料選擇（模式、對象、階段）；與載入的檔案清單一起作為分析資料組快取的鍵
+selection_key = ()
 
 if analysis_mode == '逐題瀏覽':
     data_source = st.radio("**步驟二：請選擇要分析的對象**", ('公司方', '投資方'), horizontal=True, key="data_source")
     files = company_files if data_source == '公司方' else investor_files
     phase_options = ["不分階段 (全部合併)"] + list(files.keys())
     selected_phase = st.radio("**步驟三：請選擇問卷階段**", phase_options, horizontal=False, key="phase_select")
+    selection_key = (analysis_mode, data_source, selected_phase)
     
     if selected_phase == "不分階段 (全部合併)":
         files_to_load = list(files.values())
@@ -747,6 +552,7 @@ if analysis_mode == '逐題瀏覽':
 
 elif analysis_mode == '合併分析':
     combine_option = st.radio("**步驟二：請選擇合併方式**", ('合併所有階段', '合併第一階段', '合併第二階段', '合併第三階段'), horizontal=False, key="combine_option")
+    selection_key = (analysis_mode, combine_option)
     
     if combine_option == '合併所有階段':
         files_to_load = list(company_files.values()) + list(investor_files.values()) + [COMPANY_NEW_MULTIPHASE_FILE]
@@ -834,198 +640,9 @@ def normalize_question(q):
     
     return q
 
-def normalize_question_v2(q):
-    """更激進的標準化：移除所有身分標記和冗餘詞彙"""
-    if not isinstance(q, str):
-        return q
-    
-    # 0. 特殊處理：內部控制循環題目（完全統一格式）
-    if '內部控制循環' in q and '建立書面控制程序與執行自評' in q:
-        # 先移除項目列表 (1)(2)(3)...
-        q = re.sub(r'\s*[\(（]1[\)）][^？?]*', '', q)
-        # 再統一文字內容（移除標點和問號）
-        q = q.replace('針對下列內部控制循環，您投資的公司在建立書面控制程序與執行自評的進度為何？', 
-                     '公司針對下列內部控制循環建立書面控制程序與執行自評進度')
-        q = q.replace('公司針對下列內部控制循環，建立書面控制程序與執行自評的進度為何？', 
-                     '公司針對下列內部控制循環建立書面控制程序與執行自評進度')
-        q = q.replace('針對下列內部控制循環，您投資的公司在建立書面控制程序與執行自評的進度為何', 
-                     '公司針對下列內部控制循環建立書面控制程序與執行自評進度')
-        q = q.replace('公司針對下列內部控制循環，建立書面控制程序與執行自評的進度為何', 
-                     '公司針對下列內部控制循環建立書面控制程序與執行自評進度')
-    
-    # 1. 移除「未命名題目 - 」前綴
-    q = re.sub(r'^未命名題目[\s\-－—–：:]*', '', q)
-    
-    # 2. 統一填空符號（先處理，避免後續被誤刪）
-    q = re.sub(r'_{2,}', ' _ ', q)
-    q = re.sub(r'\([\s_]*\)', ' _ ', q)
-    q = re.sub(r'（[\s_]*）', ' _ ', q)
-    
-    # 3. 統一「董監事」相關詞彙（提前處理）
-    q = q.replace('董監事席次', '董事席次')
-    q = q.replace('董監事 _ 位', '董事 _ 位')
-    
-    # 4. 移除「在...方面」、「在...上」等介系詞片語
-    q = re.sub(r'在(.{1,15}?)方面', r'\1', q)
-    q = re.sub(r'在(.{1,15}?)上', r'\1', q)
-    
-    # 5. 統一「其」、「的」、「目前的」、「之」等語氣詞
-    q = q.replace('其定期性董事會', '定期性董事會')
-    q = q.replace('其董事會', '董事會')
-    q = q.replace('其股東結構', '股東結構')
-    q = q.replace('其董事及經理人', '董事及經理人')
-    q = q.replace('其員工人數', '員工人數')
-    q = q.replace('其員工分紅', '員工分紅')
-    q = q.replace('的定期性董事會', '定期性董事會')
-    q = q.replace('的股東結構', '股東結構')
-    q = q.replace('的董事間', '董事間')
-    q = q.replace('目前的董事席次', '董事席次')
-    q = q.replace('目前的監察人席次', '監察人席次')
-    q = q.replace('目前的', '')
-    q = q.replace('之董事長', '董事長')
-    q = q.replace('之董事會', '董事會')
-    q = q.replace('之董事', '董事')
-    q = q.replace('之監察人', '監察人')
-    q = q.replace('之大股東', '大股東')
-    q = q.replace('之經營團隊', '經營團隊')
-    q = q.replace('之現金流量', '現金流量')
-    
-    # 6. 補充缺失的主題標籤
-    if ' - ' not in q and '揭露董事的個別酬金' in q:
-        q = '資訊透明度 - ' + q
-    if ' - ' not in q and '揭露總經理及副總經理的個別酬金' in q:
-        q = '資訊透明度 - ' + q
-    if ' - ' not in q and '董事及經理人的酬金與公司績效連動' in q:
-        q = '資訊透明度 - ' + q
-    if ' - ' not in q and '諮詢顧問' in q and '頻率' in q:
-        q = '董事會結構與運作 - ' + q
-    if ' - ' not in q and ('董事席次' in q or '監察人席次' in q):
-        q = '董事會結構與運作 - ' + q
-    
-    # 7. 統一身分相關詞彙（更全面的替換）
-    identity_replacements = [
-        # === 最高優先：精確完整匹配（包含所有可能的變體）===
-        # 內部控制循環題目（特殊處理：投資方版本缺少項目列表）
-        ('針對下列內部控制循環，您投資的公司在建立書面控制程序與執行自評的進度為何？', '公司針對下列內部控制循環建立書面控制程序與執行自評進度'),
-        # === 以上為新增 ===
-        # 特定句型優先處理（更詳細的對應）
-        ('您主要投資的未上市（櫃）公司所屬產業類別', '主要產業類別'),
-        ('您投資的公司其員工人數', '員工人數'),
-        ('您投資的公司其員工分紅', '公司員工分紅'),
-        ('您投資的公司其股東結構中包含法人股東（如創投）', '公司股東結構中包含法人股東'),
-        ('公司的股東結構中包含法人股東或創投', '公司股東結構中包含法人股東'),
-        ('您投資的公司在現金流量規劃與監控制度的建立程度如何', '公司現金流量規劃與監控制度建立程度'),
-        ('您認為公司現金流量規劃與監控制度的建立程度如何', '公司現金流量規劃與監控制度建立程度'),
-        ('您投資的公司在建立書面核准流程有困難', '公司建立書面核准流程是挑戰'),
-        ('建立書面核准流程對公司來說是一項挑戰', '公司建立書面核准流程是挑戰'),
-        ('承上題，您投資的公司之現金流量足以支撐公司營運幾個月', '承上題公司現金流量足以支撐公司營運幾個月'),
-        ('承上題您認為公司現金流量足以支撐公司營運幾個月', '承上題公司現金流量足以支撐公司營運幾個月'),
-        ('您投資的公司有清楚的向股東揭露董事的個別酬金', '公司清楚的向股東揭露董事的個別酬金'),
-        ('您投資的公司有清楚的向股東揭露總經理及副總經理的個別酬金', '公司清楚的向股東揭露總經理及副總經理的個別酬金'),
-        ('請問您投資的公司之大股東（持股5%以上）人數有多少人', '公司大股東（持股5%以上）人數'),
-        ('請問公司的大股東（持股5%以上）人數多少人', '公司大股東（持股5%以上）人數'),
-        ('請問您投資的公司之大股東', '公司大股東'),
-        ('請問您投資的公司', '公司'),
-        ('您投資的公司在過去12個月內，董事會的召開頻率為何', '公司過去12個月內，董事會召開頻率'),
-        ('在過去12個月內，貴公司董事會的召開頻率為何', '公司過去12個月內，董事會召開頻率'),
-        ('您投資的公司', '公司'),
-        ('請填寫公司董事席次', '公司董事席次'),
-        ('請填寫公司監察人席次', '公司監察人席次'),
-        ('請填寫公司董監事席次', '公司董事席次'),
-        ('您投資的公司其定期性董事會的議事內容', '公司定期性董事會的議事內容'),
-        ('您投資的公司定期性董事會的議事內容', '公司定期性董事會的議事內容'),
-        ('公司定期性董事會的議事內容', '公司定期性董事會的議事內容'),
-        ('您投資的公司有清楚的向股東揭露', '公司清楚的向股東揭露'),
-        ('您投資的公司清楚的向股東揭露', '公司清楚的向股東揭露'),
-        ('貴公司有清楚的向股東揭露', '公司清楚的向股東揭露'),
-        ('貴公司清楚的向股東揭露', '公司清楚的向股東揭露'),
-        ('您投資的公司在諮詢顧問', '公司諮詢顧問'),
-        ('您投資的公司諮詢顧問', '公司諮詢顧問'),
-        ('您投資的公司在訂定財會作業程序上會', '公司訂定財會作業程序'),
-        ('訂定財會作業程序對公司來說', '公司訂定財會作業程序'),
-        ('請填寫公司', '公司'),
-        ('貴公司董事會', '公司董事會'),
-        ('貴公司', '公司'),
-        # 通用替換
-        ('您投資的公司有', '公司'),
-        ('您投資的公司其', '公司'),
-        ('您投資的公司在', '公司'),
-        ('您投資的公司會', '公司'),
-        ('貴公司有', '公司'),
-        ('貴公司在', '公司'),
-        ('您認為公司', '公司'),
-        ('您認為', ''),
-        ('請問公司', '公司'),
-        ('請填寫', ''),
-    ]
-    
-    for old, new in identity_replacements:
-        q = q.replace(old, new)
-    
-    # 8. 移除題目開頭的冗餘前綴（修正正則表達式）
-    q = re.sub(r'^(公司方[\s\-－—–：:]+|投資方[\s\-－—–：:]+|請問[\s\-－—–：:]*|請填寫[\s\-－—–：:]*)', '', q)
-    
-    # 9. 統一冒號和「位」的格式
-    q = q.replace('： 董事', '：董事')
-    q = q.replace(': 董事', '：董事')
-    q = q.replace('： 監察人', '：監察人')
-    q = q.replace(': 監察人', '：監察人')
-    q = re.sub(r'：[\s]+董事', '：董事', q)
-    q = re.sub(r'：[\s]+監察人', '：監察人', q)
-    
-    # 10. 統一「頻率為何」、「為何」、「如何」、「多少人」等問句
-    q = q.replace('的召開頻率為何', '召開頻率')
-    q = q.replace('召開頻率為何', '召開頻率')
-    q = q.replace('的頻率為何？', '頻率')
-    q = q.replace('頻率為何？', '頻率')
-    q = q.replace('為何？', '')
-    q = q.replace('如何？', '')
-    q = q.replace('的頻率', '頻率')
-    q = q.replace('的建立程度如何', '建立程度')
-    q = q.replace('建立程度如何', '建立程度')
-    q = q.replace('的進度為何', '進度')
-    q = q.replace('進度為何', '進度')
-    q = q.replace('人數有多少人', '人數')
-    q = q.replace('人數多少人', '人數')
-    q = q.replace('有多少人', '')
-    q = q.replace('多少人', '')
-    
-    # 11. 統一標點符號
-    q = q.replace('－', ' - ').replace('—', ' - ').replace('–', ' - ')
-    q = q.replace('：', ':').replace('。', '.')
-    q = q.replace('？', '').replace('?', '')
-    
-    # 12. 統一括號與複選標記
-    q = q.replace('(可複選)', '').replace('（可複選）', '')
-    q = q.replace('(複選)', '').replace('（複選）', '')
-    q = q.replace('（如創投）', '')
-    q = q.replace('或創投', '')
-    
-    # 移除括號內的詳細說明（包含多個空格的情況）
-    q = re.sub(r'\s{2,}\([^\)]+\)', '', q)
-    q = re.sub(r'\s*\([^\)]{10,}\)', '', q)
-    q = re.sub(r'\s*（[^）]{10,}）', '', q)
-    
-    # 13. 移除「位」前的多餘空格和符號
-    q = re.sub(r'[\s_]+位', '位', q)
-    
-    # 14. 統一「是/會/有」等助動詞和語氣詞
-    q = q.replace('來說是', '')
-    q = q.replace('對公司來說是一項挑戰', '是挑戰')
-    q = q.replace('對公司來說是不小的負擔', '是負擔')
-    q = q.replace('上會是', '')
-    q = q.replace('會是', '')
-    q = q.replace('有困難', '是挑戰')
-    q = q.replace('是不小的負擔', '是負擔')
-    
-    # 15. 移除多餘空白
-    q = re.sub(r'\s+', ' ', q).strip()
-    
-    # 16. 移除尾部標點
-    q = q.rstrip('：:。.,;；？?')
-    
-    return q
+# 更激進的標準化 normalize_question_v2 由 question_normalize 套用 normalize_rules.json 的改寫規則
 
+@memoized('calculate_similarity')
 def calculate_similarity(s1, s2):
     """計算兩個字串的相似度 (0-1)，考慮核心內容差異"""
     # 使用 SequenceMatcher 計算基礎相似度
@@ -1050,69 +667,63 @@ def merge_similar_questions(df, cols_to_exclude, similarity_threshold=0.75):  #
     基於相似度合併題目（更積極處理「未命名題目」與單方題目）
     
     Returns:
+        - df_merged: 合併後的新資料表（只含代表題目與排除欄位，不修改傳入的 df）
         - merged_mapping: {代表題目: [所有原始題目]}
         - cols_to_analyze: 去重後的題目列表
     """
     all_cols = [c for c in df.columns if c not in cols_to_exclude]
     
-    # 第一步：標準化並分組（標準化後相同的題目會自動合併）
-    normalized_groups = {}
-    for col in all_cols:
-        norm = normalize_question_v2(col)
-        if norm not in normalized_groups:
-            normalized_groups[norm] = []
-        normalized_groups[norm].append(col)
-    
-    # 第二步：相似度匹配（處理標準化後仍有細微差異的情況）
-    merged_mapping = {}
-    processed = set()
-    
-    norm_keys = list(normalized_groups.keys())
-    for i, norm1 in enumerate(norm_keys):
-        if norm1 in processed:
-            continue
-        
-        # 找出所有相似的標準化題目（包括 norm1 本身）
-        similar_group = [norm1]
-        for norm2 in norm_keys[i+1:]:
-            if norm2 in processed:
-                continue
-            similarity = calculate_similarity(norm1, norm2)
-            if similarity >= similarity_threshold:
-                similar_group.append(norm2)
-                processed.add(norm2)
-        
-        # 合併所有相似題目的原始欄位
-        all_originals = []
-        for norm in similar_group:
-            all_originals.extend(normalized_groups[norm])
-        
-        # 優先選擇沒有「未命名題目」且較短的作為代表（公司方優先）
-        representative = None
-        for orig in sorted(all_originals, key=lambda x: (len(x), '投資' in x)):
-            if '未命名題目' not in orig:
-                representative = orig
-                break
-        if representative is None:  # 如果全部都是未命名題目
-            representative = all_originals[0]
-        
-        merged_mapping[representative] = all_originals
-        processed.add(norm1)
-    
-    # 第三步：資料合併
-    for representative, originals in merged_mapping.items():
-        if len(originals) > 1:
-            for other_col in originals[1:]:
-                # 優先保留代表題目的資料，用其他題目填補缺失
-                mask = df[representative].isna() & df[other_col].notna()
-                df.loc[mask, representative] = df.loc[mask, other_col]
+    # 標準化 → 相似度分組 → 選代表題目；欄位清單與門檻不變時直接讀回保存的對照表（merge_mapping）
+    artifact = get_merge_mapping(
+        df, all_cols, normalize_question_v2, calculate_similarity, similarity_threshold,
+        method='app', version=method_version(normalize_question_v2, calculate_similarity, rules_version())
+    )
+    merged_mapping = merged_mapping_from(artifact)
+    
+    # 資料合併：優先保留代表題目的資料，用其他題目填補缺失（一次建立所有代表題目欄位）
+    df_merged = coalesce_merged_columns(df, merged_mapping, keep=cols_to_exclude)
 
     cols_to_analyze = list(merged_mapping.keys())
-    return merged_mapping, cols_to_analyze
+    return df_merged, merged_mapping, cols_to_analyze
+
+def _is_valid_answer_label(label):
+    """排除字串化後含 nan 的答案（與原本 ~str.contains('nan') 的篩選相同）"""
+    return 'nan' not in label.lower()
 
-def generate_report_recommendations(df, cols_to_analyze, analysis_mode):
-    """分析並推薦值得納入報告的題目"""
+def generate_report_recommendations(df, cols_to_analyze, analysis_mode, response_matrix=None, long_answers=None, fingerprint=None, question_types=None, completeness=None):
+    """
+    分析並推薦值得納入報告的題目
+    fingerprint: 資料集指紋，提供時各題檢定結果先查統計結果快取（逐題分析與重新執行時共用）
+    question_types: 題型登錄表（build_question_types），未提供時自行建立
+    completeness: 資料完整度矩陣（build_completeness），各題樣本數與缺失率由此取得，未提供時自行建立
+    """
+    if response_matrix is None:
+        response_matrix = build_response_matrix(df, cols_to_analyze)
+    if long_answers is None:
+        long_answers = build_long_answers(df, cols_to_analyze)
+    if question_types is None:
+        question_types = build_question_types(df, cols_to_analyze)
+    if completeness is None:
+        completeness = build_completeness(df, cols_to_analyze)
     recommendations = []
+
+    # 類別題 × 身分 的卡方檢定：快取未命中的題目一次批次計算（補零的 3-D 次數陣列）
+    categorical_chi = {}
+    if analysis_mode == '合併分析' and 'respondent_type' in df.columns:
+        missing = []
+        for q in cols_to_analyze:
+            hit, result = lookup(fingerprint, q, 'respondent_type', 'all_roles', 'chi_square')
+            if hit:
+                categorical_chi[q] = result
+            else:
+                missing.append(q)
+        if missing:
+            chi_questions, chi_counts = answer_group_counts(response_matrix, 'respondent_type', missing,
+                                                            keep_label=_is_valid_answer_label)
+            batch = chi_square_batch(chi_counts)
+            for i, q in enumerate(chi_questions):
+                categorical_chi[q] = chi_square_result(batch, i)
+                store(fingerprint, q, 'respondent_type', 'all_roles', 'chi_square', categorical_chi[q])
     processed_cols = set()
     
     for col_name in cols_to_analyze:
@@ -1127,59 +738,47 @@ def generate_report_recommendations(df, cols_to_analyze, analysis_mode):
         recommendation = {
             '題目': col_name[:80] + '...' if len(col_name) > 80 else col_name,
             '完整題目': col_name,
-            '樣本數': int(df[col_name].notna().sum()),
-            '缺失率': f"{(df[col_name].isna().sum() / len(df) * 100):.1f}%",
+            '樣本數': non_null_count(completeness, col_name),
+            '缺失率': f"{missing_rate(completeness, col_name) * 100:.1f}%",
             '推薦理由': [],
             '優先順序': 0.0,
             '統計結果': {}
         }
         
-        is_multiselect = col_series.dtype == 'object' and col_series.astype(str).str.contains('\n', na=False).any()
+        qtype = question_type(question_types, df, col_name)
+        is_multiselect = qtype['type'] == 'multiselect'
         
         # 只在合併分析且有 respondent_type 時進行比較檢定
         if analysis_mode == '合併分析' and 'respondent_type' in df.columns:
             try:
                 if is_multiselect:
-                    exploded = col_series.astype(str).str.split('\n').explode().str.strip()
-                    exploded = exploded[(exploded != '') & (exploded != 'nan') & exploded.notna()]
-                    if not exploded.empty:
-                        total_counts = exploded.value_counts()
+                    total_counts = option_counts(long_answers, col_name)
+                    if not total_counts.empty:
                         significant_count = 0
-                        for opt in total_counts.index[:10]:
-                            if pd.isna(opt) or str(opt).lower() == 'nan':
-                                continue
-                            pres = df[col_name].astype(str).fillna('').apply(
-                                lambda s: opt in [x.strip() for x in s.split('\n') if x.strip()!='' and x.strip().lower()!='nan']
-                            )
-                            table = pd.crosstab(pres, df['respondent_type'])
-                            if table.size > 0 and table.values.sum() > 0 and table.shape[0] >= 2:
-                                try:
-                                    chi2, p, dof, exp = chi2_contingency(table)
-                                    if np.nanmin(exp) > 1 and p < 0.05:
-                                        significant_count += 1
-                                        recommendation['統計結果'].setdefault('顯著選項', []).append({'選項': opt, 'p': p})
-                                        if p < 0.001:
-                                            recommendation['優先順序'] += 3
-                                        elif p < 0.01:
-                                            recommendation['優先順序'] += 2
-                                        else:
-                                            recommendation['優先順序'] += 1
-                                except Exception:
-                                    pass
+                        top_options = [opt for opt in total_counts.index[:10]
+                                       if not (pd.isna(opt) or str(opt).lower() == 'nan')]
+                        tests = get_or_compute(
+                            fingerprint, col_name, 'respondent_type', 'all_respondents_top10', 'option_chi_square',
+                            lambda: _option_chi_square(long_answers, col_name, 'respondent_type', top_options))
+                        for test in tests:
+                            opt = test['option']
+                            if test['size'] > 0 and test['total'] > 0 and test['shape'][0] >= 2:
+                                p = test['p_value']
+                                if not test['low_expected'] and p < 0.05:
+                                    significant_count += 1
+                                    recommendation['統計結果'].setdefault('顯著選項', []).append({'選項': opt, 'p': p})
+                                    if p < 0.001:
+                                        recommendation['優先順序'] += 3
+                                    elif p < 0.01:
+                                        recommendation['優先順序'] += 2
+                                    else:
+                                        recommendation['優先順序'] += 1
                         if significant_count > 0:
                             recommendation['推薦理由'].append(f"有 {significant_count} 個選項在公司方/投資方間呈現統計顯著差異")
                             recommendation['統計結果']['顯著選項數'] = significant_count
                 else:
-                    is_numeric = pd.api.types.is_numeric_dtype(col_series)
-                    if not is_numeric:
-                        numeric_version = pd.to_numeric(col_series, errors='coerce').dropna()
-                        if len(numeric_version) > 0 and (len(numeric_version) / len(col_series) > 0.7):
-                            is_numeric = True
-                            col_num = numeric_version
-                        else:
-                            is_numeric = False
-                    else:
-                        col_num = pd.to_numeric(col_series, errors='coerce').dropna()
+                    is_numeric = qtype['type'] == 'numeric'
+                    col_num = qtype['numeric']
                     
                     if is_numeric:
                         groups = []
@@ -1189,7 +788,9 @@ def generate_report_recommendations(df, cols_to_analyze, analysis_mode):
                                 groups.append(grp.astype(float))
                         if len(groups) == 2:
                             try:
-                                stat, p = mannwhitneyu(groups[0], groups[1], alternative='two-sided')
+                                stat, p = get_or_compute(
+                                    fingerprint, col_name, 'respondent_type', 'all_roles_numeric', 'mann_whitney',
+                                    lambda: mannwhitneyu(groups[0], groups[1], alternative='two-sided'))
                                 median_diff = abs(np.median(groups[0]) - np.median(groups[1]))
                                 recommendation['統計結果']['p'] = float(p)
                                 recommendation['統計結果']['median_diff'] = float(median_diff)
@@ -1200,41 +801,41 @@ def generate_report_recommendations(df, cols_to_analyze, analysis_mode):
                                 pass
                         elif len(groups) > 2:
                             try:
-                                stat, p = kruskal(*groups)
+                                stat, p = get_or_compute(fingerprint, col_name, 'respondent_type', 'all_roles_numeric',
+                                                         'kruskal', lambda: kruskal(*groups))
                                 if p < 0.05:
                                     recommendation['推薦理由'].append("跨組差異顯著 (Kruskal-Wallis)")
                                     recommendation['優先順序'] += 2
                             except Exception:
                                 pass
                     else:
-                        s = col_series.astype(str)
-                        s = s[~s.str.lower().str.contains('nan', na=False)]
-                        if not s.empty:
-                            table = pd.crosstab(s, df.loc[s.index, 'respondent_type'])
-                            if table.size > 0 and table.values.sum() > 0:
-                                try:
-                                    if table.shape == (2, 2) and table.values.sum() < 20:
-                                        oddsratio, p = fisher_exact(table)
-                                    else:
-                                        chi2, p, dof, exp = chi2_contingency(table)
+                        chi = categorical_chi[col_name]
+                        if chi['valid']:
+                            try:
+                                if (chi['rows'], chi['cols']) == (2, 2) and chi['n'] < 20:
+                                    oddsratio, p = get_or_compute(
+                                        fingerprint, col_name, 'respondent_type', 'all_roles', 'fisher_exact',
+                                        lambda: fisher_exact(answer_group_table(response_matrix, col_name, 'respondent_type',
+                                                                                keep_label=_is_valid_answer_label)))
+                                else:
+                                    p = chi['p_value']
                                     
-                                    if p < 0.05:
-                                        recommendation['推薦理由'].append(f"公司方/投資方分佈顯著差異 (p={p:.3f})")
-                                        recommendation['統計結果']['p'] = float(p)
-                                        if p < 0.001:
-                                            recommendation['優先順序'] += 3
-                                        elif p < 0.01:
-                                            recommendation['優先順序'] += 2
-                                        else:
-                                            recommendation['優先順序'] += 1
-                                except Exception:
-                                    pass
+                                if p < 0.05:
+                                    recommendation['推薦理由'].append(f"公司方/投資方分佈顯著差異 (p={p:.3f})")
+                                    recommendation['統計結果']['p'] = float(p)
+                                    if p < 0.001:
+                                        recommendation['優先順序'] += 3
+                                    elif p < 0.01:
+                                        recommendation['優先順序'] += 2
+                                    else:
+                                        recommendation['優先順序'] += 1
+                            except Exception:
+                                pass
             except Exception:
                 pass
         
         # 額外評分標準
-        missing_rate = df[col_name].isna().sum() / len(df)
-        if missing_rate < 0.05:
+        if missing_rate(completeness, col_name) < 0.05:
             recommendation['推薦理由'].append("資料完整度高 (缺失 < 5%)")
             recommendation['優先順序'] += 1
         
@@ -1250,104 +851,104 @@ def generate_report_recommendations(df, cols_to_analyze, analysis_mode):
     recommendations.sort(key=lambda x: x['優先順序'], reverse=True)
     return recommendations
 
-def generate_professional_report(df, recommendations, cols_to_analyze, analysis_mode):
+def build_professional_model(df, recommendations, cols_to_analyze, analysis_mode):
     """
-    生成符合國發基金需求的專業分析報告
+    生成符合國發基金需求的專業分析報告（報告模型，Markdown / HTML 由同一份模型輸出）
     結構：執行摘要 → 方法論 → 主要發現 → 結論與建議
     """
-    report = []
+    model = ReportModel()
     
     # === 1. 標題與基本資訊 ===
-    report.append("# 未上市櫃公司治理問卷分析報告")
-    report.append(f"\n**報告產生時間：** {datetime.now().strftime('%Y年%m月%d日 %H:%M')}")
-    report.append(f"\n**分析模式：** {analysis_mode}")
-    report.append(f"\n**總樣本數：** {len(df)} 筆")
+    model.add_heading("未上市櫃公司治理問卷分析報告", level=0)
+    model.add_paragraph(runs=[bold("報告產生時間："), f" {datetime.now().strftime('%Y年%m月%d日 %H:%M')}"])
+    model.add_paragraph(runs=[bold("分析模式："), f" {analysis_mode}"])
+    model.add_paragraph(runs=[bold("總樣本數："), f" {len(df)} 筆"])
     
     if 'respondent_type' in df.columns:
         respondent_counts = df['respondent_type'].value_counts()
-        report.append(f"\n**填答者分佈：**")
+        model.add_paragraph(runs=[bold("填答者分佈：")])
         for resp_type, count in respondent_counts.items():
-            report.append(f"- {resp_type}：{count} 筆 ({count/len(df)*100:.1f}%)")
+            model.add_bullet(f"{resp_type}：{count} 筆 ({count/len(df)*100:.1f}%)")
     
     if 'phase' in df.columns and df['phase'].notna().any():
         phase_counts = df['phase'].value_counts()
-        report.append(f"\n**階段分佈：**")
+        model.add_paragraph(runs=[bold("階段分佈：")])
         for phase, count in phase_counts.items():
-            report.append(f"- {phase}：{count} 筆 ({count/len(df)*100:.1f}%)")
+            model.add_bullet(f"{phase}：{count} 筆 ({count/len(df)*100:.1f}%)")
     
-    report.append("\n---\n")
+    model.add_rule()
     
     # === 2. 執行摘要 ===
-    report.append("## 📋 執行摘要\n")
-    report.append("本報告針對未上市櫃公司治理問卷進行全面性統計分析，主要目的在於瞭解公司方與投資方對公司治理實務的認知差異，以及不同階段公司在治理面向的發展狀況。\n")
+    model.add_heading("📋 執行摘要", level=1)
+    model.add_paragraph("本報告針對未上市櫃公司治理問卷進行全面性統計分析，主要目的在於瞭解公司方與投資方對公司治理實務的認知差異，以及不同階段公司在治理面向的發展狀況。")
     
     # 找出最重要的3-5個發現
     top_findings = recommendations[:min(5, len(recommendations))]
-    report.append("### 關鍵發現：\n")
+    model.add_heading("關鍵發現：", level=2)
     for idx, rec in enumerate(top_findings, 1):
         topic = rec['完整題目']
         priority = rec['優先順序']
         reasons = rec['推薦理由']
         
-        # 將統計術語轉為業務語言
+        # 將統計術語轉為業務語言（粗體部分另成一個文字片段）
         business_insight = []
         for reason in reasons:
             if "公司方/投資方" in reason and "顯著差異" in reason:
-                business_insight.append("**公司方與投資方對此議題的看法存在顯著落差**，建議關注雙方認知差異的根源")
+                business_insight.append([bold("公司方與投資方對此議題的看法存在顯著落差"), "，建議關注雙方認知差異的根源"])
             elif "分佈顯著差異" in reason:
-                business_insight.append("**不同群體在此議題上呈現明顯差異**，值得進一步探討造成差異的因素")
+                business_insight.append([bold("不同群體在此議題上呈現明顯差異"), "，值得進一步探討造成差異的因素"])
             elif "資料完整度高" in reason:
-                business_insight.append("此議題獲得高度關注，資料品質優良")
+                business_insight.append(["此議題獲得高度關注，資料品質優良"])
             elif "答案具多樣性" in reason:
-                business_insight.append("受訪者回應具多樣性，反映實務做法的多元性")
+                business_insight.append(["受訪者回應具多樣性，反映實務做法的多元性"])
         
-        report.append(f"{idx}. **{topic[:60]}{'...' if len(topic) > 60 else ''}**")
-        report.append(f"   - 重要性評分：{priority:.1f} 分")
+        model.add_paragraph(runs=[f"{idx}. ", bold(f"{topic[:60]}{'...' if len(topic) > 60 else ''}")])
+        model.add_bullet(f"重要性評分：{priority:.1f} 分", level=2)
         if business_insight:
-            report.append(f"   - 業務意涵：{business_insight[0]}")
-        report.append("")
+            model.add_bullet(runs=["業務意涵："] + business_insight[0], level=2)
     
-    report.append("\n---\n")
+    model.add_rule()
     
     # === 3. 方法論 ===
-    report.append("## 🔬 研究方法論\n")
-    report.append("### 3.1 資料來源與樣本\n")
-    report.append(f"本研究分析 {len(df)} 筆問卷資料，涵蓋 {len(cols_to_analyze)} 個分析面向。")
-    
+    model.add_heading("🔬 研究方法論", level=1)
+    model.add_heading("3.1 資料來源與樣本", level=2)
+    method_text = f"本研究分析 {len(df)} 筆問卷資料，涵蓋 {len(cols_to_analyze)} 個分析面向。"
     if 'respondent_type' in df.columns:
-        report.append("資料來源包含公司方填答與投資方填答，可進行雙向比對分析。\n")
-    
-    report.append("### 3.2 統計分析方法\n")
-    report.append("本研究採用以下統計方法：\n")
-    report.append("1. **描述性統計**：計算次數分佈、百分比、平均數、中位數等基本統計量")
-    report.append("2. **卡方檢定（Chi-square test）**：檢驗類別變項在不同群體間的分佈差異")
-    report.append("3. **Mann-Whitney U 檢定**：檢驗數值變項在兩組間的分佈差異（非參數檢定）")
-    report.append("4. **Kruskal-Wallis 檢定**：檢驗數值變項在多組間的分佈差異（非參數檢定）")
-    report.append("5. **Fisher 精確檢定**：針對小樣本的類別變項進行精確機率檢定\n")
-    
-    report.append("### 3.3 顯著性水準\n")
-    report.append("本研究採用以下顯著性標準：")
-    report.append("- p < 0.001：極顯著差異 (⭐⭐⭐)")
-    report.append("- p < 0.01：非常顯著差異 (⭐⭐)")
-    report.append("- p < 0.05：顯著差異 (⭐)")
-    report.append("- p ≥ 0.05：無顯著差異\n")
-    
-    report.append("\n---\n")
+        method_text += "資料來源包含公司方填答與投資方填答，可進行雙向比對分析。"
+    model.add_paragraph(method_text)
+    
+    model.add_heading("3.2 統計分析方法", level=2)
+    model.add_paragraph("本研究採用以下統計方法：")
+    model.add_paragraph(runs=["1. ", bold("描述性統計"), "：計算次數分佈、百分比、平均數、中位數等基本統計量"])
+    model.add_paragraph(runs=["2. ", bold("卡方檢定（Chi-square test）"), "：檢驗類別變項在不同群體間的分佈差異"])
+    model.add_paragraph(runs=["3. ", bold("Mann-Whitney U 檢定"), "：檢驗數值變項在兩組間的分佈差異（非參數檢定）"])
+    model.add_paragraph(runs=["4. ", bold("Kruskal-Wallis 檢定"), "：檢驗數值變項在多組間的分佈差異（非參數檢定）"])
+    model.add_paragraph(runs=["5. ", bold("Fisher 精確檢定"), "：針對小樣本的類別變項進行精確機率檢定"])
+    
+    model.add_heading("3.3 顯著性水準", level=2)
+    model.add_paragraph("本研究採用以下顯著性標準：")
+    model.add_bullet("p < 0.001：極顯著差異 (⭐⭐⭐)")
+    model.add_bullet("p < 0.01：非常顯著差異 (⭐⭐)")
+    model.add_bullet("p < 0.05：顯著差異 (⭐)")
+    model.add_bullet("p ≥ 0.05：無顯著差異")
+    
+    model.add_rule()
     
     # === 4. 主要發現 ===
-    report.append("## 📊 主要發現\n")
+    model.add_heading("📊 主要發現", level=1)
     
     # 按優先順序分組
     high_priority = [r for r in recommendations if r['優先順序'] >= 3]
     medium_priority = [r for r in recommendations if 2 <= r['優先順序'] < 3]
     
     if high_priority:
-        report.append("### 4.1 高度關注議題（優先順序 ≥ 3）\n")
-        report.append("以下議題在統計分析中呈現極顯著或多重顯著差異，建議優先關注：\n")
+        model.add_heading("4.1 高度關注議題（優先順序 ≥ 3）", level=2)
+        model.add_paragraph("以下議題在統計分析中呈現極顯著或多重顯著差異，建議優先關注：")
         
         for idx, rec in enumerate(high_priority, 1):
-            report.append(f"#### 議題 {idx}：{rec['完整題目']}\n")
-            report.append(f"**樣本數：** {rec['樣本數']} | **缺失率：** {rec['缺失率']} | **優先順序：** {rec['優先順序']:.1f}\n")
+            model.add_heading(f"議題 {idx}：{rec['完整題目']}", level=3)
+            model.add_paragraph(runs=[bold("樣本數："), f" {rec['樣本數']} | ", bold("缺失率："), f" {rec['缺失率']} | ",
+                                      bold("優先順序："), f" {rec['優先順序']:.1f}"])
             
             # 統計結果解讀
             if '統計結果' in rec and rec['統計結果']:
@@ -1356,61 +957,59 @@ def generate_professional_report(df, recommendations, cols_to_analyze, analysis_
                 if 'p' in stats:
                     p_val = stats['p']
                     sig_level = "極顯著" if p_val < 0.001 else "非常顯著" if p_val < 0.01 else "顯著"
-                    report.append(f"**統計檢定結果：**")
-                    report.append(f"- p-value = {p_val:.4f} ({sig_level})")
+                    model.add_paragraph(runs=[bold("統計檢定結果：")])
+                    model.add_bullet(f"p-value = {p_val:.4f} ({sig_level})")
                     
                     if 'median_diff' in stats:
-                        report.append(f"- 中位數差異：{stats['median_diff']:.2f}")
+                        model.add_bullet(f"中位數差異：{stats['median_diff']:.2f}")
                     
                     # 業務解讀
-                    report.append(f"\n**業務解讀：**")
+                    model.add_paragraph(runs=[bold("業務解讀：")])
                     if p_val < 0.001:
-                        report.append("此議題在不同群體間存在極顯著差異（p < 0.001），顯示雙方在認知或實務上有本質性的差距。建議深入探討造成差異的結構性因素，並評估是否需要政策介入或輔導機制。")
+                        model.add_paragraph("此議題在不同群體間存在極顯著差異（p < 0.001），顯示雙方在認知或實務上有本質性的差距。建議深入探討造成差異的結構性因素，並評估是否需要政策介入或輔導機制。")
                     elif p_val < 0.01:
-                        report.append("此議題呈現高度顯著差異（p < 0.01），反映不同群體在此面向的經驗或期待有明顯落差。建議納入後續輔導計畫的重點項目。")
+                        model.add_paragraph("此議題呈現高度顯著差異（p < 0.01），反映不同群體在此面向的經驗或期待有明顯落差。建議納入後續輔導計畫的重點項目。")
                     else:
-                        report.append("此議題存在顯著差異（p < 0.05），值得關注並進一步分析差異成因。")
+                        model.add_paragraph("此議題存在顯著差異（p < 0.05），值得關注並進一步分析差異成因。")
                 
                 if '顯著選項數' in stats:
                     sig_count = stats['顯著選項數']
-                    report.append(f"\n- 有 {sig_count} 個選項呈現顯著差異")
-                    report.append(f"- **解讀：** 此複選題中有多個選項在不同群體間分佈不均，顯示在具體實務做法上存在系統性差異。")
+                    model.add_bullet(f"有 {sig_count} 個選項呈現顯著差異")
+                    model.add_bullet(runs=[bold("解讀："), " 此複選題中有多個選項在不同群體間分佈不均，顯示在具體實務做法上存在系統性差異。"])
             
-            report.append("\n" + "- " * 30 + "\n")
+            model.add_rule()
     
     if medium_priority:
-        report.append("\n### 4.2 重要議題（優先順序 2-3）\n")
-        report.append("以下議題具有統計顯著性或高資料完整度，值得納入報告：\n")
+        model.add_heading("4.2 重要議題（優先順序 2-3）", level=2)
+        model.add_paragraph("以下議題具有統計顯著性或高資料完整度，值得納入報告：")
         
         for idx, rec in enumerate(medium_priority, 1):
-            report.append(f"**{idx}. {rec['完整題目'][:80]}{'...' if len(rec['完整題目']) > 80 else ''}**")
-            report.append(f"- 樣本數：{rec['樣本數']} | 缺失率：{rec['缺失率']}")
-            report.append(f"- 重點：{'; '.join(rec['推薦理由'][:2])}")
-            report.append("")
+            model.add_paragraph(runs=[bold(f"{idx}. {rec['完整題目'][:80]}{'...' if len(rec['完整題目']) > 80 else ''}")])
+            model.add_bullet(f"樣本數：{rec['樣本數']} | 缺失率：{rec['缺失率']}")
+            model.add_bullet(f"重點：{'; '.join(rec['推薦理由'][:2])}")
     
-    report.append("\n---\n")
+    model.add_rule()
     
     # === 5. 結論與建議 ===
-    report.append("## 💡 結論與政策建議\n")
+    model.add_heading("💡 結論與政策建議", level=1)
     
-    report.append("### 5.1 總體觀察\n")
-    report.append(f"本次問卷分析涵蓋 {len(recommendations)} 個具有分析價值的議題，")
-    report.append(f"其中 {len(high_priority)} 個議題呈現高度顯著差異，{len(medium_priority)} 個議題具有重要參考價值。\n")
+    model.add_heading("5.1 總體觀察", level=2)
+    model.add_paragraph(f"本次問卷分析涵蓋 {len(recommendations)} 個具有分析價值的議題，"
+                        f"其中 {len(high_priority)} 個議題呈現高度顯著差異，{len(medium_priority)} 個議題具有重要參考價值。")
     
     if 'respondent_type' in df.columns:
-        report.append("### 5.2 公司方與投資方的認知落差\n")
-        report.append("分析顯示公司方與投資方在多項公司治理議題上存在認知或實務差異。")
-        report.append("此落差可能來自於：")
-        report.append("- **資訊不對稱**：投資方對公司實務的了解程度有限")
-        report.append("- **期待差異**：雙方對治理標準的認知不一致")
-        report.append("- **實務落差**：公司自評與外部評估的客觀性差異\n")
+        model.add_heading("5.2 公司方與投資方的認知落差", level=2)
+        model.add_paragraph("分析顯示公司方與投資方在多項公司治理議題上存在認知或實務差異。此落差可能來自於：")
+        model.add_bullet(runs=[bold("資訊不對稱"), "：投資方對公司實務的了解程度有限"])
+        model.add_bullet(runs=[bold("期待差異"), "：雙方對治理標準的認知不一致"])
+        model.add_bullet(runs=[bold("實務落差"), "：公司自評與外部評估的客觀性差異"])
     
-    report.append("### 5.3 政策建議\n")
-    report.append("基於上述分析結果，本研究提出以下政策建議供國發基金參考：\n")
+    model.add_heading("5.3 政策建議", level=2)
+    model.add_paragraph("基於上述分析結果，本研究提出以下政策建議供國發基金參考：")
     
     # 根據高優先順序議題生成具體建議
     if high_priority:
-        report.append("**針對高度關注議題：**\n")
+        model.add_paragraph(runs=[bold("針對高度關注議題：")])
         
         # 分析是否有特定領域的問題
         governance_issues = [r for r in high_priority if any(kw in r['完整題目'] for kw in ['董事會', '董事', '監察人'])]
@@ -1418,85 +1017,128 @@ def generate_professional_report(df, recommendations, cols_to_analyze, analysis_
         internal_control_issues = [r for r in high_priority if any(kw in r['完整題目'] for kw in ['內部控制', '流程', '制度'])]
         
         if governance_issues:
-            report.append("1. **強化董事會運作機制**")
-            report.append("   - 建議提供未上市櫃公司治理訓練課程")
-            report.append("   - 推動獨立董事或外部董事制度")
-            report.append("   - 建立董事會運作評估機制\n")
+            model.add_paragraph(runs=["1. ", bold("強化董事會運作機制")])
+            model.add_bullet("建議提供未上市櫃公司治理訓練課程", level=2)
+            model.add_bullet("推動獨立董事或外部董事制度", level=2)
+            model.add_bullet("建立董事會運作評估機制", level=2)
         
         if transparency_issues:
-            report.append("2. **提升資訊透明度**")
-            report.append("   - 建立資訊揭露標準範本")
-            report.append("   - 鼓勵定期向股東報告")
-            report.append("   - 推動數位化資訊平台\n")
+            model.add_paragraph(runs=["2. ", bold("提升資訊透明度")])
+            model.add_bullet("建立資訊揭露標準範本", level=2)
+            model.add_bullet("鼓勵定期向股東報告", level=2)
+            model.add_bullet("推動數位化資訊平台", level=2)
         
         if internal_control_issues:
-            report.append("3. **建立內部控制制度**")
-            report.append("   - 提供內控建置輔導服務")
-            report.append("   - 分享最佳實務案例")
-            report.append("   - 建立分階段導入機制\n")
+            model.add_paragraph(runs=["3. ", bold("建立內部控制制度")])
+            model.add_bullet("提供內控建置輔導服務", level=2)
+            model.add_bullet("分享最佳實務案例", level=2)
+            model.add_bullet("建立分階段導入機制", level=2)
     
-    report.append("4. **縮小公司方與投資方認知落差**")
-    report.append("   - 定期舉辦溝通座談會")
-    report.append("   - 建立雙向回饋機制")
-    report.append("   - 提供第三方治理評估服務\n")
+    model.add_paragraph(runs=["4. ", bold("縮小公司方與投資方認知落差")])
+    model.add_bullet("定期舉辦溝通座談會", level=2)
+    model.add_bullet("建立雙向回饋機制", level=2)
+    model.add_bullet("提供第三方治理評估服務", level=2)
     
-    report.append("5. **階段性輔導機制**")
-    report.append("   - 針對不同發展階段提供客製化輔導")
-    report.append("   - 建立標竿企業示範案例")
-    report.append("   - 提供持續追蹤與評估\n")
+    model.add_paragraph(runs=["5. ", bold("階段性輔導機制")])
+    model.add_bullet("針對不同發展階段提供客製化輔導", level=2)
+    model.add_bullet("建立標竿企業示範案例", level=2)
+    model.add_bullet("提供持續追蹤與評估", level=2)
     
-    report.append("\n---\n")
+    model.add_rule()
     
     # === 6. 附錄 ===
-    report.append("## 📎 附錄\n")
-    report.append("### 附錄 A：完整分析議題清單\n")
-    report.append(f"本次分析共涵蓋 {len(recommendations)} 個議題，完整清單如下：\n")
-    
-    report.append("| 排名 | 題目 | 樣本數 | 缺失率 | 優先順序 |")
-    report.append("|------|------|--------|--------|----------|")
+    model.add_heading("📎 附錄", level=1)
+    model.add_heading("附錄 A：完整分析議題清單", level=2)
+    model.add_paragraph(f"本次分析共涵蓋 {len(recommendations)} 個議題，完整清單如下：")
     
+    appendix_rows = []
     for idx, rec in enumerate(recommendations[:20], 1):  # 只顯示前20題
         topic_short = rec['題目'][:40] + '...' if len(rec['題目']) > 40 else rec['題目']
-        report.append(f"| {idx} | {topic_short} | {rec['樣本數']} | {rec['缺失率']} | {rec['優先順序']:.1f} |")
+        appendix_rows.append([idx, topic_short, rec['樣本數'], rec['缺失率'], f"{rec['優先順序']:.1f}"])
+    model.add_table({'columns': ['排名', '題目', '樣本數', '缺失率', '優先順序'], 'data': appendix_rows}, source='')
     
     if len(recommendations) > 20:
-        report.append(f"\n*註：完整清單包含 {len(recommendations)} 個議題，此處僅顯示前 20 題*\n")
+        model.add_paragraph(runs=[italic(f"註：完整清單包含 {len(recommendations)} 個議題，此處僅顯示前 20 題")])
     
-    report.append("\n### 附錄 B：統計方法說明\n")
-    report.append("**卡方檢定（Chi-square test）**")
-    report.append("- 適用於類別變項的獨立性檢定")
-    report.append("- 零假設：兩個類別變項之間獨立（無關聯）")
-    report.append("- 當 p < 0.05 時拒絕零假設，認為變項間存在關聯\n")
+    model.add_heading("附錄 B：統計方法說明", level=2)
+    model.add_paragraph(runs=[bold("卡方檢定（Chi-square test）")])
+    model.add_bullet("適用於類別變項的獨立性檢定")
+    model.add_bullet("零假設：兩個類別變項之間獨立（無關聯）")
+    model.add_bullet("當 p < 0.05 時拒絕零假設，認為變項間存在關聯")
     
-    report.append("**Mann-Whitney U 檢定**")
-    report.append("- 非參數檢定方法，不假設資料符合常態分佈")
-    report.append("- 適用於比較兩組獨立樣本的分佈")
-    report.append("- 檢驗兩組的中位數是否有顯著差異\n")
+    model.add_paragraph(runs=[bold("Mann-Whitney U 檢定")])
+    model.add_bullet("非參數檢定方法，不假設資料符合常態分佈")
+    model.add_bullet("適用於比較兩組獨立樣本的分佈")
+    model.add_bullet("檢驗兩組的中位數是否有顯著差異")
     
-    report.append("**Kruskal-Wallis 檢定**")
-    report.append("- Mann-Whitney U 檢定的擴展版本")
-    report.append("- 適用於比較三組或以上獨立樣本")
-    report.append("- 檢驗多組間是否存在顯著差異\n")
+    model.add_paragraph(runs=[bold("Kruskal-Wallis 檢定")])
+    model.add_bullet("Mann-Whitney U 檢定的擴展版本")
+    model.add_bullet("適用於比較三組或以上獨立樣本")
+    model.add_bullet("檢驗多組間是否存在顯著差異")
     
-    report.append("\n---\n")
-    report.append(f"\n**報告結束** | 產生時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    model.add_rule()
+    model.add_paragraph(runs=[bold("報告結束"), f" | 產生時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
     
-    return "\n".join(report)
+    return model
 
-# 執行題目合併
-st.markdown("### 🔄 正在進行題目去重與合併...")
-with st.spinner("分析題目相似度中..."):
-    if analysis_mode == '合併分析':
-        merged_mapping, cols_to_analyze = merge_similar_questions(
-            df_to_analyze, 
-            cols_to_exclude, 
+def generate_professional_report(df, recommendations, cols_to_analyze, analysis_mode):
+    """標準業務報告的 Markdown 文字（由 build_professional_model 的報告模型輸出）"""
+    return render_markdown(build_professional_model(df, recommendations, cols_to_analyze, analysis_mode))
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def build_analysis_bundle(selection_key, files_to_load, merge_version, cols_to_exclude, _df_loaded):
+    """
+    題目合併與所有分析結構只在資料選擇改變時建立一次，之後 Streamlit 每次重新執行腳本都直接取用
+    鍵為資料選擇、載入的檔案清單與題目合併方法版本（_df_loaded 由前兩者決定，不另外雜湊）；
+    回傳的物件在各次執行間共用，使用端只能讀取不可修改
+    """
+    if selection_key[0] == '合併分析':
+        df_to_analyze, merged_mapping, cols_to_analyze = merge_similar_questions(
+            _df_loaded, 
+            list(cols_to_exclude), 
             similarity_threshold=0.70  # 降低閾值，更積極合併
         )
     else:
         # 逐題瀏覽模式：不合併，直接使用所有欄位
+        df_to_analyze = _df_loaded
         cols_to_analyze = [c for c in df_to_analyze.columns if c not in cols_to_exclude]
         merged_mapping = {c: [c] for c in cols_to_analyze}  # 建立一對一映射
 
+    return {
+        'df': df_to_analyze,
+        'merged_mapping': merged_mapping,
+        'cols_to_analyze': cols_to_analyze,
+        # 題目合併後建立一次整數編碼矩陣與複選題長表，供報告推薦、深度分析與逐題顯示的次數、交叉表共用
+        'response_matrix': build_response_matrix(df_to_analyze, cols_to_analyze),
+        'long_answers': build_long_answers(df_to_analyze, cols_to_analyze),
+        # 題型登錄表：每題只判斷一次題型並保存數值向量，報告推薦、深度分析與逐題顯示共用
+        'question_types': build_question_types(df_to_analyze, cols_to_analyze),
+        # 資料完整度矩陣：每題在各身分 × 階段的作答人數一次算好，報告推薦、政府統計風格報告與完整度熱圖共用
+        'completeness': build_completeness(df_to_analyze, cols_to_analyze),
+        # 資料集指紋：統計結果快取的鍵，資料或題目合併結果不同時指紋即不同
+        'fingerprint': dataset_fingerprint(df_to_analyze),
+    }
+
+# 執行題目合併
+st.markdown("### 🔄 正在進行題目去重與合併...")
+# 合併前的原始資料表：合併除錯資訊顯示各原始題目的資料，Word 報告也以原始欄位自行合併
+df_loaded = df_to_analyze
+
+with st.spinner("分析題目相似度中..."):
+    analysis_bundle = build_analysis_bundle(
+        selection_key, tuple(files_to_load),
+        method_version(normalize_question_v2, calculate_similarity, rules_version()),
+        tuple(cols_to_exclude), df_loaded)
+
+df_to_analyze = analysis_bundle['df']
+merged_mapping = analysis_bundle['merged_mapping']
+cols_to_analyze = analysis_bundle['cols_to_analyze']
+response_matrix = analysis_bundle['response_matrix']
+long_answers = analysis_bundle['long_answers']
+question_types = analysis_bundle['question_types']
+completeness = analysis_bundle['completeness']
+dataset_fp = analysis_bundle['fingerprint']
+
 # 顯示合併結果（只在合併分析模式下顯示）
 if analysis_mode == '合併分析':
     with st.expander("🔍 題目合併詳細資訊（除錯用）", expanded=False):
@@ -1506,7 +1148,7 @@ if analysis_mode == '合併分析':
             st.success(f"✅ 成功合併 {len(duplicate_groups)} 組重複題目，共減少 {sum(len(v)-1 for v in duplicate_groups.values())} 個重複項")
             
             # 統計合併效果
-            if 'respondent_type' in df_to_analyze.columns:
+            if 'respondent_type' in df_loaded.columns:
                 company_only = 0
                 investor_only = 0
                 mixed = 0
@@ -1514,9 +1156,9 @@ if analysis_mode == '合併分析':
                 for representative, originals in duplicate_groups.items():
                     respondent_types = set()
                     for orig in originals:
-                        data = df_to_analyze[orig].dropna()
+                        data = df_loaded[orig].dropna()
                         if not data.empty:
-                            types = df_to_analyze.loc[data.index, 'respondent_type'].unique()
+                            types = df_loaded.loc[data.index, 'respondent_type'].unique()
                             respondent_types.update(types)
                     
                     if '公司方' in respondent_types and '投資方' in respondent_types:
@@ -1544,9 +1186,9 @@ if analysis_mode == '合併分析':
                         normalize_question_v2(representative), 
                         normalize_question_v2(orig)
                     )
-                    orig_data = df_to_analyze[orig].dropna()
-                    if not orig_data.empty and 'respondent_type' in df_to_analyze.columns:
-                        respondents = df_to_analyze.loc[orig_data.index, 'respondent_type'].value_counts().to_dict()
+                    orig_data = df_loaded[orig].dropna()
+                    if not orig_data.empty and 'respondent_type' in df_loaded.columns:
+                        respondents = df_loaded.loc[orig_data.index, 'respondent_type'].value_counts().to_dict()
                         resp_str = ", ".join([f"{k}:{v}筆" for k, v in respondents.items()])
                         st.write(f"  ↳ {orig}")
                         st.caption(f"    相似度: {similarity:.2%} | 資料: {resp_str}")
@@ -1561,7 +1203,45 @@ if analysis_mode == '合併分析':
             st.success("✅ 沒有發現需要合併的重複題目")
         
         st.metric("最終分析題目數", len(cols_to_analyze), 
-                  delta=f"-{len(df_to_analyze.columns) - len(cols_to_exclude) - len(cols_to_analyze)}" if len(df_to_analyze.columns) - len(cols_to_exclude) > len(cols_to_analyze) else "0")
+                  delta=f"-{len(df_loaded.columns) - len(cols_to_exclude) - len(cols_to_analyze)}" if len(df_loaded.columns) - len(cols_to_exclude) > len(cols_to_analyze) else "0")
+
+# 題目標準化與相似度的新結果寫回磁碟（重新啟動後仍可直接使用）
+save_memo()
+
+# 資料完整度熱圖（各題在各身分 × 階段的作答比例，可依任一欄排序）
+with st.expander("🧩 資料完整度熱圖", expanded=False):
+    completeness_view = st.radio("區隔方式", ['身分 × 階段', '身分', '階段'], horizontal=True, key='completeness_view')
+    view_group = {'身分 × 階段': None, '身分': 'respondent_type', '階段': PHASE_COLUMN_NAME}[completeness_view]
+    if view_group is not None and view_group not in completeness['dims']:
+        st.info("資料中沒有此分組欄位")
+    else:
+        completeness_table = completeness_frame(completeness, view_group)
+        sort_cols = st.columns(2)
+        sort_by = sort_cols[0].selectbox("排序依據", ['題目順序'] + list(completeness_table.columns), key='completeness_sort')
+        ascending = sort_cols[1].radio("排序方向", ['完整度低→高', '完整度高→低'], horizontal=True, key='completeness_order') == '完整度低→高'
+        if sort_by != '題目順序':
+            completeness_table = completeness_table.sort_values(sort_by, ascending=ascending, kind='stable')
+
+        labels = [q[:40] + '...' if len(q) > 40 else q for q in completeness_table.index]
+        fig = go.Figure(go.Heatmap(
+            z=completeness_table.to_numpy(),
+            x=list(completeness_table.columns),
+            y=labels,
+            customdata=np.array(completeness_table.index, dtype=object)[:, None].repeat(completeness_table.shape[1], axis=1),
+            colorscale='RdYlGn',
+            zmin=0,
+            zmax=100,
+            colorbar={'title': '完整度 (%)'},
+            hovertemplate='%{customdata}<br>%{x}：%{z:.1f}%<extra></extra>'
+        ))
+        fig.update_layout(
+            title='各題資料完整度（作答人數 / 該區隔受訪者數）',
+            template='plotly_white',
+            height=max(400, 18 * len(labels) + 150),
+            yaxis={'autorange': 'reversed'}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(completeness_table.round(1), use_container_width=True)
 
 # --- 功能區（保留原有功能）---
 st.markdown("---")
@@ -1572,7 +1252,9 @@ if analysis_mode == '合併分析':
     st.subheader("📋 適合寫入報告的題目推薦")
     
     with st.spinner("正在分析並推薦重要題目..."):
-        recommendations = generate_report_recommendations(df_to_analyze, cols_to_analyze, analysis_mode)
+        recommendations = generate_report_recommendations(df_to_analyze, cols_to_analyze, analysis_mode, response_matrix, long_answers,
+                                                          fingerprint=dataset_fp, question_types=question_types,
+                                                          completeness=completeness)
     
     if recommendations:
         st.success(f"✅ 找到 {len(recommendations)} 題具有分析價值的題目")
@@ -1627,19 +1309,11 @@ if analysis_mode == '合併分析':
                         for reason in rec_info['推薦理由']:
                             st.write(f"- {reason}")
                         
-                        # 判斷題型
-                        is_multiselect = col_data.dtype == 'object' and col_data.astype(str).str.contains('\n', na=False).any()
-                        is_numeric = pd.api.types.is_numeric_dtype(col_data)
-                        
-                        # 統一處理數值資料
-                        col_data_numeric = None
-                        if is_numeric:
-                            col_data_numeric = pd.to_numeric(col_data, errors='coerce').dropna()
-                        else:
-                            numeric_version = pd.to_numeric(col_data, errors='coerce').dropna()
-                            if len(numeric_version) > 0 and (len(numeric_version) / len(col_data) > 0.7):
-                                is_numeric = True
-                                col_data_numeric = numeric_version
+                        # 題型與數值資料取自題型登錄表
+                        qtype = question_type(question_types, df_to_analyze, topic)
+                        is_multiselect = qtype['type'] == 'multiselect'
+                        is_numeric = qtype['type'] == 'numeric'
+                        col_data_numeric = qtype['numeric']
                         
                         # === 分析1: 公司方 vs 投資方 ===
                         if 'respondent_type' in df_to_analyze.columns:
@@ -1648,15 +1322,10 @@ if analysis_mode == '合併分析':
                             
                             if is_multiselect:
                                 # 複選題分析
-                                exploded = col_data.astype(str).str.split('\n').explode().str.strip()
-                                exploded = exploded[(exploded != '') & (exploded != 'nan') & exploded.notna()]
-                                
-                                if not exploded.empty:
-                                    df_exp = exploded.to_frame(name='option')
-                                    df_exp['respondent_type'] = df_to_analyze.loc[df_exp.index, 'respondent_type'].fillna('未知')
-                                    
+                                if len(option_labels(long_answers, topic)) > 0:
                                     # 計算各選項在不同身分的比例
-                                    crosstab = pd.crosstab(df_exp['option'], df_exp['respondent_type'], normalize='columns') * 100
+                                    crosstab = option_group_table(long_answers, topic, 'respondent_type',
+                                                                  missing_group_label='未知', normalize=True) * 100
                                     
                                     # 智慧排序 x 軸
                                     sorted_index = smart_sort_categories(crosstab.index)
@@ -1749,11 +1418,9 @@ if analysis_mode == '合併分析':
                                 s = s[~s.str.lower().str.contains('nan', na=False)]
                                 
                                 if not s.empty:
-                                    df_cat = s.to_frame(name='category')
-                                    df_cat['respondent_type'] = df_to_analyze.loc[df_cat.index, 'respondent_type'].fillna('未知')
-                                    
-                                    # 計算比例
-                                    crosstab = pd.crosstab(df_cat['category'], df_cat['respondent_type'], normalize='columns') * 100
+                                    # 計算比例（次數立方體切片）
+                                    crosstab = answer_group_table(response_matrix, topic, 'respondent_type', keep_label=_is_valid_answer_label,
+                                                                  missing_group_label='未知', normalize=True) * 100
                                     
                                     # 智慧排序 x 軸
                                     sorted_index = smart_sort_categories(crosstab.index)
@@ -1809,15 +1476,10 @@ if analysis_mode == '合併分析':
                                 
                                 if is_multiselect:
                                     # 複選題階段分析
-                                    exploded = col_data.astype(str).str.split('\n').explode().str.strip()
-                                    exploded = exploded[(exploded != '') & (exploded != 'nan') & exploded.notna()]
-                                    
-                                    if not exploded.empty:
-                                        df_exp = exploded.to_frame(name='option')
-                                        df_exp['phase'] = df_to_analyze.loc[df_exp.index, PHASE_COLUMN_NAME].fillna('未標註')
-                                        
+                                    if len(option_labels(long_answers, topic)) > 0:
                                         # 計算各選項在不同階段的比例
-                                        crosstab_phase = pd.crosstab(df_exp['option'], df_exp['phase'], normalize='columns') * 100
+                                        crosstab_phase = option_group_table(long_answers, topic, 'phase',
+                                                                            missing_group_label='未標註', normalize=True) * 100
                                         
                                         # 智慧排序 x 軸
                                         sorted_index = smart_sort_categories(crosstab_phase.index)
@@ -1852,23 +1514,18 @@ if analysis_mode == '合併分析':
                                         # 卡方檢定（檢查各選項在階段間是否有差異）
                                         st.markdown("**統計檢定結果（卡方檢定）：**")
                                         significant_options = []
+                                        top_options = [opt for opt in option_labels(long_answers, topic)[:10] if not pd.isna(opt)]
+                                        tests = get_or_compute(
+                                            dataset_fp, topic, 'phase', 'all_respondents_first10', 'option_chi_square',
+                                            lambda: _option_chi_square(long_answers, topic, 'phase', top_options))
                                         
-                                        for opt in df_exp['option'].unique()[:10]:
-                                            if pd.isna(opt):
-                                                continue
-                                            pres = df_to_analyze[topic].astype(str).fillna('').apply(
-                                                lambda s: opt in [x.strip() for x in s.split('\n') if x.strip()]
-                                            )
-                                            table = pd.crosstab(pres, df_to_analyze.loc[pres.index, PHASE_COLUMN_NAME])
-                                            
-                                            if table.size > 0 and table.values.sum() > 0 and table.shape[0] >= 2 and table.shape[1] >= 2:
-                                                try:
-                                                    chi2, p, dof, exp = chi2_contingency(table)
-                                                    if np.nanmin(exp) > 1 and p < 0.05:
-                                                        significance = "***" if p < 0.001 else "**" if p < 0.01 else "*"
-                                                        significant_options.append((opt, p, significance))
-                                                except:
-                                                    pass
+                                        for test in tests:
+                                            opt = test['option']
+                                            if test['size'] > 0 and test['total'] > 0 and test['shape'][0] >= 2 and test['shape'][1] >= 2:
+                                                p = test['p_value']
+                                                if not test['low_expected'] and p < 0.05:
+                                                    significance = "***" if p < 0.001 else "**" if p < 0.01 else "*"
+                                                    significant_options.append((opt, p, significance))
                                         
                                         if significant_options:
                                             for opt, p, sig in significant_options[:5]:
@@ -1915,10 +1572,14 @@ if analysis_mode == '合併分析':
                                         if len(groups) >= 2:
                                             try:
                                                 if len(groups) == 2:
-                                                    stat, p_val = mannwhitneyu(groups[0], groups[1], alternative='two-sided')
+                                                    stat, p_val = get_or_compute(
+                                                        dataset_fp, topic, PHASE_COLUMN_NAME, 'numeric_missing_phase_grouped', 'mann_whitney',
+                                                        lambda: mannwhitneyu(groups[0], groups[1], alternative='two-sided'))
                                                     test_name = "Mann-Whitney U 檢定"
                                                 else:
-                                                    stat, p_val = kruskal(*groups)
+                                                    stat, p_val = get_or_compute(
+                                                        dataset_fp, topic, PHASE_COLUMN_NAME, 'numeric_missing_phase_grouped_unsorted', 'kruskal',
+                                                        lambda: kruskal(*groups))
                                                     test_name = "Kruskal-Wallis 檢定"
                                                 
                                                 significance = "***" if p_val < 0.001 else "**" if p_val < 0.01 else "*"
@@ -1939,11 +1600,9 @@ if analysis_mode == '合併分析':
                                     s = s[~s.str.lower().str.contains('nan', na=False)]
                                     
                                     if not s.empty:
-                                        df_cat_phase = s.to_frame(name='category')
-                                        df_cat_phase['phase'] = df_to_analyze.loc[df_cat_phase.index, PHASE_COLUMN_NAME].fillna('未標註')
-                                        
-                                        # 計算比例
-                                        crosstab_phase = pd.crosstab(df_cat_phase['category'], df_cat_phase['phase'], normalize='columns') * 100
+                                        # 計算比例（次數立方體切片）
+                                        crosstab_phase = answer_group_table(response_matrix, topic, PHASE_COLUMN_NAME, keep_label=_is_valid_answer_label,
+                                                                            missing_group_label='未標註', normalize=True) * 100
                                         
                                         # 智慧排序 x 軸
                                         sorted_index = smart_sort_categories(crosstab_phase.index)
@@ -1977,8 +1636,11 @@ if analysis_mode == '合併分析':
                                         
                                         # 卡方檢定
                                         try:
-                                            count_table = pd.crosstab(df_cat_phase['category'], df_cat_phase['phase'])
-                                            chi2, p_val, dof, exp = chi2_contingency(count_table)
+                                            # 與逐題分析的階段卡方檢定為同一組受訪者（階段缺失另成一組），共用快取結果
+                                            p_val = get_or_compute(
+                                                dataset_fp, topic, PHASE_COLUMN_NAME, 'valid_labels_missing_phase_grouped', 'chi_square',
+                                                lambda: chi_square_test(answer_group_table(response_matrix, topic, PHASE_COLUMN_NAME, keep_label=_is_valid_answer_label,
+                                                                                                  missing_group_label='未標註')))['p_value']
                                             
                                             significance = "***" if p_val < 0.001 else "**" if p_val < 0.01 else "*"
                                             
@@ -2045,8 +1707,11 @@ if analysis_mode == '合併分析':
         with col_a:
             if st.button("📊 生成完整分析報告（新格式）", type="primary", use_container_width=True):
                 with st.spinner("正在生成專業統計報告..."):
-                    # 生成新格式報告
-                    report = generate_government_style_report(df_to_analyze, recommendations, cols_to_analyze, analysis_mode)
+                    # 生成新格式報告（報告模型只建立一次，Markdown 與 HTML 由同一份模型輸出）
+                    report_model = build_government_model(df_to_analyze, recommendations, cols_to_analyze, analysis_mode,
+                                                          completeness=completeness)
+                    report = render_markdown(report_model)
+                    report_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                     
                     # 顯示報告
                     st.markdown("---")
@@ -2057,15 +1722,23 @@ if analysis_mode == '合併分析':
                     st.download_button(
                         label="💾 下載報告（政府格式）",
                         data=report,
-                        file_name=f"統計應用分析報告_未上市櫃公司治理_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+                        file_name=f"統計應用分析報告_未上市櫃公司治理_{report_stamp}.md",
                         mime="text/markdown"
                     )
+                    st.download_button(
+                        label="🌐 下載報告（政府格式，HTML）",
+                        data=render_html(report_model, title="統計應用分析報告"),
+                        file_name=f"統計應用分析報告_未上市櫃公司治理_{report_stamp}.html",
+                        mime="text/html"
+                    )
         
         with col_b:
             if st.button("📋 生成標準報告（原格式）", use_container_width=True):
                 with st.spinner("正在生成業務報告..."):
-                    # 生成原有格式報告
-                    report = generate_professional_report(df_to_analyze, recommendations, cols_to_analyze, analysis_mode)
+                    # 生成原有格式報告（報告模型只建立一次，Markdown 與 HTML 由同一份模型輸出）
+                    report_model = build_professional_model(df_to_analyze, recommendations, cols_to_analyze, analysis_mode)
+                    report = render_markdown(report_model)
+                    report_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                     
                     # 顯示報告
                     st.markdown("---")
@@ -2076,9 +1749,15 @@ if analysis_mode == '合併分析':
                     st.download_button(
                         label="💾 下載報告（標準格式）",
                         data=report,
-                        file_name=f"公司治理問卷分析報告_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+                        file_name=f"公司治理問卷分析報告_{report_stamp}.md",
                         mime="text/markdown"
                     )
+                    st.download_button(
+                        label="🌐 下載報告（標準格式，HTML）",
+                        data=render_html(report_model, title="未上市櫃公司治理問卷分析報告"),
+                        file_name=f"公司治理問卷分析報告_{report_stamp}.html",
+                        mime="text/html"
+                    )
         
         # === 新增：描述性統計報告（Word 格式）===
         st.markdown("---")
@@ -2092,6 +1771,9 @@ if analysis_mode == '合併分析':
                 import os
                 temp_dir = tempfile.gettempdir()
                 output_path = os.path.join(temp_dir, "問卷描述性統計報告_完整版.docx")
+                # 逐題分析的 Markdown / HTML 版本由同一份報告模型輸出，不需重新分析
+                markdown_path = os.path.join(temp_dir, "問卷描述性統計報告_完整版.md")
+                html_path = os.path.join(temp_dir, "問卷描述性統計報告_完整版.html")
                 
                 # 顯示進度
                 progress_text = st.empty()
@@ -2105,8 +1787,10 @@ if analysis_mode == '合併分析':
                 progress_bar.progress(30)
                 
                 output_path = generate_full_descriptive_report(
-                    df_to_analyze,
-                    output_path=output_path
+                    df_loaded,
+                    output_path=output_path,
+                    markdown_path=markdown_path,
+                    html_path=html_path
                 )
                 
                 progress_text.text("📈 正在生成圖表...")
@@ -2133,6 +1817,20 @@ if analysis_mode == '合併分析':
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     key="download_word_report"
                 )
+                report_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                extra_cols = st.columns(2)
+                for extra_col, (path, label, suffix, mime) in zip(extra_cols, (
+                        (html_path, "🌐 下載 HTML 版（逐題分析）", "html", "text/html"),
+                        (markdown_path, "📝 下載 Markdown 版（逐題分析）", "md", "text/markdown"))):
+                    if os.path.exists(path):
+                        with open(path, "rb") as file:
+                            extra_col.download_button(
+                                label=label,
+                                data=file.read(),
+                                file_name=f"問卷描述性統計報告_{report_stamp}.{suffix}",
+                                mime=mime,
+                                key=f"download_{suffix}_report"
+                            )
                 
                 st.info("📊 報告包含：\n- 樣本分佈統計表\n- 公司方 vs 投資方比較\n- 階段分析\n- 統計檢定結果\n- 業務意涵解讀\n- 📈 長條圖視覺化")
                 
@@ -2162,30 +1860,24 @@ for i, col_name in enumerate(cols_to_analyze):
         # 顯示樣本數
         st.caption(f"有效樣本數：{len(col_data)}")
         
-        # 判斷題型
-        is_multiselect = False
-        if col_data.dtype == 'object':
-            non_empty_data = col_data[col_data.astype(str) != '']
-            if not non_empty_data.empty and non_empty_data.str.contains('\n').any():
-                is_multiselect = True
+        # 題型取自題型登錄表
+        qtype = question_type(question_types, df_to_analyze, col_name)
+        is_multiselect = qtype['type'] == 'multiselect'
         
         if is_multiselect:
             # 複選題
             st.markdown("##### 📊 複選題選項次數分佈")
-            exploded = col_data.astype(str).str.split('\n').explode().str.strip()
-            exploded = exploded[(exploded != '') & (exploded != 'nan') & exploded.notna()]
+            total_counts = option_counts(long_answers, col_name)
             
-            if not exploded.empty:
-                total_counts = exploded.value_counts().reset_index()
+            if not total_counts.empty:
+                total_counts = total_counts.reset_index()
                 total_counts.columns = ['選項', '次數']
                 st.dataframe(total_counts, use_container_width=True)
                 
                 # 視覺化：如果有階段欄位則按階段分色堆疊
                 if PHASE_COLUMN_NAME in df_to_analyze.columns and df_to_analyze[PHASE_COLUMN_NAME].notna().any() and df_to_analyze[PHASE_COLUMN_NAME].nunique() > 1:
                     st.markdown("##### 📈 各階段分佈（堆疊長條圖）")
-                    exploded_df = exploded.to_frame(name='option')
-                    exploded_df['phase'] = df_to_analyze.loc[exploded_df.index, PHASE_COLUMN_NAME].fillna('未標註階段')
-                    pivot = exploded_df.groupby(['option', 'phase']).size().unstack(fill_value=0)
+                    pivot = option_group_table(long_answers, col_name, 'phase', missing_group_label='未標註階段')
                     
                     # 智慧排序 x 軸
                     sorted_index = smart_sort_categories(pivot.index)
@@ -2224,15 +1916,12 @@ for i, col_name in enumerate(cols_to_analyze):
                     st.plotly_chart(fig, use_container_width=True, key=f"multi_{i}_{col_name[:20]}")
             
             # 統計分析 - 複選題
-            perform_comprehensive_statistical_analysis(df_to_analyze, col_data, col_name, is_numeric=False, is_multiselect=True)
+            perform_comprehensive_statistical_analysis(df_to_analyze, col_data, col_name, is_numeric=False, is_multiselect=True, long_answers=long_answers, fingerprint=dataset_fp)
         else:
             # 單選或數值題
-            is_numeric = pd.api.types.is_numeric_dtype(col_data)
-            if not is_numeric:
-                numeric_version = pd.to_numeric(col_data, errors='coerce')
-                if (numeric_version.notna().sum() / len(col_data) > 0.7):
-                    is_numeric = True
-                    col_data = numeric_version.dropna()
+            is_numeric = qtype['type'] == 'numeric'
+            if is_numeric:
+                col_data = qtype['numeric']
             
             if is_numeric:
                 # 數值題
@@ -2263,24 +1952,22 @@ for i, col_name in enumerate(cols_to_analyze):
                     st.plotly_chart(fig, use_container_width=True, key=f"num_{i}_{col_name[:20]}")
                 
                 # 統計分析 - 數值題
-                perform_comprehensive_statistical_analysis(df_to_analyze, col_data, col_name, is_numeric=True, is_multiselect=False)
+                perform_comprehensive_statistical_analysis(df_to_analyze, col_data, col_name, is_numeric=True, is_multiselect=False, long_answers=long_answers, fingerprint=dataset_fp)
             else:
                 # 類別題
                 st.markdown("##### 📊 類別次數分佈")
-                s = col_data.astype(str)
-                s = s[~s.str.lower().str.contains('nan', na=False)]
+                counts = answer_counts(response_matrix, col_name, keep_label=_is_valid_answer_label)
                 
-                if not s.empty:
-                    total = s.value_counts().reset_index()
+                if not counts.empty:
+                    total = counts.reset_index()
                     total.columns = ['選項', '次數']
                     st.dataframe(total, use_container_width=True)
                     
                     # 視覺化：如果有階段欄位則按階段分色堆疊
                     if PHASE_COLUMN_NAME in df_to_analyze.columns and df_to_analyze[PHASE_COLUMN_NAME].notna().any() and df_to_analyze[PHASE_COLUMN_NAME].nunique() > 1:
                         st.markdown("##### 📈 各階段分佈（堆疊長條圖）")
-                        df_pair = s.to_frame(name='ans')
-                        df_pair['phase'] = df_to_analyze.loc[df_pair.index, PHASE_COLUMN_NAME].fillna('未標註階段')
-                        pivot = df_pair.groupby(['ans', 'phase']).size().unstack(fill_value=0)
+                        pivot = answer_group_table(response_matrix, col_name, PHASE_COLUMN_NAME,
+                                                   keep_label=_is_valid_answer_label, missing_group_label='未標註階段')
                         
                         # 智慧排序 x 軸
                         sorted_index = smart_sort_categories(pivot.index)
@@ -2319,4 +2006,4 @@ for i, col_name in enumerate(cols_to_analyze):
                         st.plotly_chart(fig, use_container_width=True, key=f"cat_{i}_{col_name[:20]}")
                 
                 # 統計分析 - 類別題
-                perform_comprehensive_statistical_analysis(df_to_analyze, col_data, col_name, is_numeric=False, is_multiselect=False)
+                perform_comprehensive_statistical_analysis(df_to_analyze, col_data, col_name, is_numeric=False, is_multiselect=False, long_answers=long_answers, fingerprint=dataset_fp)
@@ -0,0 +1,138 @@
+"""
+資料完整度矩陣（題目 × respondent_type × 階段 的非缺失筆數）
+- 整份資料只取一次 notna 矩陣（受訪者 × 題目），再以分組的 one-hot 矩陣相乘，
+  一次得到每題在每個 respondent_type × 階段 區隔的作答人數
+- 每個分組維度多一格保存分組缺失的受訪者；只看某一維度時其他維度全部加總
+- 報告推薦的樣本數與缺失率、政府統計風格報告的整體完整度、Word 報告的比對除錯輸出
+  與 app 的完整度熱圖都由它取得，不再逐欄 isna().sum() 或 groupby
+"""
+import numpy as np
+import pandas as pd
+
+from survey_loader import PHASE_COLUMN_NAME
+
+
+def _notna_matrix(df, questions):
+    """受訪者 × 題目 的布林矩陣；欄名重複時該題需所有同名欄位都有值（與 df[col].dropna() 相同）"""
+    if df.columns.is_unique:
+        return df[questions].notna().to_numpy()
+    notna = np.empty((len(df), len(questions)), dtype=bool)
+    for j, col in enumerate(questions):
+        values = df[col].notna()
+        notna[:, j] = values.all(axis=1).to_numpy() if isinstance(values, pd.DataFrame) else values.to_numpy()
+    return notna
+
+
+def build_completeness(df, question_cols, group_cols=('respondent_type', PHASE_COLUMN_NAME)):
+    """
+    建立資料完整度矩陣
+    回傳 dict：
+      questions: 題目名稱列表（依 question_cols 順序，去重且只含存在的欄位）
+      column_index: 題目名稱 → counts 第 0 軸位置
+      n_rows: 受訪者總數
+      counts: ndarray (題數, 各維度組數 + 1, ...)，每題在各區隔的非缺失筆數（最後一格為分組缺失）
+      sizes: ndarray (各維度組數 + 1, ...)，各區隔的受訪者數
+      dims: 分組維度名稱列表（counts 第 1 軸之後的順序）
+      group_labels: 分組維度名稱 → 組別文字列表（不含缺失格）
+    """
+    questions = [c for c in dict.fromkeys(question_cols) if c in df.columns]
+    notna = _notna_matrix(df, questions).astype(np.int64)
+
+    dims = [col for col in group_cols if col in df.columns]
+    group_labels = {}
+    shape = []
+    segment = np.zeros(len(df), dtype=np.int64)
+    for dim in dims:
+        categorical = pd.Categorical(df[dim])
+        labels = list(categorical.categories.astype(str))
+        codes = np.asarray(categorical.codes, dtype=np.int64)
+        # 分組缺失的受訪者計入最後一格
+        segment = segment * (len(labels) + 1) + np.where(codes < 0, len(labels), codes)
+        group_labels[dim] = labels
+        shape.append(len(labels) + 1)
+
+    n_segments = int(np.prod(shape)) if shape else 1
+    one_hot = np.zeros((len(df), n_segments), dtype=np.int64)
+    one_hot[np.arange(len(df)), segment] = 1
+    counts = (notna.T @ one_hot).reshape((len(questions),) + tuple(shape))
+    sizes = one_hot.sum(axis=0).reshape(tuple(shape))
+    return {
+        'questions': questions,
+        'column_index': {q: j for j, q in enumerate(questions)},
+        'n_rows': len(df),
+        'counts': counts,
+        'sizes': sizes,
+        'dims': dims,
+        'group_labels': group_labels,
+    }
+
+
+def non_null_count(completeness, question):
+    """單題非缺失筆數（所有區隔加總）"""
+    j = completeness['column_index'][question]
+    return int(completeness['counts'][j].sum())
+
+
+def missing_rate(completeness, question):
+    """單題缺失比例（0–1）；無資料列時為 0"""
+    n = completeness['n_rows']
+    return (n - non_null_count(completeness, question)) / n if n else 0.0
+
+
+def overall_completeness(completeness, questions=None):
+    """
+    多題整體完整度百分比：1 − 缺失格數 / (受訪者數 × 題數) 再乘 100
+    questions 中不存在的題目計入分母但不計缺失（與原本逐欄加總的算法相同）
+    """
+    if questions is None:
+        questions = completeness['questions']
+    total_cells = completeness['n_rows'] * len(questions)
+    if total_cells == 0:
+        return 0.0
+    present = [completeness['column_index'][q] for q in questions if q in completeness['column_index']]
+    missing_cells = completeness['n_rows'] * len(present) - int(completeness['counts'][present].sum())
+    return (1 - missing_cells / total_cells) * 100
+
+
+def _rollup(completeness, group):
+    """(題目 × 組別) 非缺失筆數與 (組別) 受訪者數，其他維度全部加總；組別不含缺失格"""
+    axis = completeness['dims'].index(group)
+    other = tuple(a for a in range(len(completeness['dims'])) if a != axis)
+    counts = completeness['counts'].sum(axis=tuple(a + 1 for a in other)) if other else completeness['counts']
+    sizes = completeness['sizes'].sum(axis=other) if other else completeness['sizes']
+    return counts[:, :-1], sizes[:-1]
+
+
+def group_non_null_counts(completeness, question, group):
+    """單題各組非缺失筆數 dict（組別缺失不計入，與 df.groupby(group)[question] 逐組 dropna 計數相同）"""
+    counts, _ = _rollup(completeness, group)
+    row = counts[completeness['column_index'][question]]
+    return {label: int(n) for label, n in zip(completeness['group_labels'][group], row)}
+
+
+def completeness_frame(completeness, group=None):
+    """
+    題目 × 區隔 的完整度百分比 DataFrame（該組作答人數 / 該組受訪者數 × 100）
+    group 為 None 時區隔為 respondent_type × 階段 的各組合（欄名以「／」連接）；
+    第一欄「整體」為全體受訪者的完整度（含分組缺失的受訪者）；沒有受訪者的區隔不列入
+    """
+    questions = completeness['questions']
+    n = completeness['n_rows']
+    overall = completeness['counts'].reshape(len(questions), -1).sum(axis=1)
+    columns = {'整體': overall / n * 100 if n else np.zeros(len(questions))}
+
+    dims = completeness['dims'] if group is None else [group]
+    if dims:
+        if group is None:
+            counts = completeness['counts'][(slice(None),) + (slice(0, -1),) * len(dims)]
+            sizes = completeness['sizes'][(slice(0, -1),) * len(dims)]
+        else:
+            counts, sizes = _rollup(completeness, group)
+        labels = [completeness['group_labels'][dim] for dim in dims]
+        for combo in np.ndindex(*sizes.shape):
+            size = sizes[combo]
+            if size == 0:
+                continue
+            name = '／'.join(labels[d][i] for d, i in enumerate(combo))
+            columns[name] = counts[(slice(None),) + combo] / size * 100
+    return pd.DataFrame(columns, index=pd.Index(questions, dtype=object))
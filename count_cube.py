@@ -0,0 +1,136 @@
+"""
+次數立方體（題目 × 答案 × 分組維度）
+- 每題一份 答案 × 各分組維度 的次數陣列，每個分組維度多一格保存分組缺失的受訪者；
+  每份資料只以一次 bincount 建立，之後的交叉表、百分比、圖表數列與卡方檢定輸入都是
+  對它切片或加總（roll-up），不再對同一組資料反覆 pd.crosstab / groupby
+- 只看某一分組維度時，其他維度（含缺失格）全部加總，與只依該維度做 pd.crosstab 的結果相同
+- 交叉表的列、欄依文字排序並去除全為 0 的列與欄（與 pd.crosstab 相同），可加上 All 合計列／欄
+"""
+import numpy as np
+import pandas as pd
+
+
+def build_count_cube(entries, groups):
+    """
+    建立次數立方體
+    entries: 可迭代的 (題目, 答案代碼, 受訪者位置, 答案文字陣列)；受訪者位置為 None 時代碼即依受訪者順序排列，
+             代碼 -1 表示缺失（不計入）
+    groups: {分組維度名稱: pd.Categorical}（長度為受訪者數，缺失值代碼為 -1）
+    回傳 dict：
+      questions: 題目名稱 → {'labels': 答案文字陣列, 'counts': ndarray (答案數, 各維度組數 + 1, ...)}
+      dims: 分組維度名稱列表（counts 第 1 軸之後的順序）
+      group_labels: 分組維度名稱 → 組別文字列表（不含缺失格，缺失格位於最後一格）
+    """
+    dims = list(groups)
+    group_labels = {}
+    group_codes = []
+    shape = []
+    for dim in dims:
+        categorical = groups[dim]
+        labels = list(categorical.categories.astype(str))
+        codes = np.asarray(categorical.codes, dtype=np.int64)
+        # 分組缺失的受訪者計入最後一格
+        group_codes.append(np.where(codes < 0, len(labels), codes))
+        group_labels[dim] = labels
+        shape.append(len(labels) + 1)
+
+    questions = {}
+    for question, codes, positions, labels in entries:
+        codes = np.asarray(codes, dtype=np.int64)
+        if positions is None:
+            positions = np.arange(len(codes))
+        valid = codes >= 0
+        index = (codes[valid],) + tuple(g[np.asarray(positions)[valid]] for g in group_codes)
+        cube_shape = (len(labels),) + tuple(shape)
+        flat = np.ravel_multi_index(index, cube_shape)
+        counts = np.bincount(flat, minlength=int(np.prod(cube_shape))).reshape(cube_shape)
+        questions[question] = {'labels': np.asarray(labels, dtype=object), 'counts': counts}
+    return {'questions': questions, 'dims': dims, 'group_labels': group_labels}
+
+
+def cube_totals(cube, question):
+    """單題各答案的總次數（所有分組維度加總，含分組缺失），回傳 (counts ndarray, 答案文字陣列)"""
+    entry = cube['questions'][question]
+    counts = entry['counts']
+    return counts.reshape(len(entry['labels']), -1).sum(axis=1), entry['labels']
+
+
+def cube_counts(cube, question, group, missing_group_label=None):
+    """
+    單題 答案 × 分組 的次數陣列（其他維度全部加總）
+    missing_group_label: 分組缺失值改以此標籤計入；None 表示排除
+    回傳 (counts ndarray, 答案文字陣列, 組別文字列表)
+    """
+    entry = cube['questions'][question]
+    axis = cube['dims'].index(group) + 1
+    other = tuple(a for a in range(1, entry['counts'].ndim) if a != axis)
+    table = entry['counts'].sum(axis=other) if other else entry['counts']
+    labels = list(cube['group_labels'][group])
+    present, missing = table[:, :-1], table[:, -1]
+    if missing_group_label is None or not missing.any():
+        return present, entry['labels'], labels
+    if missing_group_label in labels:
+        present = present.copy()
+        present[:, labels.index(missing_group_label)] += missing
+        return present, entry['labels'], labels
+    return np.column_stack([present, missing]), entry['labels'], labels + [missing_group_label]
+
+
+def _kept_rows(labels, keep_label):
+    if keep_label is None:
+        return np.ones(len(labels), dtype=bool)
+    return np.array([bool(keep_label(label)) for label in labels], dtype=bool)
+
+
+def group_table_frame(table, labels, group_labels, keep_label=None):
+    """
+    次數陣列轉為交叉表 DataFrame：keep_label 篩掉的答案與全為 0 的列、欄不列入，
+    列、欄依文字排序（與 pd.crosstab 相同）
+    """
+    keep_rows = _kept_rows(labels, keep_label) & (table.sum(axis=1) > 0)
+    table = table[keep_rows]
+    keep_cols = table.sum(axis=0) > 0
+    table = table[:, keep_cols]
+
+    row_labels = np.asarray(labels, dtype=object)[keep_rows]
+    col_labels = np.asarray(group_labels, dtype=object)[keep_cols]
+    row_order = np.argsort(row_labels.astype(str), kind='stable')
+    col_order = np.argsort(col_labels.astype(str), kind='stable')
+    return pd.DataFrame(
+        table[np.ix_(row_order, col_order)],
+        index=pd.Index(row_labels[row_order], dtype=object),
+        columns=pd.Index(col_labels[col_order], dtype=object),
+    )
+
+
+def cube_table(cube, question, group, keep_label=None, missing_group_label=None, normalize=False, margins=False):
+    """
+    單題 答案 × 分組 交叉表（切片自次數立方體）
+    normalize: True 時回傳各欄比例（與 pd.crosstab(normalize='columns') 相同）
+    margins: True 時加上 All 列與 All 欄（與 pd.crosstab(margins=True) 相同）
+    """
+    counts, labels, group_labels = cube_counts(cube, question, group, missing_group_label=missing_group_label)
+    table = group_table_frame(counts, labels, group_labels, keep_label=keep_label)
+    if normalize:
+        return table / table.sum()
+    if margins:
+        table['All'] = table.sum(axis=1)
+        table.loc['All'] = table.sum(axis=0)
+    return table
+
+
+def cube_stack(cube, group, questions, keep_label=None):
+    """
+    多題 答案 × 分組 次數補零成 3-D 陣列 (題數, 最大答案數, 組數)，組別缺失的受訪者不計入，
+    keep_label 篩掉的答案列為 0；可直接交給 batch_stats.chi_square_batch
+    """
+    questions = [q for q in questions if q in cube['questions']]
+    n_groups = len(cube['group_labels'][group])
+    max_codes = max((len(cube['questions'][q]['labels']) for q in questions), default=0)
+    stacked = np.zeros((len(questions), max_codes, n_groups), dtype=np.int64)
+    for i, q in enumerate(questions):
+        counts, labels, _ = cube_counts(cube, q, group)
+        if keep_label is not None:
+            counts = counts * _kept_rows(labels, keep_label)[:, None]
+        stacked[i, :len(labels)] = counts
+    return questions, stacked
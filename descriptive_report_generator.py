@@ -3,20 +3,39 @@
 輸出為 Word 格式，包含圖表、表格、統計檢定、信度效度分析
 """
 from docx import Document
-from docx.shared import Inches, Pt, RGBColor
+from docx.shared import Inches, Pt, RGBColor, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsdecls
 import pandas as pd
 import numpy as np
-from scipy.stats import chi2_contingency, kruskal, mannwhitneyu, fisher_exact, f_oneway
+from scipy.stats import kruskal, mannwhitneyu, fisher_exact, f_oneway
+import scipy
+import plotly
 import plotly.graph_objects as go
 import plotly.express as px
 from io import BytesIO
+from functools import lru_cache
 from datetime import datetime
 import os
 import re
+import sys
+import importlib
 import warnings
 from difflib import SequenceMatcher
+from xml.sax.saxutils import escape as xml_escape
+from long_answers import build_report_long_answers, option_labels, option_counts, option_group_table
+from batch_stats import chi_square_test
+from count_cube import build_count_cube, cube_table
+from completeness import build_completeness, group_non_null_counts
+from chart_render import ChartQueue, render_png
+from report_model import (ReportModel, render_markdown, render_html, report_model_key, analysis_version,
+                          load_report_model, save_report_model)
+from stats_cache import dataset_fingerprint
+from category_order import sort_categories
+from question_types import LIKERT_SCORES
+from merge_mapping import get_merge_mapping, merged_mapping_from, coalesce_merged_columns, method_version
+from text_memo import memoized, save_memo
 warnings.filterwarnings('ignore')
 
 # 環境切換：若要做快速 dry-run（只印除錯訊息，不輸出圖檔或 Word），可設定環境變數 DRY_RUN=1
@@ -88,124 +107,10 @@ def generate_plain_summary(topic_title, chi_result, crosstab_pct=None, role_cols
 
 def smart_sort_categories(categories):
     """
-    智慧排序類別資料 - 與 cloud_app.py 完全一致（改進版）
-    處理百分比、數值範圍、階段、是否等特殊格式
+    智慧排序類別資料（Word 報告規則，處理百分比、數值範圍、階段、是否等特殊格式）
+    排序鍵依答案文字快取，見 category_order
     """
-    if len(categories) == 0:
-        return []
-    
-    categories_list = list(categories)
-    
-    def sort_key(item):
-        item_str = str(item).strip()
-        
-        # 1. 百分比範圍和特殊情況
-        # 先檢查"以下"（應該排在最前）
-        if '以下' in item_str:
-            below_match = re.search(r'(\d+\.?\d*)\s*[%％]?\s*以下', item_str)
-            if below_match:
-                return (0, -1, float(below_match.group(1)))  # 用 -1 確保排在範圍前
-        
-        # 檢查"以上"（應該排在最後）
-        if '以上' in item_str:
-            above_match = re.search(r'(\d+\.?\d*)\s*[%％]?\s*以上', item_str)
-            if above_match:
-                return (0, 1000, float(above_match.group(1)))  # 用 1000 確保排在最後
-        
-        # 百分比範圍 (如 10-20%, 20%-30%)
-        percent_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[%％]', item_str)
-        if percent_match:
-            return (0, 0, float(percent_match.group(1)))
-        
-        # 單一百分比 (如 30%)
-        single_percent = re.match(r'(\d+\.?\d*)\s*[%％]', item_str)
-        if single_percent:
-            return (0, 0, float(single_percent.group(1)))
-        
-        # 2. 年份範圍
-        year_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*年', item_str)
-        if year_match:
-            return (1, 0, float(year_match.group(1)))
-        
-        # 3. 金額範圍
-        money_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*[萬億]', item_str)
-        if money_match:
-            return (2, 0, float(money_match.group(1)))
-        
-        # 4. 月份範圍
-        month_match = re.match(r'(\d+\.?\d*)\s*[-~到至]\s*(\d+\.?\d*)\s*個?月', item_str)
-        if month_match:
-            return (3, 0, float(month_match.group(1)))
-            # 建立 exploded dataframe，逐一拆解複選選項並計數
-            rows = []
-            if 'respondent_type' in df.columns:
-                iter_df = df[[topic_col, 'respondent_type']].dropna(subset=[topic_col])
-            else:
-                iter_df = df[[topic_col]].dropna(subset=[topic_col])
-
-            for _, r in iter_df.iterrows():
-                respondent = r['respondent_type'] if 'respondent_type' in iter_df.columns else 'All'
-                opts = split_options(r[topic_col])
-                for opt in opts:
-                    rows.append({'option': opt, 'respondent_type': respondent})
-
-            if rows:
-                df_exploded = pd.DataFrame(rows)
-                crosstab = pd.crosstab(df_exploded['option'], df_exploded['respondent_type'], margins=True)
-                crosstab_pct = pd.crosstab(df_exploded['option'], df_exploded['respondent_type'], normalize='columns') * 100
-            else:
-                crosstab = pd.DataFrame()
-                crosstab_pct = pd.DataFrame()
-
-            # 生成表格資料
-            table_data = {
-                'columns': ['選項', '公司方人數', '公司方百分比', '投資方人數', '投資方百分比', '合計'],
-                'data': []
-            }
-
-            categories = [c for c in sorted_options if c]
-            for cat in categories:
-                company_count = crosstab.loc[cat, '公司方'] if ('公司方' in crosstab.columns and cat in crosstab.index) else 0
-                company_pct = f"{crosstab_pct.loc[cat, '公司方']:.1f}%" if ('公司方' in crosstab_pct.columns and cat in crosstab_pct.index) else '-'
-                investor_count = crosstab.loc[cat, '投資方'] if ('投資方' in crosstab.columns and cat in crosstab.index) else 0
-                investor_pct = f"{crosstab_pct.loc[cat, '投資方']:.1f}%" if ('投資方' in crosstab_pct.columns and cat in crosstab_pct.index) else '-'
-                total = crosstab.loc[cat, 'All'] if (cat in crosstab.index and 'All' in crosstab.columns) else (company_count + investor_count)
-                table_data['data'].append([str(cat), company_count, company_pct, investor_count, investor_pct, total])
-
-            # 合計行
-            company_total = crosstab.loc['All', '公司方'] if ('公司方' in crosstab.columns and 'All' in crosstab.index) else (crosstab['公司方'].sum() if '公司方' in crosstab.columns else 0)
-            investor_total = crosstab.loc['All', '投資方'] if ('投資方' in crosstab.columns and 'All' in crosstab.index) else (crosstab['投資方'].sum() if '投資方' in crosstab.columns else 0)
-            grand_total = crosstab.loc['All', 'All'] if ('All' in crosstab.index and 'All' in crosstab.columns) else (company_total + investor_total)
-            table_data['data'].append(['合計', company_total, '100.0%', investor_total, '100.0%', grand_total])
-
-            add_statistics_table(doc, table_data, title=f"{topic_title} - 受訪者類型分佈表", table_counter=table_counter)
-
-            # === 加入長條圖 ===
-            doc.add_paragraph()
-            doc.add_paragraph('【圖表呈現】', style='Heading 4')
-        
-        # 8. 階段
-        if '第一階段' in item_str or '階段1' in item_str:
-            return (7, 0, 1)
-        if '第二階段' in item_str or '階段2' in item_str:
-            return (7, 0, 2)
-        if '第三階段' in item_str or '階段3' in item_str:
-            return (7, 0, 3)
-        
-        # 9. 是/否
-        if item_str in ['是', 'Yes', 'yes', '有']:
-            return (8, 0, 1)
-        if item_str in ['否', 'No', 'no', '無']:
-            return (8, 0, 2)
-        
-        # 9. 一般文字
-        return (10, 0, item_str)
-    
-    try:
-        sorted_list = sorted(categories_list, key=sort_key)
-        return sorted_list
-    except:
-        return categories_list
+    return sort_categories(categories, scheme='report')
 
 def add_heading_with_style(doc, text, level=1):
     """新增標題並設定樣式"""
@@ -213,11 +118,47 @@ def add_heading_with_style(doc, text, level=1):
     heading.alignment = WD_ALIGN_PARAGRAPH.LEFT
     return heading
 
-def add_statistics_table(doc, data_dict, title="", table_counter=None):
+def _cell_text_xml(text, run_props=''):
+    """儲存格文字的 run XML（與 python-docx 設定 cell.text 相同：\t 轉為 tab，\n、\r 轉為換行）"""
+    parts = []
+    for chunk in re.split(r'([\t\n\r])', text):
+        if chunk == '\t':
+            parts.append('<w:tab/>')
+        elif chunk in ('\n', '\r'):
+            parts.append('<w:br/>')
+        elif chunk:
+            space = ' xml:space="preserve"' if len(chunk.strip()) < len(chunk) else ''
+            parts.append(f'<w:t{space}>{xml_escape(chunk)}</w:t>')
+    return f"<w:r>{run_props}{''.join(parts)}</w:r>"
+
+
+def _table_row_xml(values, widths, header=False):
+    """
+    表格一列的 XML：標題列置中、加粗 11pt；資料列第一欄不設對齊，其他欄靠右
+    values 少於欄數時，其餘儲存格留空
+    """
+    cells = []
+    for i, width in enumerate(widths):
+        if i < len(values):
+            if header:
+                paragraph = ('<w:p><w:pPr><w:jc w:val="center"/></w:pPr>'
+                             + _cell_text_xml(values[i], '<w:rPr><w:b/><w:sz w:val="22"/></w:rPr>') + '</w:p>')
+            elif i > 0:
+                paragraph = '<w:p><w:pPr><w:jc w:val="right"/></w:pPr>' + _cell_text_xml(values[i]) + '</w:p>'
+            else:
+                paragraph = '<w:p>' + _cell_text_xml(values[i]) + '</w:p>'
+        else:
+            paragraph = '<w:p/>'
+        cells.append(f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr>{paragraph}</w:tc>')
+    return f"<w:tr>{''.join(cells)}</w:tr>"
+
+
+def add_statistics_table(doc, data_dict, title="", table_counter=None, source='問卷調查資料'):
     """
     新增政府統計風格的完整表格
     包含標題、資料來源、製表單位等資訊
     table_counter: 如果提供，會自動編號表格
+    source: 資料來源註記文字；空字串表示不加註記
     """
     # 如果有 table_counter，更新表格編號
     if table_counter is not None and title:
@@ -237,72 +178,60 @@ def add_statistics_table(doc, data_dict, title="", table_counter=None):
         title_para.runs[0].font.bold = True
         title_para.runs[0].font.size = Pt(12)
     
-    # 創建表格
-    table = doc.add_table(rows=1, cols=len(data_dict['columns']))
+    # 創建表格（表格屬性與欄寬由 python-docx 建立，所有列的 XML 一次組好再整批加入）
+    columns = data_dict['columns']
+    table = doc.add_table(rows=0, cols=len(columns))
     table.style = 'Light Grid Accent 1'
 
     # 判斷是否為題項統計表（第一欄為「題項」）
-    is_item_stats = len(data_dict['columns']) > 0 and str(data_dict['columns'][0]).strip() in ['題項', '項目', '題目']
-
-    # 標題列（加粗、置中）
-    hdr_cells = table.rows[0].cells
-    for i, col_name in enumerate(data_dict['columns']):
-        hdr_cells[i].text = str(col_name)
-        # 設定標題列樣式
-        for paragraph in hdr_cells[i].paragraphs:
-            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            for run in paragraph.runs:
-                run.font.bold = True
-                run.font.size = Pt(11)
-
-    # 若為題項統計表，調整第一欄寬度（如7cm）
-    if is_item_stats:
-        try:
-            from docx.shared import Cm
-            for row in table.rows:
-                row.cells[0].width = Cm(7)
-        except Exception as e:
-            pass
-
-    # 資料列
+    is_item_stats = len(columns) > 0 and str(columns[0]).strip() in ['題項', '項目', '題目']
+
+    grid_widths = [gc.get(qn('w:w')) for gc in table._tbl.tblGrid.gridCol_lst]
+    # 標題列（加粗 11pt、置中）；若為題項統計表，標題列第一欄寬度設為 7cm
+    header_widths = list(grid_widths)
+    if is_item_stats and header_widths:
+        header_widths[0] = str(Cm(7).twips)
+    rows_xml = [_table_row_xml([str(c) for c in columns], header_widths, header=True)]
+    # 資料列：第一欄（類別/題項）靠左，其他欄（數值）靠右
     for row_data in data_dict['data']:
-        row_cells = table.add_row().cells
-        for i, cell_value in enumerate(row_data):
-            row_cells[i].text = str(cell_value)
-            # 數值靠右對齊，文字靠左對齊
-            if i > 0:  # 第一欄（類別/題項）靠左，其他欄靠右
-                row_cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        if len(row_data) > len(columns):
+            raise ValueError(f"表格「{title}」的資料列有 {len(row_data)} 欄，超過欄名的 {len(columns)} 欄")
+        rows_xml.append(_table_row_xml([str(v) for v in row_data], grid_widths))
+    rows = parse_xml(f"<w:tbl {nsdecls('w')}>{''.join(rows_xml)}</w:tbl>")
+    table._tbl.extend(list(rows))
     
     # 表格備註（政府統計風格）
     doc.add_paragraph()
-    note_para = doc.add_paragraph()
-    note_para.add_run('資料來源：').font.size = Pt(9)
-    note_para.add_run('問卷調查資料').font.size = Pt(9)
-    note_para.runs[0].font.bold = True
+    if source:
+        note_para = doc.add_paragraph()
+        note_para.add_run('資料來源：').font.size = Pt(9)
+        note_para.add_run(source).font.size = Pt(9)
+        note_para.runs[0].font.bold = True
     
     doc.add_paragraph()  # 空行
     return table
 
-def save_plotly_as_image(fig, filename):
-    """儲存 Plotly 圖表為圖片（PNG格式）"""
-    try:
-        if DRY_RUN:
-            # 在 dry-run 模式下，不實際寫檔，以加速測試並避免環境依賴
-            print(f"[DRY_RUN] skip saving plotly image to {filename}")
-            return True
-        # 嘗試儲存圖表，設定較長的超時時間
-        fig.write_image(filename, width=1000, height=600, scale=2, engine="kaleido")
-        return True
-    except Exception as e:
-        print(f"圖表儲存失敗: {e}")
-        # 嘗試使用較低品質設定
-        try:
-            print("嘗試使用較低品質設定...")
-            fig.write_image(filename, width=800, height=500, scale=1, engine="kaleido")
-            return True
-        except Exception as e2:
-            print(f"圖表儲存再次失敗: {e2}")
-            return False
+def insert_chart(doc, fig, chart_queue=None, failure_text=None):
+    """
+    將圖表插入 Word 文件（寬 6 吋、置中），圖片直接由記憶體中的 PNG bytes 插入，不經暫存檔
+    chart_queue: chart_render.ChartQueue；提供時只預留段落，整份報告的圖表最後一次平行渲染
+    failure_text: 渲染失敗時改插入的文字；None 表示不插入
+    """
+    if chart_queue is not None:
+        chart_queue.add(doc, fig, failure_text=failure_text)
+        return
+    if DRY_RUN:
+        # 在 dry-run 模式下不渲染圖表，以加速測試並避免環境依賴
+        print("[DRY_RUN] skip rendering plotly image")
+        return
+    image = render_png(fig)
+    if image is not None:
+        doc.add_picture(BytesIO(image), width=Inches(6))
+        last_paragraph = doc.paragraphs[-1]
+        last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        doc.add_paragraph()
+    elif failure_text:
+        doc.add_paragraph(failure_text)
 
 def create_bar_chart(crosstab, crosstab_pct, title, categories):
     """
@@ -560,8 +489,8 @@ def calculate_chi_square(df, col_name, group_col='respondent_type'):
                 oddsratio, p = fisher_exact(crosstab)
                 return {'method': 'Fisher精確檢定', 'statistic': oddsratio, 'p_value': p}
             else:
-                chi2, p, dof, expected = chi2_contingency(crosstab)
-                return {'method': '卡方檢定', 'statistic': chi2, 'p_value': p, 'dof': dof}
+                result = chi_square_test(crosstab)
+                return {'method': '卡方檢定', 'statistic': result['chi2'], 'p_value': result['p_value'], 'dof': result['dof']}
     except Exception as e:
         print(f"統計檢定失敗: {e}")
     return None
@@ -942,43 +871,154 @@ def generate_descriptive_report_word(df, output_filename="問卷描述性統計
     
     return doc, table_counter
 
+_PERCENT_RANGE = re.compile(r'(\d+\.?\d*)\s*[%％]?\s*[-~到至]\s*(\d+\.?\d*)\s*[%％]')
+
+
+@lru_cache(maxsize=65536)
+def canonical_label(val_str):
+    """單一答案文字的標準化類別名稱（依文字快取，整個工作階段共用）"""
+    val_str = val_str.strip()
+
+    # 標準化百分比範圍格式
+    # 例如：50%-67% -> 50%-67(不含)%
+    percent_pattern = _PERCENT_RANGE.match(val_str)
+    if percent_pattern:
+        start = percent_pattern.group(1)
+        end = percent_pattern.group(2)
+        return f"{start}%-{end}(不含)%"
+
+    # 標準化「不定期」類別（處理各種變體）
+    if '不定期' in val_str or '不定期提供' in val_str:
+        return '不定期'
+
+    # 其他情況保持原樣
+    return val_str
+
+
 def clean_and_merge_categories(series):
     """
     清理並合併重複的類別（如「50%-67%」和「50%-67(不含)%」）
-    返回標準化後的 Series
+    返回標準化後的 Series（每個不同的答案只標準化一次，再以對照表一次換掉整欄）
     """
-    # 創建映射字典來標準化類別名稱
-    mapping = {}
-    
-    for val in series.unique():
-        if pd.isna(val):
-            continue
-        val_str = str(val).strip()
-        
-        # 標準化百分比範圍格式
-        # 例如：50%-67% -> 50%-67(不含)%
-        percent_pattern = re.match(r'(\d+\.?\d*)\s*[%％]?\s*[-~到至]\s*(\d+\.?\d*)\s*[%％]', val_str)
-        if percent_pattern:
-            start = percent_pattern.group(1)
-            end = percent_pattern.group(2)
-            standardized = f"{start}%-{end}(不含)%"
-            mapping[val] = standardized
-            continue
-        
-        # 標準化「不定期」類別（處理各種變體）
-        if '不定期' in val_str or '不定期提供' in val_str:
-            mapping[val] = '不定期'
-            continue
-        
-        # 其他情況保持原樣
-        mapping[val] = val_str
-    
-    return series.map(lambda x: mapping.get(x, x) if pd.notna(x) else x)
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return series.copy()
+    labels = np.array([canonical_label(str(val)) for val in uniques] + [np.nan], dtype=object)
+    # 缺失值的代碼為 -1，對應到最後一個（np.nan）
+    return pd.Series(labels[codes], index=series.index, name=series.name)
+
 
-def find_matching_column(df, target_col):
+def build_canonical_answers(df, question_cols):
+    """
+    全資料的類別標準化：每題只做一次 clean_and_merge_categories
+    回傳 {題目: 標準化後的 Series（與 df 同 index，缺失值保留）}
+    """
+    return {col: clean_and_merge_categories(df[col]) for col in dict.fromkeys(question_cols) if col in df.columns}
+
+
+def build_answer_cube(df, canonical_answers):
+    """
+    標準化答案的次數立方體（題目 × 答案 × respondent_type × phase），全資料建立一次；
+    各議題的身分、階段交叉表與卡方檢定輸入都由它切片
+    """
+    groups = {col: pd.Categorical(df[col]) for col in ('respondent_type', 'phase') if col in df.columns}
+
+    def entries():
+        for col, canonical in canonical_answers.items():
+            codes, uniques = pd.factorize(canonical)
+            yield col, codes, None, np.asarray(uniques, dtype=object)
+
+    return build_count_cube(entries(), groups)
+
+
+def topic_group_table(answer_cube, subset, topic_col, group, normalize=False, margins=False):
+    """
+    題目 × 分組 交叉表（與 pd.crosstab 相同）；有次數立方體時切片取得，
+    否則對 subset（已去除缺失並標準化的資料）當場 pd.crosstab
+    """
+    if answer_cube is not None and topic_col in answer_cube['questions'] and group in answer_cube['dims']:
+        return cube_table(answer_cube, topic_col, group, normalize=normalize, margins=margins)
+    return pd.crosstab(subset[topic_col], subset[group], normalize='columns' if normalize else False, margins=margins)
+
+
+def canonical_column(canonical_answers, subset, col):
+    """取 subset（df 的部分列）該題的標準化答案；沒有預先建立或 index 不唯一時當場標準化"""
+    canonical = canonical_answers.get(col) if canonical_answers else None
+    if canonical is None or not canonical.index.is_unique:
+        return clean_and_merge_categories(subset[col])
+    return canonical.loc[subset.index]
+
+# 嚴格mapping表（公司方/投資方分開）
+INVESTOR_COLUMN_MAPPINGS = {
+    '請問公司大股東（持股5%以上）合計持股比例為多少？': '請問您投資的公司之大股東（持股5%以上）合計持股比例為多少？',
+    '請問公司經營團隊合計持股比例為多少？': '請問您投資的公司之經營團隊合計持股比例為多少？',
+    # 大股東人數題目
+    '請問公司的大股東（持股5%以上）人數多少人': '公司大股東（持股5%以上）人數',
+    '請問公司的大股東（持股5%以上）人數多少人？': '公司大股東（持股5%以上）人數',
+    '公司大股東（持股5%以上）人數': '公司大股東（持股5%以上）人數',
+}
+INVESTOR_COLUMN_MAPPINGS_REVERSE = {v: k for k, v in INVESTOR_COLUMN_MAPPINGS.items()}
+
+_COLUMN_NAME_PREFIXES = ['請問您投資的公司之', '請問公司的', '請問公司', '請問您投資的', '請問', '【第一階段：', '【第二階段：', '【第三階段：']
+_COLUMN_NAME_PUNCT = re.compile(r'[：:\-—–()（）\[\]{}、,，\s\n\r]+')
+
+
+def normalize_column_name(col):
+    """欄位名稱比對用的標準化：只移除明確的問句前綴與階段前綴，避免過度刪除關鍵詞造成錯配"""
+    s = str(col)
+    for prefix in _COLUMN_NAME_PREFIXES:
+        s = s.replace(prefix, '')
+    # 移除常見標點與空白
+    s = _COLUMN_NAME_PUNCT.sub(' ', s)
+    return s.strip().lower()
+
+
+def build_column_index(df):
+    """
+    欄位對應索引：每個 DataFrame 建立一次，供 find_matching_column 重複查詢
+    回傳 dict：non_null（各欄位非缺失筆數）、normalized（標準化欄名 → 依欄位順序第一個有資料的欄位）、
+    normalized_with_data（依欄位順序的 (欄位, 標準化欄名)，只含有資料的欄位）、resolved（已解析的題目 → 欄位）
+    建立後若 df 新增或修改欄位，需重新建立
+    """
+    if df.columns.is_unique:
+        non_null = {col: int(n) for col, n in df.notna().sum().items()}
+    else:
+        non_null = {col: df[col].dropna().shape[0] for col in dict.fromkeys(df.columns)}
+    normalized = {}
+    normalized_with_data = []
+    for col in dict.fromkeys(df.columns):
+        if non_null[col] > 0:
+            col_norm = normalize_column_name(col)
+            normalized.setdefault(col_norm, col)
+            normalized_with_data.append((col, col_norm))
+    return {
+        'non_null': non_null,
+        'normalized': normalized,
+        'normalized_with_data': normalized_with_data,
+        'resolved': {},
+    }
+
+
+def find_matching_column(df, target_col, column_index=None):
     """
     查找匹配的欄位名稱，處理公司方和投資方的不同命名
+    column_index: build_column_index(df) 的結果；同一份資料重複查詢時傳入，
+    已解析過的題目直接回傳先前結果，未解析的題目也不必重新掃描各欄位的缺失值與欄名
     """
+    if column_index is None:
+        column_index = build_column_index(df)
+    resolved = column_index['resolved']
+    if isinstance(target_col, str) and target_col in resolved:
+        return resolved[target_col]
+    match = _resolve_column(df, target_col, column_index)
+    if isinstance(target_col, str):
+        resolved[target_col] = match
+    return match
+
+
+def _resolve_column(df, target_col, column_index):
+    """find_matching_column 的比對流程（依序嘗試，第一個符合的欄位即為結果）"""
+    non_null = column_index['non_null']
 
     # 嚴格分離公司方/投資方欄位對應
     alt_31_company = '請問公司大股東（持股5%以上）合計持股比例為多少？'
@@ -1002,25 +1042,15 @@ def find_matching_column(df, target_col):
     if target_col == alt_meeting_investor and alt_meeting_investor in df.columns:
         return alt_meeting_investor
 
-    # 2. 嚴格mapping表（公司方/投資方分開）
-    investor_mappings = {
-        '請問公司大股東（持股5%以上）合計持股比例為多少？': '請問您投資的公司之大股東（持股5%以上）合計持股比例為多少？',
-        '請問公司經營團隊合計持股比例為多少？': '請問您投資的公司之經營團隊合計持股比例為多少？',
-        # 大股東人數題目
-        '請問公司的大股東（持股5%以上）人數多少人': '公司大股東（持股5%以上）人數',
-        '請問公司的大股東（持股5%以上）人數多少人？': '公司大股東（持股5%以上）人數',
-        '公司大股東（持股5%以上）人數': '公司大股東（持股5%以上）人數',
-        # ...existing code...
-    }
     # 1. 直接存在且有資料
-    if target_col in df.columns and df[target_col].dropna().shape[0] > 0:
+    if target_col in df.columns and non_null.get(target_col, 0) > 0:
         return target_col
     # 快速處理：若題目包含「發展階段」等關鍵字，嘗試匹配任何包含該關鍵字的欄位
     try:
         if isinstance(target_col, str) and ("發展階段" in target_col or ("發展" in target_col and "階段" in target_col)):
             for col in df.columns:
                 try:
-                    if isinstance(col, str) and ("發展" in col and "階段" in col) and df[col].dropna().shape[0] > 0:
+                    if isinstance(col, str) and ("發展" in col and "階段" in col) and non_null.get(col, 0) > 0:
                         print(f"[find_matching_column] Matched phase question: '{target_col}' -> '{col}'")
                         return col
                 except Exception:
@@ -1036,38 +1066,27 @@ def find_matching_column(df, target_col):
                     continue
     except Exception:
         pass
-    # 2. mapping 對應且有資料
-    if target_col in investor_mappings:
-        mapped_col = investor_mappings[target_col]
-        if mapped_col in df.columns and df[mapped_col].dropna().shape[0] > 0:
+    # 2. mapping 對應且有資料（公司方 → 投資方，再反向）
+    if target_col in INVESTOR_COLUMN_MAPPINGS:
+        mapped_col = INVESTOR_COLUMN_MAPPINGS[target_col]
+        if mapped_col in df.columns and non_null.get(mapped_col, 0) > 0:
             return mapped_col
-    reverse_mapping = {v: k for k, v in investor_mappings.items()}
-    if target_col in reverse_mapping:
-        mapped_col = reverse_mapping[target_col]
-        if mapped_col in df.columns and df[mapped_col].dropna().shape[0] > 0:
+    if target_col in INVESTOR_COLUMN_MAPPINGS_REVERSE:
+        mapped_col = INVESTOR_COLUMN_MAPPINGS_REVERSE[target_col]
+        if mapped_col in df.columns and non_null.get(mapped_col, 0) > 0:
             return mapped_col
 
-    # 3. 自動搜尋所有公司方/投資方對應欄位
-    def normalize_col(col):
-        s = str(col)
-        # 只移除明確的問句前綴與階段前綴，避免過度刪除關鍵詞造成錯配
-        for prefix in ['請問您投資的公司之', '請問公司的', '請問公司', '請問您投資的', '請問', '【第一階段：', '【第二階段：', '【第三階段：']:
-            s = s.replace(prefix, '')
-        # 移除常見標點與空白
-        s = re.sub(r'[：:\-—–()（）\[\]{}、,，\s\n\r]+', ' ', s)
-        return s.strip().lower()
-    norm_target = normalize_col(target_col)
-    for col in df.columns:
-        if normalize_col(col) == norm_target and df[col].dropna().shape[0] > 0:
-            return col
+    # 3. 自動搜尋所有公司方/投資方對應欄位（標準化欄名相同且有資料）
+    norm_target = normalize_column_name(target_col)
+    if norm_target in column_index['normalized']:
+        return column_index['normalized'][norm_target]
 
     # 4. fallback: 允許部分比對（保留字詞順序比對，並需有實際資料）
     norm_tokens = [t for t in norm_target.split() if t]
     if norm_tokens:
-        for col in df.columns:
-            col_norm = normalize_col(col)
+        for col, col_norm in column_index['normalized_with_data']:
             # 檢查是否包含所有 token（維持順序敏感性簡化版）
-            if all(tok in col_norm for tok in norm_tokens) and df[col].dropna().shape[0] > 0:
+            if all(tok in col_norm for tok in norm_tokens):
                 print(f"[find_matching_column] Fallback matched: '{target_col}' -> '{col}' (partial tokens)")
                 return col
 
@@ -1128,7 +1147,7 @@ def find_matching_column(df, target_col):
         for col in df.columns:
             c_low = str(col).lower()
             if '填答' in c_low or '身分' in c_low or '身份' in c_low or 'respondent' in c_low:
-                if df[col].dropna().shape[0] > 0:
+                if non_null.get(col, 0) > 0:
                     print(f"[find_matching_column] Keyword fallback for respondent_type: '{target_col}' -> '{col}'")
                     return col
     # 若是代表公司名稱之類的題目，嘗試匹配常見公司名稱欄位
@@ -1305,13 +1324,13 @@ def find_matching_column(df, target_col):
     # 如果都找不到，返回 None
     return None
 
-def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_question='', table_counter=None, insert_stat_plain=None, sig_topics=None):
+def build_topic_model(model, df, topic_col, topic_title, topic_description, full_question='', insert_stat_plain=None, sig_topics=None, long_answers=None, column_index=None, canonical_answers=None, answer_cube=None):
     """
-    新增單一議題的完整分析
+    計算單一議題的完整分析並寫入報告模型（report_model.ReportModel），不直接輸出 Word
     包含：完整題目、描述、表格、圖表、統計檢定、業務解讀
     即使統計檢定沒過也提供詳細敘述
-    
-    table_counter: 表格編號計數器
+
+    long_answers: 預先建立的複選題長表（build_report_long_answers），未提供時只針對本題建立
     注意：如果df沒有'respondent_type'欄位，則只做整體分析，不做公司方vs投資方比較
     """
     # 預設白話文插入與顯著題目列表
@@ -1320,28 +1339,25 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
     if sig_topics is None:
         sig_topics = []
     
-    add_heading_with_style(doc, topic_title, level=2)
+    model.add_heading(topic_title, level=2)
     
     # 顯示完整題目
     if full_question:
-        question_para = doc.add_paragraph()
-        question_para.add_run('問卷題目：').bold = True
-        question_para.add_run(full_question)
-        question_para.runs[0].font.size = Pt(11)
-        question_para.runs[1].font.size = Pt(11)
-        question_para.runs[1].font.color.rgb = RGBColor(64, 64, 64)
+        model.add_paragraph(runs=[
+            {'text': '問卷題目：', 'bold': True, 'size': 11},
+            {'text': full_question, 'size': 11, 'color': (64, 64, 64)},
+        ])
     
     if topic_description:
-        para = doc.add_paragraph(topic_description)
-        para.runs[0].font.size = Pt(11)
+        model.add_paragraph(runs=[{'text': topic_description, 'size': 11}])
     
     # 查找匹配的欄位名稱（處理公司方和投資方的不同命名）
-    actual_col = find_matching_column(df, topic_col)
+    actual_col = find_matching_column(df, topic_col, column_index)
     
     if actual_col is None:
-        doc.add_paragraph(f'本題目不存在於資料中（查找欄位：{topic_col}）。')
-        doc.add_page_break()
-        return doc
+        model.add_paragraph(f'本題目不存在於資料中（查找欄位：{topic_col}）。')
+        model.add_page_break()
+        return model
     
     # 使用找到的實際欄位名稱
     topic_col = actual_col
@@ -1352,45 +1368,23 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
     )
 
     if is_39_multi:
-        add_heading_with_style(doc, '(一) 公司方與投資方複選頻率分析', level=3)
-        # 解析複選題：以分號、逗號、頓號、空格等分割
-        def split_options(val):
-            if pd.isna(val):
-                return []
-            val = str(val)
-            # 常見分隔符號：；, 、 、 ;
-            for sep in ['；', ';', '、', ',', '，', '\n', '\r', '|', '/']:
-                val = val.replace(sep, '|||')
-            return [v.strip() for v in val.split('|||') if v.strip()]
-
-        # 收集所有選項
-        all_options = set()
-        if topic_col in df.columns:
-            for v in df[topic_col].dropna():
-                all_options.update(split_options(v))
-        sorted_options = smart_sort_categories(list(all_options))
-
-        # 建立 exploded dataframe，逐一拆解複選選項並計數
-        rows = []
-        if topic_col in df.columns:
-            if 'respondent_type' in df.columns:
-                iter_df = df[[topic_col, 'respondent_type']].dropna(subset=[topic_col])
-            else:
-                iter_df = df[[topic_col]].dropna(subset=[topic_col])
-
-            for _, r in iter_df.iterrows():
-                respondent = r['respondent_type'] if 'respondent_type' in iter_df.columns else 'All'
-                opts = split_options(r[topic_col])
-                for opt in opts:
-                    rows.append({'option': opt, 'respondent_type': respondent})
-
-        if rows:
-            df_exploded = pd.DataFrame(rows)
-            crosstab = pd.crosstab(df_exploded['option'], df_exploded['respondent_type'], margins=True)
-            crosstab_pct = pd.crosstab(df_exploded['option'], df_exploded['respondent_type'], normalize='columns') * 100
-        else:
+        model.add_heading('(一) 公司方與投資方複選頻率分析', level=3)
+        # 複選題選項由長表取得（以分號、逗號、頓號、換行等分割，建表時只拆解一次）
+        if long_answers is None or topic_col not in long_answers['slices']:
+            long_answers = build_report_long_answers(df, [topic_col])
+        sorted_options = smart_sort_categories(list(option_labels(long_answers, topic_col)))
+
+        # 各選項 × 受訪者類型 次數（含 All 合計列／欄）與各類型內百分比
+        if len(option_labels(long_answers, topic_col)) == 0:
             crosstab = pd.DataFrame()
             crosstab_pct = pd.DataFrame()
+        elif 'respondent_type' in long_answers['table'].columns:
+            crosstab = option_group_table(long_answers, topic_col, 'respondent_type', margins=True)
+            crosstab_pct = option_group_table(long_answers, topic_col, 'respondent_type', normalize=True) * 100
+        else:
+            crosstab = option_counts(long_answers, topic_col).sort_index().to_frame('All')
+            crosstab.loc['All'] = crosstab['All'].sum()
+            crosstab_pct = pd.DataFrame()
 
         # 生成表格資料
         table_data = {
@@ -1413,11 +1407,11 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
         grand_total = crosstab.loc['All', 'All'] if ('All' in crosstab.index and 'All' in crosstab.columns) else (company_total + investor_total)
         table_data['data'].append(['合計', company_total, '100.0%', investor_total, '100.0%', grand_total])
 
-        add_statistics_table(doc, table_data, title=f"{topic_title} - 受訪者類型分佈表", table_counter=table_counter)
+        model.add_table(table_data, title=f"{topic_title} - 受訪者類型分佈表")
 
         # === 加入長條圖 ===
-        doc.add_paragraph()
-        doc.add_paragraph('【圖表呈現】', style='Heading 4')
+        model.add_paragraph()
+        model.add_paragraph('【圖表呈現】', style='Heading 4')
         
     # 預設白話文插入與顯著題目列表
     if insert_stat_plain is None:
@@ -1428,20 +1422,20 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
     # --- 修正：先檢查資料長度與欄位存在性 ---
     if topic_col not in df.columns:
         print(f"[資料錯誤] 欄位不存在: {topic_col}")
-        doc.add_paragraph(f"[{topic_title} 欄位不存在，無法分析]")
-        return doc
+        model.add_paragraph(f"[{topic_title} 欄位不存在，無法分析]")
+        return model
     if df[topic_col].dropna().shape[0] == 0:
         print(f"[資料錯誤] 欄位無有效資料: {topic_col}")
-        doc.add_paragraph(f"[{topic_title} 欄位無有效資料，無法分析]")
-        return doc
+        model.add_paragraph(f"[{topic_title} 欄位無有效資料，無法分析]")
+        return model
 
     # --- 原本流程 ---
     if 'respondent_type' in df.columns:
         df_clean = df[[topic_col, 'respondent_type']].copy()
         df_clean = df_clean.dropna(subset=[topic_col])
-        df_clean[topic_col] = clean_and_merge_categories(df_clean[topic_col])
-        crosstab = pd.crosstab(df_clean[topic_col], df_clean['respondent_type'], margins=True)
-        crosstab_pct = pd.crosstab(df_clean[topic_col], df_clean['respondent_type'], normalize='columns') * 100
+        df_clean[topic_col] = canonical_column(canonical_answers, df_clean, topic_col)
+        crosstab = topic_group_table(answer_cube, df_clean, topic_col, 'respondent_type', margins=True)
+        crosstab_pct = topic_group_table(answer_cube, df_clean, topic_col, 'respondent_type', normalize=True) * 100
         # 生成表格
         table_data = {
             'columns': ['選項', '公司方人數', '公司方百分比', '投資方人數', '投資方百分比', '合計'],
@@ -1464,10 +1458,10 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
         table_data['data'].append([
             '合計', company_total, '100.0%', investor_total, '100.0%', crosstab.loc['All', 'All']
         ])
-        add_statistics_table(doc, table_data, title=f"{topic_title} - 受訪者類型分佈表", table_counter=table_counter)
+        model.add_table(table_data, title=f"{topic_title} - 受訪者類型分佈表")
         # 長條圖
-        doc.add_paragraph()
-        doc.add_paragraph('【圖表呈現】', style='Heading 4')
+        model.add_paragraph()
+        model.add_paragraph('【圖表呈現】', style='Heading 4')
         try:
             chart_title = f"{topic_title} - 公司方與投資方比較"
             max_label_len = max((len(str(cat)) for cat in categories), default=0)
@@ -1477,36 +1471,25 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                 fig = create_horizontal_bar_chart(crosstab, crosstab_pct, chart_title, categories)
             else:
                 fig = create_bar_chart(crosstab, crosstab_pct, chart_title, categories)
-            chart_filename = f"/tmp/chart_{hash(topic_title)}_bar.png"
-            if save_plotly_as_image(fig, chart_filename):
-                doc.add_picture(chart_filename, width=Inches(6))
-                last_paragraph = doc.paragraphs[-1]
-                last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                doc.add_paragraph()
-                # 只在檔案確實存在時才嘗試刪除，避免在 DRY_RUN 或儲存被跳過時出現錯誤訊息
-                try:
-                    if os.path.exists(chart_filename):
-                        os.remove(chart_filename)
-                except Exception:
-                    pass
+            model.add_chart(fig)
         except Exception as e:
-            doc.add_paragraph(f'（圖表生成時發生錯誤）')
+            model.add_paragraph(f'（圖表生成時發生錯誤）')
 
         # 顯著性檢定與白話文（使用統一模板）
         chi_result = calculate_chi_square(df_clean, topic_col, 'respondent_type') if 'respondent_type' in df_clean.columns else None
         try:
             plain_text = generate_plain_summary(topic_title, chi_result, crosstab_pct=crosstab_pct, role_cols=('公司方', '投資方'))
-            doc.add_paragraph(insert_stat_plain(plain_text))
+            model.add_paragraph(insert_stat_plain(plain_text))
             if chi_result and 'p_value' in chi_result and chi_result['p_value'] is not None and chi_result['p_value'] < 0.05:
                 if sig_topics is not None:
                     sig_topics.append(topic_title)
         except Exception:
             # 若模板產生失敗，後退為原本簡短句
-            doc.add_paragraph('本題產生白話摘要時發生問題。')
+            model.add_paragraph('本題產生白話摘要時發生問題。')
     else:
         df_clean = df[[topic_col]].copy()
         df_clean = df_clean.dropna(subset=[topic_col])
-        df_clean[topic_col] = clean_and_merge_categories(df_clean[topic_col])
+        df_clean[topic_col] = canonical_column(canonical_answers, df_clean, topic_col)
         value_counts = df_clean[topic_col].value_counts()
         total_count = len(df_clean)
         crosstab = pd.DataFrame({
@@ -1529,10 +1512,10 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
         table_data['data'].append([
             '合計', int(crosstab.loc['合計', '次數']), f"{crosstab.loc['合計', '百分比']:.1f}%"
         ])
-        add_statistics_table(doc, table_data, title=f"{topic_title} - 整體分佈表", table_counter=table_counter)
+        model.add_table(table_data, title=f"{topic_title} - 整體分佈表")
         # 長條圖
-        doc.add_paragraph()
-        doc.add_paragraph('【圖表呈現】', style='Heading 4')
+        model.add_paragraph()
+        model.add_paragraph('【圖表呈現】', style='Heading 4')
         try:
             categories = [idx for idx in crosstab.index if idx != '合計']
             percentages = [crosstab.loc[idx, '百分比'] for idx in categories]
@@ -1571,40 +1554,30 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                     template='plotly_white', height=500,
                     font=dict(family='Noto Sans CJK SC, WenQuanYi Micro Hei, sans-serif', size=12)
                 )
-            chart_filename = f"/tmp/chart_{hash(topic_title)}_bar.png"
-            if save_plotly_as_image(fig, chart_filename):
-                doc.add_picture(chart_filename, width=Inches(6))
-                last_paragraph = doc.paragraphs[-1]
-                last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                doc.add_paragraph()
-                try:
-                    if os.path.exists(chart_filename):
-                        os.remove(chart_filename)
-                except Exception:
-                    pass
+            model.add_chart(fig)
         except Exception as e:
-            doc.add_paragraph(f'（圖表生成時發生錯誤）')
+            model.add_paragraph(f'（圖表生成時發生錯誤）')
         # 產生整體白話摘要（無 respondent_type 比較時使用整體模板）
         try:
             plain_text = generate_plain_summary(topic_title, None, crosstab_pct=None, role_cols=None)
-            doc.add_paragraph(insert_stat_plain(plain_text))
+            model.add_paragraph(insert_stat_plain(plain_text))
         except Exception:
-            doc.add_paragraph('本題產生白話摘要時發生問題。')
+            model.add_paragraph('本題產生白話摘要時發生問題。')
     
     # (二) 公司階段分析
     if 'phase' in df.columns and topic_col in df.columns:
-        add_heading_with_style(doc, '(二) 公司發展階段分析', level=3)
+        model.add_heading('(二) 公司發展階段分析', level=3)
         
         # 清理資料
         df_phase = df[[topic_col, 'phase']].dropna()
         
         if len(df_phase) > 0:
             # 清理並標準化階段分析資料
-            df_phase[topic_col] = clean_and_merge_categories(df_phase[topic_col])
+            df_phase[topic_col] = canonical_column(canonical_answers, df_phase, topic_col)
             
             # 階段交叉表
-            phase_crosstab = pd.crosstab(df_phase[topic_col], df_phase['phase'], margins=True)
-            phase_crosstab_pct = pd.crosstab(df_phase[topic_col], df_phase['phase'], normalize='columns') * 100
+            phase_crosstab = topic_group_table(answer_cube, df_phase, topic_col, 'phase', margins=True)
+            phase_crosstab_pct = topic_group_table(answer_cube, df_phase, topic_col, 'phase', normalize=True) * 100
             
             # 生成階段表格
             phases = smart_sort_categories([p for p in phase_crosstab.columns if p != 'All'])
@@ -1648,11 +1621,11 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                 total_row.append(phase_crosstab.loc['All', 'All'])
                 table_data['data'].append(total_row)
                 
-                add_statistics_table(doc, table_data, title=f"{topic_title} - 公司發展階段分佈表", table_counter=table_counter)
+                model.add_table(table_data, title=f"{topic_title} - 公司發展階段分佈表")
                 
                 # === 加入階段比較長條圖 ===
-                doc.add_paragraph()
-                doc.add_paragraph('【圖表呈現】', style='Heading 4')
+                model.add_paragraph()
+                model.add_paragraph('【圖表呈現】', style='Heading 4')
                 
                 try:
                     # 獲取所有類別（排除 'All'）
@@ -1670,30 +1643,14 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                     else:
                         fig = create_phase_chart(phase_crosstab, phase_crosstab_pct, chart_title, categories, phases)
                     
-                    # 儲存圖片
-                    chart_filename = f"/tmp/phase_chart_{hash(topic_title)}.png"
-                    if save_plotly_as_image(fig, chart_filename):
-                        # 將圖片插入 Word 文件
-                        doc.add_picture(chart_filename, width=Inches(6))
-                        # 圖片置中
-                        last_paragraph = doc.paragraphs[-1]
-                        last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        doc.add_paragraph()
-                        
-                        # 清理臨時檔案（僅在存在時刪除）
-                        try:
-                            if os.path.exists(chart_filename):
-                                os.remove(chart_filename)
-                        except Exception:
-                            pass
-                    else:
-                        doc.add_paragraph('（圖表生成失敗）')
+                    # 圖表規格寫入模型，輸出時才渲染
+                    model.add_chart(fig, failure_text='（圖表生成失敗）')
                 except Exception as e:
                     print(f"階段圖表插入失敗: {e}")
-                    doc.add_paragraph(f'（圖表生成時發生錯誤）')
+                    model.add_paragraph(f'（圖表生成時發生錯誤）')
                 
                 # === 統計檢定：根據資料類型選擇適當方法 ===
-                doc.add_paragraph('【統計檢定】', style='Heading 4')
+                model.add_paragraph('【統計檢定】', style='Heading 4')
                 try:
                     # 準備階段分組資料
                     phase_groups = [df_phase[df_phase['phase'] == p][topic_col].dropna() for p in phases]
@@ -1722,15 +1679,12 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                         elif p_val < 0.05:
                             significance = '*（顯著）'
 
-                        doc.add_paragraph(f"檢定方法：Kruskal-Wallis H 檢定（無母數檢定，適用於連續變數），H = {H_stat:.3f}, p = {p_val:.4f} {significance}")
+                        model.add_paragraph(f"檢定方法：Kruskal-Wallis H 檢定（無母數檢定，適用於連續變數），H = {H_stat:.3f}, p = {p_val:.4f} {significance}")
                     else:
                         # 類別變數：使用卡方檢定
-                        phase_crosstab_test = pd.crosstab(df_phase[topic_col], df_phase['phase'])
-                        chi2, p_val, dof, expected = chi2_contingency(phase_crosstab_test)
-
-                        low_expected = (expected < 5).sum()
-                        total_cells = expected.size
-                        low_expected_pct = (low_expected / total_cells) * 100 if total_cells > 0 else 0
+                        phase_chi_result = chi_square_test(topic_group_table(answer_cube, df_phase, topic_col, 'phase'))
+                        chi2, p_val, dof = phase_chi_result['chi2'], phase_chi_result['p_value'], phase_chi_result['dof']
+                        low_expected_pct = phase_chi_result['low_expected_pct']
 
                         significance = 'n.s.'
                         if p_val < 0.001:
@@ -1740,9 +1694,9 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                         elif p_val < 0.05:
                             significance = '*（顯著）'
 
-                        doc.add_paragraph(f"檢定方法：卡方獨立性檢定，χ² = {chi2:.3f}, df = {dof}, p = {p_val:.4f} {significance}")
+                        model.add_paragraph(f"檢定方法：卡方獨立性檢定，χ² = {chi2:.3f}, df = {dof}, p = {p_val:.4f} {significance}")
                         if low_expected_pct > 20:
-                            doc.add_paragraph(f"註：有 {low_expected_pct:.1f}% 之儲存格期望次數小於 5，檢定結果可塑性較低，解讀時請謹慎。")
+                            model.add_paragraph(f"註：有 {low_expected_pct:.1f}% 之儲存格期望次數小於 5，檢定結果可塑性較低，解讀時請謹慎。")
 
                     # 產生簡潔白話總結（以公司方樣本進行階段檢定判斷）
                     try:
@@ -1760,24 +1714,24 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                                 phase_chi = calculate_chi_square(df_for_test, topic_col, 'phase')
                                 pval = phase_chi['p_value'] if phase_chi and 'p_value' in phase_chi else None
                                 if pval is not None and pval < 0.05:
-                                    doc.add_paragraph(f"按公司發展階段分組（公司方 n={note_n}），本題在不同階段間顯示出顯著差異（p = {pval:.4f}）。建議針對此議題進一步分析以了解差異來源。")
+                                    model.add_paragraph(f"按公司發展階段分組（公司方 n={note_n}），本題在不同階段間顯示出顯著差異（p = {pval:.4f}）。建議針對此議題進一步分析以了解差異來源。")
                                 elif pval is not None:
-                                    doc.add_paragraph(f"按公司發展階段分組（公司方 n={note_n}），統計檢定未達顯著（p = {pval:.4f}）。顯示不同階段之間分布趨勢相近。")
+                                    model.add_paragraph(f"按公司發展階段分組（公司方 n={note_n}），統計檢定未達顯著（p = {pval:.4f}）。顯示不同階段之間分布趨勢相近。")
                                 else:
-                                    doc.add_paragraph(f"無法計算階段性檢定（公司方 n={note_n}），可能資料不足或格式不適用。")
+                                    model.add_paragraph(f"無法計算階段性檢定（公司方 n={note_n}），可能資料不足或格式不適用。")
                             else:
-                                doc.add_paragraph("公司方階段資料不足，無法進行階段統計檢定。")
+                                model.add_paragraph("公司方階段資料不足，無法進行階段統計檢定。")
                         else:
-                            doc.add_paragraph("資料中缺少 respondent_type 或 phase 欄位，無法進行階段分析。")
+                            model.add_paragraph("資料中缺少 respondent_type 或 phase 欄位，無法進行階段分析。")
                     except Exception as e:
-                        doc.add_paragraph(f"產生階段白話摘要時發生錯誤：{str(e)[:120]}")
+                        model.add_paragraph(f"產生階段白話摘要時發生錯誤：{str(e)[:120]}")
 
                     # 共同階段描述（以百分比表為基礎）
-                    doc.add_paragraph()
-                    doc.add_paragraph('【階段差異觀察】', style='Heading 4')
+                    model.add_paragraph()
+                    model.add_paragraph('【階段差異觀察】', style='Heading 4')
                     # phase_crosstab_pct 可能在上方未建立（若為數值或類別流程不同），嘗試建立
                     try:
-                        phase_crosstab_pct = pd.crosstab(df_phase[topic_col], df_phase['phase'], normalize='columns') * 100
+                        phase_crosstab_pct = topic_group_table(answer_cube, df_phase, topic_col, 'phase', normalize=True) * 100
                     except Exception:
                         phase_crosstab_pct = pd.DataFrame()
 
@@ -1788,25 +1742,26 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                                 top_option = phase_crosstab_pct[phase].idxmax()
                                 top_pct = phase_crosstab_pct.loc[top_option, phase]
                                 phase_analysis[phase] = {'option': top_option, 'pct': top_pct}
-                                p_bullet = doc.add_paragraph(style='List Bullet 2')
-                                p_bullet.add_run(f"{phase}：").bold = True
-                                p_bullet.add_run(f"主要選擇「{top_option}」（{top_pct:.1f}%）")
+                                model.add_paragraph(style='List Bullet 2', runs=[
+                                    {'text': f"{phase}：", 'bold': True},
+                                    {'text': f"主要選擇「{top_option}」（{top_pct:.1f}%）"},
+                                ])
 
                         if p_val < 0.05:
-                            doc.add_paragraph(f"統計檢定顯示不同發展階段的公司在「{topic_title}」存在顯著差異（p = {p_val:.4f}）。")
+                            model.add_paragraph(f"統計檢定顯示不同發展階段的公司在「{topic_title}」存在顯著差異（p = {p_val:.4f}）。")
                         else:
-                            doc.add_paragraph(f"統計檢定未顯示顯著差異（p = {p_val:.4f}），但仍提供各階段的描述性觀察供參考。")
+                            model.add_paragraph(f"統計檢定未顯示顯著差異（p = {p_val:.4f}），但仍提供各階段的描述性觀察供參考。")
                     else:
-                        doc.add_paragraph('本題目無有效的階段百分比資料以供比較。')
+                        model.add_paragraph('本題目無有效的階段百分比資料以供比較。')
 
                 except Exception as e:
-                    doc.add_paragraph(f"由於資料結構限制或樣本數不足，無法進行統計檢定。錯誤訊息：{str(e)}")
-                    doc.add_paragraph()
-                    doc.add_paragraph('【數據解讀】', style='Heading 4')
+                    model.add_paragraph(f"由於資料結構限制或樣本數不足，無法進行統計檢定。錯誤訊息：{str(e)}")
+                    model.add_paragraph()
+                    model.add_paragraph('【數據解讀】', style='Heading 4')
                     # 從階段分佈進行數據解讀（若可用）
                     phase_descriptions = []
                     try:
-                        phase_crosstab_pct = pd.crosstab(df_phase[topic_col], df_phase['phase'], normalize='columns') * 100
+                        phase_crosstab_pct = topic_group_table(answer_cube, df_phase, topic_col, 'phase', normalize=True) * 100
                         for phase in phases:
                             if phase in phase_crosstab_pct.columns:
                                 top_option = phase_crosstab_pct[phase].idxmax()
@@ -1815,18 +1770,90 @@ def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_
                     except Exception:
                         pass
                     if phase_descriptions:
-                        doc.add_paragraph(
+                        model.add_paragraph(
                             f"從各發展階段的分佈來看，{topic_title}的表現呈現階段性差異。"
                             f"{'；'.join(phase_descriptions)}。"
                         )
         else:
-            doc.add_paragraph('本題目無有效的階段資料。')
+            model.add_paragraph('本題目無有效的階段資料。')
     
-    doc.add_paragraph()  # 空行
-    doc.add_page_break()  # 每個議題後分頁
+    model.add_paragraph()  # 空行
+    model.add_page_break()  # 每個議題後分頁
+    return model
+
+def render_model_docx(doc, model, table_counter=None, chart_queue=None):
+    """
+    將報告模型輸出為 Word（表格經 add_statistics_table 編號，圖表經 insert_chart 渲染）
+    chart_queue: chart_render.ChartQueue，提供時圖表只預留段落，由呼叫端最後一次批次渲染（flush）
+    """
+    for block in model.blocks:
+        kind = block['type']
+        if kind == 'heading':
+            add_heading_with_style(doc, block['text'], level=block['level'])
+        elif kind == 'paragraph':
+            if block.get('runs'):
+                para = doc.add_paragraph(style=block.get('style'))
+                for run in block['runs']:
+                    r = para.add_run(run['text'])
+                    if run['bold']:
+                        r.bold = True
+                    if run.get('italic'):
+                        r.italic = True
+                    if run.get('size'):
+                        r.font.size = Pt(run['size'])
+                    if run.get('color'):
+                        r.font.color.rgb = RGBColor(*run['color'])
+            else:
+                doc.add_paragraph(block['text'], style=block.get('style'))
+        elif kind == 'table':
+            add_statistics_table(doc, {'columns': block['columns'], 'data': block['data']},
+                                 title=block['title'], table_counter=table_counter,
+                                 source=block.get('source', '問卷調查資料'))
+        elif kind == 'chart':
+            # 單張圖表還原或插入失敗時只影響該圖，與分析階段相同改寫為錯誤說明
+            try:
+                insert_chart(doc, go.Figure(block['figure']), chart_queue, failure_text=block.get('failure_text'))
+            except Exception as e:
+                print(f"圖表插入失敗: {e}")
+                doc.add_paragraph('（圖表生成時發生錯誤）')
+        elif kind == 'page_break':
+            doc.add_page_break()
+        elif kind == 'rule':
+            doc.add_paragraph()
     return doc
 
-def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷描述性統計報告_完整版.docx", add_metadata=True):
+
+def add_topic_analysis(doc, df, topic_col, topic_title, topic_description, full_question='', table_counter=None, insert_stat_plain=None, sig_topics=None, long_answers=None, column_index=None, canonical_answers=None, answer_cube=None, chart_queue=None):
+    """
+    新增單一議題的完整分析（build_topic_model 計算後以 render_model_docx 輸出至 doc）
+    table_counter: 表格編號計數器
+    chart_queue: chart_render.ChartQueue，提供時圖表只預留段落，由呼叫端最後一次批次渲染（flush）
+    """
+    model = build_topic_model(
+        ReportModel(), df, topic_col, topic_title, topic_description, full_question=full_question,
+        insert_stat_plain=insert_stat_plain, sig_topics=sig_topics, long_answers=long_answers,
+        column_index=column_index,
+        canonical_answers=canonical_answers, answer_cube=answer_cube)
+    return render_model_docx(doc, model, table_counter=table_counter, chart_queue=chart_queue)
+
+# 逐題分析模型的內容取決於這些模組（本模組之外）的原始碼，任一模組修改都讓模型快取失效
+REPORT_MODEL_MODULES = (
+    'category_order', 'batch_stats', 'count_cube', 'completeness', 'long_answers',
+    'question_types', 'stats_cache', 'merge_mapping', 'question_merge', 'report_model',
+)
+
+
+def report_model_version():
+    """報告模型的分析程式版本：本模組與 REPORT_MODEL_MODULES 的原始碼，加上影響數字與圖表 JSON 的套件版本"""
+    modules = [sys.modules[__name__]] + [importlib.import_module(name) for name in REPORT_MODEL_MODULES]
+    return analysis_version(
+        *modules,
+        f"pandas={pd.__version__}", f"numpy={np.__version__}",
+        f"scipy={scipy.__version__}", f"plotly={plotly.__version__}",
+    )
+
+
+def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷描述性統計報告_完整版.docx", add_metadata=True, markdown_path=None, html_path=None):
     """
     生成完整描述性統計報告（Word 格式）
     包含更多題目，附上政府統計風格表格
@@ -1836,6 +1863,7 @@ def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷
         df: pandas DataFrame - 問卷資料
         output_path: str - 輸出檔案路徑
         add_metadata: bool - 是否自動添加 respondent_type 和 phase 欄位（根據檔案名推斷）
+        markdown_path / html_path: str - 提供時，逐題分析部分另以同一份報告模型輸出 Markdown / HTML
     """
     print("開始生成描述性統計報告...")
     
@@ -1952,6 +1980,8 @@ def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷
         # 使用與 cloud_app 類似的合併邏輯（簡化版）來自動建立題目列表
         cols_to_exclude = ['為了後續支付訪談費，請提供您的電子郵件地址（我們將僅用於聯繫您支付訪談費，並妥善保護您的資料）:', 'IP紀錄', '額滿結束註記', '使用者紀錄', '會員時間', 'Hash', '會員編號', '自訂ID', '備註', '填答時間', '請問公司目前主要處於哪個發展階段？：', '_source_file', 'respondent_type']
 
+        # 標準化與相似度結果依題目文字持久化記憶（text_memo），重複產生報告時不需重新計算
+        @memoized('normalize_question_v2_small')
         def normalize_question_v2_small(q):
             if not isinstance(q, str):
                 return q
@@ -1963,6 +1993,7 @@ def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷
             q = q.rstrip('：:。.,;；？?')
             return q
 
+        @memoized('calculate_similarity')
         def calculate_similarity(s1, s2):
             base_similarity = SequenceMatcher(None, s1, s2).ratio()
             if base_similarity > 0.8:
@@ -1975,65 +2006,42 @@ def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷
 
         def merge_similar_questions_small(df_input, cols_to_exclude, similarity_threshold=0.75):
             all_cols = [c for c in df_input.columns if c not in cols_to_exclude]
-            normalized_groups = {}
-            for col in all_cols:
-                norm = normalize_question_v2_small(col)
-                normalized_groups.setdefault(norm, []).append(col)
-
-            merged_mapping = {}
-            processed_norms = set()
-            norm_keys = list(normalized_groups.keys())
-            for i, norm1 in enumerate(norm_keys):
-                if norm1 in processed_norms:
-                    continue
-                similar_group = [norm1]
-                for norm2 in norm_keys[i+1:]:
-                    if norm2 in processed_norms:
-                        continue
-                    sim = calculate_similarity(norm1, norm2)
-                    if sim >= similarity_threshold:
-                        similar_group.append(norm2)
-                        processed_norms.add(norm2)
-                all_originals = []
-                for norm in similar_group:
-                    all_originals.extend(normalized_groups[norm])
-                representative = None
-                for orig in sorted(all_originals, key=lambda x: (len(x), '投資' in x)):
-                    if '未命名題目' not in orig:
-                        representative = orig
-                        break
-                if representative is None:
-                    representative = all_originals[0]
-                merged_mapping[representative] = all_originals
-                processed_norms.add(norm1)
-
-            # 合併資料，以代表題目為主
-            for rep, originals in merged_mapping.items():
-                if len(originals) > 1:
-                    for other in originals[1:]:
-                        mask = df_input[rep].isna() & df_input[other].notna()
-                        df_input.loc[mask, rep] = df_input.loc[mask, other]
+            # 欄位清單與門檻不變時直接讀回保存的合併對照表（merge_mapping），否則計算並保存
+            artifact = get_merge_mapping(
+                df_input, all_cols, normalize_question_v2_small, calculate_similarity, similarity_threshold,
+                method='word_report', version=method_version(normalize_question_v2_small, calculate_similarity)
+            )
+            merged_mapping = merged_mapping_from(artifact)
+
+            # 合併資料，以代表題目為主；一次建立只含代表題目與排除欄位的新表，不修改傳入的 df
+            df_merged = coalesce_merged_columns(df_input, merged_mapping, keep=cols_to_exclude)
 
             cols_to_analyze = list(merged_mapping.keys())
-            return merged_mapping, cols_to_analyze
+            return df_merged, merged_mapping, cols_to_analyze
 
-        merged_mapping, cols_to_analyze = merge_similar_questions_small(df, cols_to_exclude, similarity_threshold=0.70)
+        df, merged_mapping, cols_to_analyze = merge_similar_questions_small(df, cols_to_exclude, similarity_threshold=0.70)
+        save_memo()
         topics = [{'col': c, 'title': c, 'description': '', 'question': c} for c in cols_to_analyze]
         print(f"使用 app 類似合併邏輯，產生 {len(topics)} 個分析題目")
     
+    # 欄位對應索引只建立一次，比對除錯、逐題分析與信度分析共用（同一題目只解析一次）
+    column_index = build_column_index(df)
+    # 各欄位依 respondent_type 的作答人數一次算好（除錯輸出用）
+    completeness = build_completeness(df, df.columns, group_cols=('respondent_type',))
+
     # Debug: 列出所有題目與實際欄位的比對
     print("\n==== 題目與實際欄位比對 ====")
     for topic in topics:
         col = topic['col']
         try:
-            match = find_matching_column(df, col)
+            match = find_matching_column(df, col, column_index)
         except Exception as e:
             match = None
             print(f"[DEBUG] find_matching_column 錯誤: {e}")
         if match:
             # 顯示按 respondent_type 的計數，幫助檢查公司/投資方分配
             if 'respondent_type' in df.columns and match in df.columns:
-                counts = df.groupby('respondent_type')[match].apply(lambda s: s.dropna().shape[0]).to_dict()
+                counts = group_non_null_counts(completeness, match, 'respondent_type')
             else:
                 counts = {}
             print(f"題目: {col} -> ✔️ {match} | counts by respondent_type: {counts}")
@@ -2041,40 +2049,92 @@ def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷
             print(f"題目: {col} -> ❌ 無對應欄位")
     print("==== End 比對 ====")
 
-    # 逐題分析（所有有資料的題目都進行分析與圖表插入）
-    analyzed_count = 0
-    for topic in topics:
-        print(f"\n--- 分析題目: {topic['title']} ({topic['col']}) ---")
-        try:
-            actual_col = find_matching_column(df, topic['col'])
-        except Exception as e:
-            print(f"[DEBUG] find_matching_column 錯誤（跳過題目）: {e}")
-            doc.add_paragraph(f"[{topic['title']} - 找不到對應欄位，已跳過]")
-            continue
+    # 資料集指紋：報告模型快取鍵的一部分，資料有任何變動時模型即失效
+    fingerprint = dataset_fingerprint(df)
 
-        if actual_col is not None:
+    # 逐題分析結果寫入報告模型；資料、題目清單與分析程式都沒變時直接讀回上次的模型
+    model_key = report_model_key(fingerprint, topics, version=report_model_version())
+    topics_model = load_report_model(model_key)
+    if topics_model is not None:
+        print(f"\n讀回報告模型快取（{len(topics_model.blocks)} 個區塊），略過逐題分析")
+    else:
+        topics_model = ReportModel()
+        # 複選題長表只建立一次，供各議題的選項次數與交叉表共用
+        question_cols = [c for c in df.columns if c not in ('respondent_type', 'phase', '_source_file')]
+        long_answers = build_report_long_answers(df, question_cols)
+        # 答案類別標準化（百分比區間、不定期等）全資料做一次，身分與階段交叉表共用
+        canonical_answers = build_canonical_answers(df, question_cols)
+        # 次數立方體：身分、階段交叉表與卡方檢定輸入都是它的切片
+        answer_cube = build_answer_cube(df, canonical_answers)
+
+        # 逐題分析（所有有資料的題目都進行分析與圖表插入）
+        analyzed_count = 0
+        # 有題目發生例外時（可能是暫時性錯誤）不保存模型，避免之後一直重播錯誤說明
+        failed_count = 0
+        for topic in topics:
+            print(f"\n--- 分析題目: {topic['title']} ({topic['col']}) ---")
             try:
-                add_topic_analysis(
-                    doc, df,
-                    topic['col'],
-                    topic['title'],
-                    topic['description'],
-                    full_question=topic.get('question', ''),
-                    table_counter=table_counter
-                )
-                analyzed_count += 1
-                print(f"完成: {topic['title']}")
+                actual_col = find_matching_column(df, topic['col'], column_index)
             except Exception as e:
-                print(f"分析 {topic['title']} 時發生錯誤: {e}")
-                doc.add_paragraph(f"[{topic['title']} 資料不足或分析發生錯誤]")
+                print(f"[DEBUG] find_matching_column 錯誤（跳過題目）: {e}")
+                failed_count += 1
+                topics_model.add_paragraph(f"[{topic['title']} - 找不到對應欄位，已跳過]")
+                continue
+
+            if actual_col is not None:
+                try:
+                    build_topic_model(
+                        topics_model, df,
+                        topic['col'],
+                        topic['title'],
+                        topic['description'],
+                        full_question=topic.get('question', ''),
+                        long_answers=long_answers,
+                        column_index=column_index,
+                        canonical_answers=canonical_answers,
+                        answer_cube=answer_cube
+                    )
+                    analyzed_count += 1
+                    print(f"完成: {topic['title']}")
+                except Exception as e:
+                    print(f"分析 {topic['title']} 時發生錯誤: {e}")
+                    failed_count += 1
+                    topics_model.add_paragraph(f"[{topic['title']} 資料不足或分析發生錯誤]")
+            else:
+                print(f"❌ 欄位不存在，跳過: {topic['col']}")
+        print(f"\n共分析 {analyzed_count} 個議題 (共 {len(topics)} 題)")
+        if failed_count:
+            print(f"{failed_count} 個議題分析發生錯誤，本次報告模型不寫入快取")
         else:
-            print(f"❌ 欄位不存在，跳過: {topic['col']}")
-    print(f"\n共分析 {analyzed_count} 個議題 (共 {len(topics)} 題)")
+            save_report_model(model_key, topics_model)
+
+    # 輸出 Word：圖表先預留段落，全部議題輸出後由常駐渲染程序池一次平行渲染
+    chart_queue = ChartQueue(width=Inches(6))
+    render_model_docx(doc, topics_model, table_counter=table_counter, chart_queue=chart_queue)
+    if DRY_RUN:
+        print(f"[DRY_RUN] skip rendering {len(chart_queue)} charts")
+        chart_queue.flush(render=False)
+    else:
+        chart_count = len(chart_queue)
+        print(f"渲染圖表 {chart_count} 張...")
+        inserted = chart_queue.flush()
+        print(f"圖表渲染完成：成功 {inserted} 張，失敗 {chart_count - inserted} 張")
+
+    # 同一份模型另外輸出 Markdown / HTML（不需重新分析）
+    for path, render in ((markdown_path, render_markdown), (html_path, render_html)):
+        if not path:
+            continue
+        if DRY_RUN:
+            print(f"[DRY_RUN] skip saving report to: {path}")
+            continue
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render(topics_model))
+        print(f"報告已儲存至: {path}")
     
     # === 新增：信度與效度分析 ===
     if RELIABILITY_AVAILABLE:
         try:
-            add_reliability_validity_analysis(doc, df, topics, table_counter)
+            add_reliability_validity_analysis(doc, df, topics, table_counter, column_index)
         except Exception as e:
             print(f"信度效度分析發生錯誤: {e}")
             doc.add_paragraph(f"[信度效度分析發生錯誤：{str(e)}]")
@@ -2089,10 +2149,13 @@ def generate_full_descriptive_report(df, output_path="/workspaces/work1/問卷
     return output_path
 
 
-def add_reliability_validity_analysis(doc, df, topics, table_counter):
+def add_reliability_validity_analysis(doc, df, topics, table_counter, column_index=None):
     """
     添加信度與效度分析章節
+    column_index: build_column_index(df) 的結果（未提供時自行建立）
     """
+    if column_index is None:
+        column_index = build_column_index(df)
     doc.add_page_break()
     doc.add_heading('四、問卷信度與效度分析', level=1)
     
@@ -2135,7 +2198,7 @@ def add_reliability_validity_analysis(doc, df, topics, table_counter):
         # 找出實際存在的欄位
         actual_cols = []
         for col in dim_cols:
-            actual_col = find_matching_column(df, col)
+            actual_col = find_matching_column(df, col, column_index)
             if actual_col:
                 actual_cols.append(actual_col)
         
@@ -2182,10 +2245,7 @@ def add_reliability_validity_analysis(doc, df, topics, table_counter):
                 test_data = df[actual_cols].copy()
                 for col in actual_cols:
                     if test_data[col].dtype == 'object':
-                        likert_map = {
-                            '非常不同意': 1, '不同意': 2, '普通': 3, '同意': 4, '非常同意': 5
-                        }
-                        test_data[col] = test_data[col].map(likert_map)
+                        test_data[col] = test_data[col].map(LIKERT_SCORES)
                 test_data = test_data.dropna()
                 
                 if len(test_data) < 2:
@@ -2223,7 +2283,7 @@ def add_reliability_validity_analysis(doc, df, topics, table_counter):
         # 找出實際存在的欄位
         actual_cols = []
         for col in dim_cols:
-            actual_col = find_matching_column(df, col)
+            actual_col = find_matching_column(df, col, column_index)
             if actual_col:
                 actual_cols.append(actual_col)
         if len(actual_cols) < 3:
@@ -2246,8 +2306,7 @@ def add_reliability_validity_analysis(doc, df, topics, table_counter):
                 test_data = df[actual_cols].copy()
                 for col in actual_cols:
                     if test_data[col].dtype == 'object':
-                        likert_map = {'非常不同意': 1, '不同意': 2, '普通': 3, '同意': 4, '非常同意': 5}
-                        test_data[col] = test_data[col].map(likert_map)
+                        test_data[col] = test_data[col].map(LIKERT_SCORES)
                 test_data = test_data.dropna()
                 if len(test_data) < 3:
                     doc.add_paragraph(f"KMO檢定：有效資料筆數不足（有效筆數：{len(test_data)}），無法計算")
@@ -2283,7 +2342,7 @@ def add_reliability_validity_analysis(doc, df, topics, table_counter):
         for dim_name, dim_cols in dimensions.items():
             if len(dim_cols) < 3:
                 continue
-            actual_cols = [find_matching_column(df, col) for col in dim_cols if find_matching_column(df, col)]
+            actual_cols = [find_matching_column(df, col, column_index) for col in dim_cols if find_matching_column(df, col, column_index)]
             if len(actual_cols) < 3:
                 continue
             try:
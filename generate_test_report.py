@@ -23,20 +23,27 @@ print("="*60)
 print(f"輸出檔案: {output_path}")
 print()
 
+import os
 import pandas as pd
-all_dfs = []
+from survey_loader import load_files_concurrently, format_load_timings
+
+sources = []
 for label, path in csv_files.items():
-    import os
     if not os.path.exists(path):
         print(f"警告：CSV 檔案不存在，已跳過：{path}")
         continue
-    try:
-        df = pd.read_csv(path)
-    except Exception as e:
-        print(f"讀取 CSV 失敗（跳過）：{path} -> {e}")
+    sources.append((label, path))
+
+# 多個檔案同時讀取，依 csv_files 順序合併；標籤依位置對應（同一檔案出現兩次時各自保留標籤）
+frames, timings = load_files_concurrently([path for _, path in sources], loader=pd.read_csv)
+all_dfs = []
+for (label, _), df, timing in zip(sources, frames, timings):
+    if timing['error'] is not None:
+        print(f"讀取 CSV 失敗（跳過）：{timing['path']} -> {timing['error']}")
         continue
     df['_source_file'] = label
     all_dfs.append(df)
+print(format_load_timings(timings))
 df_merged = pd.concat(all_dfs, ignore_index=True)
 
 try:
@@ -0,0 +1,226 @@
+"""
+問卷作答長表（受訪者 × 題目 × 選項）
+- 載入（及題目合併）後建立一次：每個被選取的選項一列，包含受訪者、題目、選項代碼、
+  respondent_type 與階段（類別代碼）
+- 複選題的拆解（split / explode）只在建表時做一次，各畫面的次數分配與交叉表
+  都從這張表以 bincount 計算
+- 選項代碼依每題選項首次出現順序編號，選項文字存於每題的 options 陣列
+- 同時建立 受訪者 × 選項 的稀疏指示矩陣（所有題目的選項並排），
+  選項有無（presence/absence）的交叉表可由一次矩陣乘法取得
+"""
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from survey_loader import PHASE_COLUMN_NAME
+from count_cube import build_count_cube, cube_totals, cube_table
+
+# cloud_app 的複選題以換行分隔
+DEFAULT_SEPARATORS = ('\n',)
+# Word 報告的複選題另外接受常見的標點分隔符號
+REPORT_SEPARATORS = ('；', ';', '、', ',', '，', '\n', '\r', '|', '/')
+
+DEFAULT_GROUP_COLS = {'respondent_type': 'respondent_type', 'phase': PHASE_COLUMN_NAME}
+
+
+def build_long_answers(df, question_cols, separators=DEFAULT_SEPARATORS, drop_labels=('', 'nan'),
+                       group_cols=None):
+    """
+    建立長表
+    separators: 選項分隔符號；drop_labels: 去除前後空白後要排除的選項文字
+    group_cols: 長表分組欄位名稱 → df 欄位名稱，預設為 respondent_type 與階段欄位
+    回傳 dict：
+      table: DataFrame（respondent, question, option 為整數代碼；分組欄位為 Categorical）
+      questions: 題目名稱列表（question 代碼即其位置）
+      question_index: 題目名稱 → 題目代碼
+      options: 題目名稱 → 選項文字陣列（索引即選項代碼）
+      slices: 題目名稱 → table 中該題的列範圍 (start, stop)
+      indicator: 稀疏布林矩陣 (受訪者數, 所有題目選項總數)，受訪者選了該選項為 True
+      option_offsets: 題目名稱 → indicator 中該題選項的欄範圍 (start, stop)
+      groups: 分組欄位名稱 → 每位受訪者的 pd.Categorical
+      cube: 次數立方體（題目 × 選項 × 各分組欄位，見 count_cube）
+      index: 原 DataFrame 的 index（respondent 代碼為其位置）
+    """
+    if group_cols is None:
+        group_cols = DEFAULT_GROUP_COLS
+    questions = [c for c in dict.fromkeys(question_cols) if c in df.columns]
+
+    # 所有題目的非缺失作答串成一個序列，依題目順序排列
+    respondent_parts, question_parts, text_parts = [], [], []
+    for q, col in enumerate(questions):
+        series = df[col]
+        mask = series.notna().to_numpy()
+        positions = np.flatnonzero(mask)
+        respondent_parts.append(positions)
+        question_parts.append(np.full(len(positions), q, dtype=np.int32))
+        text_parts.append(series[mask].astype(str).to_numpy(dtype=object))
+
+    if questions:
+        cell_respondent = np.concatenate(respondent_parts)
+        cell_question = np.concatenate(question_parts)
+        cell_text = np.concatenate(text_parts)
+    else:
+        cell_respondent = np.empty(0, dtype=np.int64)
+        cell_question = np.empty(0, dtype=np.int32)
+        cell_text = np.empty(0, dtype=object)
+
+    cells = pd.Series(cell_text, index=pd.RangeIndex(len(cell_text)), dtype=object)
+    if len(separators) == 1:
+        tokens = cells.str.split(separators[0], regex=False)
+    else:
+        tokens = cells.str.split('|'.join(re.escape(sep) for sep in separators), regex=True)
+    tokens = tokens.explode().str.strip()
+    tokens = tokens[tokens.notna() & ~tokens.isin(list(drop_labels))]
+
+    cell_ids = tokens.index.to_numpy()
+    token_question = cell_question[cell_ids]
+    token_respondent = cell_respondent[cell_ids]
+    token_text = tokens.to_numpy(dtype=object)
+
+    # 逐題編碼選項（explode 保持題目、受訪者、選項原本的先後順序）
+    token_option = np.empty(len(token_text), dtype=np.int32)
+    bounds = np.searchsorted(token_question, np.arange(len(questions) + 1), side='left')
+    options, slices = {}, {}
+    for q, col in enumerate(questions):
+        start, stop = int(bounds[q]), int(bounds[q + 1])
+        codes, uniques = pd.factorize(token_text[start:stop])
+        token_option[start:stop] = codes
+        options[col] = np.asarray(uniques, dtype=object)
+        slices[col] = (start, stop)
+
+    table = pd.DataFrame({
+        'respondent': token_respondent.astype(np.int32),
+        'question': token_question,
+        'option': token_option,
+    })
+    groups = {}
+    for name, col in group_cols.items():
+        if col in df.columns:
+            groups[name] = pd.Categorical(df[col])
+            table[name] = pd.Categorical.from_codes(
+                np.asarray(groups[name].codes)[token_respondent], groups[name].categories)
+
+    # 指示矩陣：各題選項依題目順序並排；同一格重複出現的選項只算一次
+    option_offsets, offset = {}, 0
+    column_base = np.zeros(len(questions), dtype=np.int64)
+    for q, col in enumerate(questions):
+        column_base[q] = offset
+        option_offsets[col] = (offset, offset + len(options[col]))
+        offset += len(options[col])
+    indicator = sparse.csr_matrix(
+        (np.ones(len(token_option), dtype=bool),
+         (token_respondent, column_base[token_question] + token_option)),
+        shape=(len(df), offset), dtype=bool)
+
+    # 次數立方體：各題 選項 × respondent_type × 階段，選項交叉表都由它切片
+    cube = build_count_cube(
+        ((col, token_option[start:stop], token_respondent[start:stop], options[col])
+         for col, (start, stop) in slices.items()), groups)
+
+    return {
+        'table': table,
+        'questions': questions,
+        'question_index': {q: j for j, q in enumerate(questions)},
+        'options': options,
+        'slices': slices,
+        'indicator': indicator,
+        'option_offsets': option_offsets,
+        'groups': groups,
+        'cube': cube,
+        'index': df.index,
+    }
+
+
+def _question_rows(long, question):
+    start, stop = long['slices'][question]
+    return long['table'].iloc[start:stop]
+
+
+def question_options(long, question):
+    """
+    單題拆解後的選項序列（等同 split + explode + strip 並排除空白後的結果），index 為原受訪者 index
+    """
+    rows = _question_rows(long, question)
+    labels = long['options'][question][rows['option'].to_numpy()]
+    return pd.Series(labels, index=long['index'][rows['respondent'].to_numpy()], dtype=object)
+
+
+def option_labels(long, question):
+    """單題所有選項文字（依首次出現順序，等同 exploded.unique()）"""
+    return long['options'][question]
+
+
+def option_counts(long, question):
+    """單題選項次數（排序結果與 exploded.value_counts() 相同）"""
+    counts, labels = cube_totals(long['cube'], question)
+    result = pd.Series(counts, index=pd.Index(labels, dtype=object))
+    return result.sort_values(ascending=False)
+
+
+def option_group_table(long, question, group, missing_group_label=None, normalize=False, margins=False):
+    """
+    單題選項 × 分組 的交叉表（列、欄依文字排序，與 pd.crosstab 相同）
+    missing_group_label: 分組缺失值改以此標籤計入；None 表示排除
+    normalize: True 時回傳各欄比例（與 pd.crosstab(normalize='columns') 相同）
+    margins: True 時加上 All 列與 All 欄（與 pd.crosstab(margins=True) 相同）
+    """
+    return cube_table(long['cube'], question, group, missing_group_label=missing_group_label,
+                      normalize=normalize, margins=margins)
+
+
+def option_indicator(long, question):
+    """單題的 受訪者 × 選項 稀疏布林矩陣（欄位順序同 option_labels）"""
+    start, stop = long['option_offsets'][question]
+    return long['indicator'][:, start:stop]
+
+
+def option_presence_counts(long, question, group, universe=None, missing_group_label=None):
+    """
+    單題各選項在各組的「有選」人數，一次矩陣乘法算出所有選項
+    universe: 布林陣列（受訪者位置），只計入為 True 的受訪者；None 表示全部
+    missing_group_label: 分組缺失值改以此標籤計入；None 表示排除
+    回傳 (present, totals)：present 為 選項 × 組 的人數 DataFrame，totals 為各組納入的受訪者數
+    """
+    categories = long['groups'][group]
+    group_codes = np.asarray(categories.codes, dtype=np.int64)
+    group_labels = list(categories.categories.astype(str))
+    if missing_group_label is not None and (group_codes < 0).any():
+        if missing_group_label in group_labels:
+            group_codes = np.where(group_codes < 0, group_labels.index(missing_group_label), group_codes)
+        else:
+            group_codes = np.where(group_codes < 0, len(group_labels), group_codes)
+            group_labels.append(missing_group_label)
+
+    valid = group_codes >= 0
+    if universe is not None:
+        valid &= np.asarray(universe, dtype=bool)
+    rows = np.flatnonzero(valid)
+    one_hot = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int64), (rows, group_codes[rows])),
+        shape=(len(group_codes), len(group_labels)))
+
+    present = (option_indicator(long, question).T.astype(np.int64) @ one_hot).toarray()
+    totals = np.bincount(group_codes[rows], minlength=len(group_labels))
+    return (pd.DataFrame(present, index=pd.Index(option_labels(long, question), dtype=object),
+                         columns=pd.Index(group_labels, dtype=object)),
+            pd.Series(totals, index=pd.Index(group_labels, dtype=object)))
+
+
+def option_presence_table(present, totals, option):
+    """
+    單一選項 有選/未選 × 組 的列聯表（等同 pd.crosstab(presence, group)：
+    列為 False/True，欄依文字排序，不含全為 0 的列與欄）
+    """
+    yes = present.loc[option].to_numpy()
+    no = totals.to_numpy() - yes
+    table = pd.DataFrame([no, yes], index=pd.Index([False, True]), columns=present.columns)
+    table = table.loc[table.sum(axis=1) > 0, totals.to_numpy() > 0]
+    return table[sorted(table.columns, key=str)]
+
+
+def build_report_long_answers(df, question_cols):
+    """Word 報告用長表：複選題以 REPORT_SEPARATORS 分隔，分組為 respondent_type 與 phase（master 資料的階段欄位）"""
+    return build_long_answers(df, question_cols, separators=REPORT_SEPARATORS, drop_labels=('',),
+                              group_cols={'respondent_type': 'respondent_type', 'phase': 'phase'})
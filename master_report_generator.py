@@ -11,8 +11,11 @@ Master report generator
 注意：預設會在 DRY_RUN 模式下執行（不會寫圖檔或 docx），要產出真實檔案請先設定環境變數 DRY_RUN="0" 或移除。"""
 
 import os
+import time
+import numpy as np
 import pandas as pd
 from descriptive_report_generator import generate_descriptive_report_word
+from survey_loader import read_survey_csv, load_files_concurrently, format_load_timings
 
 # 要合併的檔名（workspace 內存在）
 FILES = [
@@ -95,8 +98,41 @@ def normalize_answer(val):
     return s
 
 
+def normalize_answers(df, exclude_cols=('respondent_type', 'phase')):
+    """
+    整個 DataFrame 的答案標準化（結果與逐格套用 normalize_answer 相同）
+    先以 factorize 取出所有欄位的唯一值，只對唯一值做一次字串處理，再依代碼對應回原位置
+    """
+    cols = [c for c in df.columns if c not in exclude_cols]
+    if not cols:
+        return df
+    values = df[cols].to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values.ravel(), use_na_sentinel=True)
+
+    normalized = (
+        pd.Series(uniques, dtype=object).astype(str)
+        .str.strip()
+        .str.replace('人', '', regex=False)
+        .str.replace('\u3000', ' ', regex=False)
+        .str.strip()
+        .str.replace('％', '%', regex=False)
+        .str.replace(' ', '', regex=False)
+        .to_numpy(dtype=object)
+    )
+    # 缺失值（代碼 -1）保留原值
+    flat = values.ravel()
+    result = np.where(codes >= 0, normalized[np.maximum(codes, 0)] if len(normalized) else flat, flat)
+    # infer_objects：與 Series.apply 相同的型別推斷（全為缺失值的欄位轉為 float）
+    out = pd.DataFrame(result.reshape(values.shape), index=df.index, columns=cols).infer_objects()
+    for col in cols:
+        df[col] = out[col]
+    return df
+
+
 def load_and_tag(filepath):
-    df = pd.read_csv(filepath, dtype=str)
+    # 共用 survey_loader 的解析與快取（欄位名稱清理、前導列處理），檔案未變更時不重新解析
+    # 編碼無法判斷或解析失敗時由 read_survey_csv 直接拋出例外
+    df = read_survey_csv(filepath, dtype=str)
     base = os.path.basename(filepath)
     # 保留來源檔名以便後續判斷與調查
     df['_source_file'] = base
@@ -108,27 +144,29 @@ def load_and_tag(filepath):
     phase = infer_phase_from_filename(base)
     df['phase'] = phase
 
-    # normalize answers
-    for col in df.columns:
-        if col in ['respondent_type', 'phase']:
-            continue
-        df[col] = df[col].apply(normalize_answer)
+    # normalize answers（每個唯一答案只處理一次）
+    normalize_answers(df)
 
     return df
 
 
 def main():
-    dfs = []
+    start = time.perf_counter()
     for f in FILES:
         if not os.path.exists(f):
             print(f"警告：找不到檔案 {f}，已跳過")
+
+    # 多個檔案同時讀取與標記，依 FILES 順序合併（與依序載入結果相同）
+    frames, timings = load_files_concurrently(FILES, loader=load_and_tag)
+    dfs = []
+    for df, timing in zip(frames, timings):
+        f = timing['path']
+        if timing['error'] is not None:
+            print(f"載入 {f} 時發生錯誤: {timing['error']}")
             continue
-        try:
-            df = load_and_tag(f)
-            dfs.append(df)
-            print(f"已載入: {f} ({len(df)} 列)")
-        except Exception as e:
-            print(f"載入 {f} 時發生錯誤: {e}")
+        dfs.append(df)
+        print(f"已載入: {f} ({len(df)} 列)")
+    print(format_load_timings(timings, time.perf_counter() - start))
 
     if not dfs:
         raise SystemExit('沒有可合併的檔案，請確認 CSV 檔是否存在')
@@ -0,0 +1,183 @@
+"""
+題目合併對照表（merge mapping）的版本化保存
+- 合併結果（代表題目、原始題目、與代表題目的相似度、各填答身分的作答人數）寫成 JSON，
+  存放於 .survey_cache/merge_mappings/，Streamlit 應用程式與 Word 報告共用同一套格式與讀取方式
+- 檔名以「欄位名稱清單雜湊 + 門檻 + 合併方法版本」為鍵：新匯出的問卷欄位不變時直接讀回對照表，
+  不必重新標準化與比對相似度；欄位、門檻、標準化規則或相似度函式任一變動都會得到新的鍵
+- 欄位順序會影響貪婪分組，因此雜湊依原順序計算
+- 作答人數為建立對照表當時的資料，只供檢視；資料合併（以其他題目填補代表題目的缺失）每次都依目前資料執行
+- 與 CSV 解析快取共用 SURVEY_CACHE 開關：關閉時每次都重新計算，不讀寫磁碟
+"""
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from survey_loader import CACHE_ENABLED, CACHE_DIR_NAME
+from question_merge import group_similar_keys
+from text_memo import function_version
+
+MAPPING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_DIR_NAME, 'merge_mappings')
+# 檔案格式或合併演算法（分組、代表題目選擇）變更時請遞增
+MAPPING_FORMAT_VERSION = 1
+
+
+def header_set_hash(headers):
+    """欄位名稱清單（依原順序）的雜湊"""
+    return hashlib.sha1('\x1f'.join(map(str, headers)).encode('utf-8')).hexdigest()
+
+
+def method_version(normalize, similarity, extra=''):
+    """合併方法版本：標準化與相似度函式的程式碼雜湊（含記憶裝飾器包裝的原函式），extra 可加入規則檔版本"""
+    h = hashlib.sha1()
+    for func in (normalize, similarity):
+        h.update(function_version(getattr(func, '__wrapped__', func)).encode('utf-8'))
+    h.update(str(extra).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def mapping_path(method, headers, threshold, version):
+    key = f"{header_set_hash(headers)[:20]}-t{threshold:.4f}-{version}"
+    return os.path.join(MAPPING_DIR, f"{method}-{key}.json")
+
+
+def choose_representative(originals):
+    """優先選擇沒有「未命名題目」且較短的作為代表（公司方優先）；全部都是未命名題目時取第一個"""
+    for orig in sorted(originals, key=lambda x: (len(x), '投資' in x)):
+        if '未命名題目' not in orig:
+            return orig
+    return originals[0]
+
+
+def respondent_coverage(df, columns, group_col='respondent_type'):
+    """各欄位依填答身分的作答人數 {欄位: {身分: 人數}}；資料沒有身分欄位時回傳空 dict"""
+    if group_col not in df.columns or not columns:
+        return {}
+    counts = df[list(columns)].notna().groupby(df[group_col].fillna('未知').astype(str)).sum()
+    return {col: {str(rt): int(n) for rt, n in counts[col].items()} for col in counts.columns}
+
+
+def build_merge_mapping(df, headers, normalize, similarity, threshold):
+    """
+    計算合併對照表
+    回傳分組列表，每組為 dict：representative、originals（原始題目，依欄位順序）、
+    normalized（各原始題目的標準化文字）、similarity（各原始題目與代表題目標準化文字的相似度）、
+    coverage（各原始題目依填答身分的作答人數）
+    """
+    # 第一步：標準化並分組（標準化後相同的題目會自動合併）
+    normalized_groups = {}
+    for col in headers:
+        normalized_groups.setdefault(normalize(col), []).append(col)
+
+    # 第二步：相似度匹配；只有字元倒排索引篩出的候選配對才計算相似度
+    coverage = respondent_coverage(df, headers)
+    groups = []
+    for similar_group in group_similar_keys(normalized_groups.keys(), similarity, threshold):
+        originals = []
+        for norm in similar_group:
+            originals.extend(normalized_groups[norm])
+        representative = choose_representative(originals)
+        rep_norm = normalize(representative)
+        groups.append({
+            'representative': representative,
+            'originals': originals,
+            'normalized': {orig: normalize(orig) for orig in originals},
+            'similarity': {orig: round(float(similarity(rep_norm, normalize(orig))), 6) for orig in originals},
+            'coverage': {orig: coverage.get(orig, {}) for orig in originals},
+        })
+    return groups
+
+
+def load_merge_mapping(path, headers):
+    """讀取對照表；檔案不存在、損毀、格式版本不符或欄位清單不同時回傳 None"""
+    if not CACHE_ENABLED or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            artifact = json.load(f)
+    except Exception:
+        return None
+    if artifact.get('format') != MAPPING_FORMAT_VERSION or artifact.get('headers') != list(headers):
+        return None
+    return artifact
+
+
+def save_merge_mapping(path, artifact):
+    """寫入對照表（先寫暫存檔再置換）；回傳是否有寫入"""
+    if not CACHE_ENABLED:
+        return False
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, path)
+        return True
+    except Exception as e:
+        print(f"寫入題目合併對照表失敗（不影響分析）：{e}")
+        return False
+
+
+def get_merge_mapping(df, headers, normalize, similarity, threshold, method, version):
+    """
+    取得合併對照表：同一欄位清單、門檻與方法版本已有保存的對照表時直接讀回，否則計算並保存
+    method: 合併方法名稱（例如 'app'、'word_report'），不同方法的對照表分開保存
+    version: 合併方法版本（見 method_version）
+    回傳 artifact dict（groups 為 build_merge_mapping 的分組列表）
+    """
+    headers = list(headers)
+    path = mapping_path(method, headers, threshold, version)
+    artifact = load_merge_mapping(path, headers)
+    if artifact is not None:
+        return artifact
+    artifact = {
+        'format': MAPPING_FORMAT_VERSION,
+        'method': method,
+        'method_version': version,
+        'threshold': threshold,
+        'header_hash': header_set_hash(headers),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'headers': headers,
+        'groups': build_merge_mapping(df, headers, normalize, similarity, threshold),
+    }
+    save_merge_mapping(path, artifact)
+    return artifact
+
+
+def merged_mapping_from(artifact):
+    """對照表轉為 {代表題目: [所有原始題目]}（依分組順序）"""
+    return {group['representative']: list(group['originals']) for group in artifact['groups']}
+
+
+def _coalesce(df, columns):
+    """依 columns 的順序取每列第一個非缺失值（columns[0] 為代表題目）"""
+    representative = df[columns[0]]
+    block = df[columns]
+    missing = block.isna().to_numpy()
+    if not (missing[:, 0] & ~missing[:, 1:].all(axis=1)).any():
+        # 代表題目沒有可由其他題目填補的缺失
+        return representative
+    values = block.to_numpy()
+    first = missing.argmin(axis=1)
+    merged = values[np.arange(len(values)), first]
+    return pd.Series(merged, index=df.index, name=columns[0], dtype=values.dtype)
+
+
+def coalesce_merged_columns(df, merged_mapping, keep=()):
+    """
+    資料合併：每個代表題目取同組題目中第一個非缺失值（代表題目優先，其餘依對照表順序），
+    回傳只含代表題目與 keep 中欄位（填答身分、來源檔案等）的新 DataFrame，不修改 df
+    欄位順序與 df 相同；填補順序與逐題以遮罩填入代表題目相同（不含組內第一個非代表的原始題目）
+    """
+    keep = set(keep)
+    merged = {}
+    for representative, originals in merged_mapping.items():
+        columns = [representative] + [c for c in originals[1:] if c != representative]
+        merged[representative] = _coalesce(df, columns) if len(columns) > 1 else df[representative]
+    data = {col: merged[col] if col in merged else df[col]
+            for col in df.columns if col in merged or col in keep}
+    return pd.DataFrame(data, index=df.index)
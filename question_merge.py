@@ -0,0 +1,85 @@
+"""
+題目相似度合併的候選配對篩選
+- 原本每個標準化題目都要與其後所有題目跑一次 SequenceMatcher（O(n²) 純 Python）
+- 先以字元倒排索引（題目 × 字元 的出現次數稀疏矩陣）算出兩題共同字元數，
+  得到 SequenceMatcher.ratio() 的上界（即 quick_ratio）；calculate_similarity 只會把
+  ratio 往下調整，因此上界未達門檻的配對不可能合併，不必進入精確比對
+- 分組仍依原本的貪婪順序進行，合併結果與逐一比對所有配對完全相同
+"""
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+
+def build_char_index(keys):
+    """
+    建立字元倒排索引
+    回傳 dict：counts（題目 × 字元 的出現次數，CSC 稀疏矩陣，方便依字元取欄）、
+    lengths（各題字數）、chars（各題的 (字元欄位, 次數) 陣列）
+    """
+    vocab = {}
+    rows, cols, vals, chars = [], [], [], []
+    for i, key in enumerate(keys):
+        key_counts = Counter(key)
+        positions = np.array([vocab.setdefault(ch, len(vocab)) for ch in key_counts], dtype=np.int64)
+        occurrences = np.fromiter(key_counts.values(), dtype=np.int64, count=len(key_counts))
+        rows.extend([i] * len(positions))
+        cols.extend(positions.tolist())
+        vals.extend(occurrences.tolist())
+        chars.append((positions, occurrences))
+    counts = sparse.csc_matrix((np.asarray(vals, dtype=np.int64), (rows, cols)),
+                               shape=(len(keys), len(vocab)), dtype=np.int64)
+    return {
+        'counts': counts,
+        'lengths': np.array([len(k) for k in keys], dtype=np.int64),
+        'chars': chars,
+    }
+
+
+def candidate_positions(index, i, threshold):
+    """
+    keys[i] 之後（位置 > i）可能達到門檻的題目位置（由小到大）
+    上界 2 × 共同字元數 / 兩題總字數 與 SequenceMatcher 的 ratio 以相同方式計算，
+    浮點數比較不會誤刪實際達到門檻的配對
+    """
+    lengths = index['lengths']
+    positions, occurrences = index['chars'][i]
+    n_later = len(lengths) - i - 1
+    if len(positions):
+        # 只取 keys[i] 出現過的字元欄位，其他字元不會貢獻共同字元數
+        later = index['counts'][:, positions][i + 1:]
+        shared = np.minimum(later.toarray(), occurrences).sum(axis=1)
+    else:
+        shared = np.zeros(n_later, dtype=np.int64)
+    total = lengths[i] + lengths[i + 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 兩題皆為空字串時 SequenceMatcher 的 ratio 為 1.0
+        upper = np.where(total > 0, 2.0 * shared / total, 1.0)
+    return np.flatnonzero(upper >= threshold) + i + 1
+
+
+def group_similar_keys(keys, similarity, threshold):
+    """
+    依原本的貪婪順序分組：每個尚未歸組的 keys[i]，與其後尚未歸組且 similarity(keys[i], keys[j])
+    達門檻的題目同組；只有候選配對才會呼叫 similarity
+    similarity: 精確相似度函式（例如 calculate_similarity），其值不得高於 SequenceMatcher.ratio()
+    回傳分組列表，每組為標準化題目的列表（第一個為組首）
+    """
+    keys = list(keys)
+    index = build_char_index(keys)
+    processed = np.zeros(len(keys), dtype=bool)
+    groups = []
+    for i, key in enumerate(keys):
+        if processed[i]:
+            continue
+        group = [key]
+        for j in candidate_positions(index, i, threshold):
+            if processed[j]:
+                continue
+            if similarity(key, keys[j]) >= threshold:
+                group.append(keys[j])
+                processed[j] = True
+        processed[i] = True
+        groups.append(group)
+    return groups
@@ -0,0 +1,168 @@
+"""
+題目標準化改寫規則引擎
+- normalize_question_v2 的改寫規則存放於 normalize_rules.json，新增問卷用語只需加一列規則
+- 規則載入時編譯一次：連續的字面替換分段合併成一個交替正規表示式與替換對照表，一次掃描完成整段替換，不必每條規則各掃描一次題目
+- 只有「單次掃描與逐條 str.replace 結果必定相同」的規則才會放在同一段；
+  樣式可能從較早規則的出現位置之前開始重疊、或較早規則的替換結果可能組成較晚規則的樣式時，
+  較晚的規則另起一段，因此規則順序與輸出都與原本逐條替換完全相同
+- 標準化結果以題目文字與規則檔雜湊為鍵持久化記憶（text_memo）
+"""
+import os
+import re
+import json
+import hashlib
+
+from text_memo import memoized
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'normalize_rules.json')
+
+
+def _overlaps_from_left(later, earlier):
+    """later 的某個出現位置是否可能在 earlier 之前開始並與其重疊（單次掃描會先選到 later）"""
+    for d in range(1, len(later)):
+        m = min(len(later) - d, len(earlier))
+        if later[d:d + m] == earlier[:m]:
+            return True
+    return False
+
+
+def _may_create(replacement, pattern):
+    """把某段文字替換成 replacement 後，是否可能因此出現新的 pattern（與替換結果重疊或跨越接合處）"""
+    if replacement == '':
+        # 刪除後前後文字直接相接，長度 ≥ 2 的樣式都可能跨越接合處
+        return len(pattern) >= 2
+    for d in range(-(len(pattern) - 1), len(replacement)):
+        if all(pattern[k] == replacement[d + k]
+               for k in range(len(pattern)) if 0 <= d + k < len(replacement)):
+            return True
+    return False
+
+
+def _compatible(segment, old):
+    """規則（樣式 old）加入目前分段後，單次掃描是否仍與逐條替換等價"""
+    return not any(_overlaps_from_left(old, prev_old) or _may_create(prev_new, old)
+                   for prev_old, prev_new in segment)
+
+
+def _segment_replacements(pairs):
+    """將依序套用的字面替換切成可單次掃描的分段"""
+    segments = []
+    for old, new in pairs:
+        if not old:
+            raise ValueError("字面替換的樣式不可為空字串")
+        if segments and _compatible(segments[-1], old):
+            segments[-1].append((old, new))
+        else:
+            segments.append([(old, new)])
+    return segments
+
+
+def _compile_segment(segment):
+    if len(segment) == 1:
+        return ('replace', segment[0][0], segment[0][1])
+    pattern = re.compile('|'.join(re.escape(old) for old, _ in segment))
+    # 交替式在同一位置依規則順序嘗試，樣式重複時由較早的規則命中，對照表也保留較早的替換
+    table = {}
+    for old, new in segment:
+        table.setdefault(old, new)
+    return ('multi', pattern, lambda m: table[m.group()])
+
+
+def _compile_condition(when):
+    return (tuple(when.get('all', ())), tuple(when.get('any', ())), tuple(when.get('none', ())))
+
+
+def compile_rules(steps):
+    """將規則清單（normalize_rules.json 的 steps）編譯成依序執行的操作列表"""
+    ops = []
+    for step in steps:
+        if 'when' in step:
+            inner = compile_rules(step.get('steps', []))
+            if 'prefix' in step:
+                inner.append(('prefix', step['prefix']))
+            ops.append(('when', _compile_condition(step['when']), inner))
+        elif 'replace' in step:
+            pairs = [tuple(pair) for pair in step['replace']]
+            segments = [_compile_segment(segment) for segment in _segment_replacements(pairs)]
+            if len(segments) > 1:
+                # 整組樣式都沒出現時不會有任何替換（也不會產生新樣式），一次搜尋即可略過整組
+                gate = re.compile('|'.join(re.escape(old) for old, _ in pairs))
+                ops.append(('group', gate, segments))
+            else:
+                ops.extend(segments)
+        elif 'sub' in step:
+            ops.append(('sub', re.compile(step['sub']), step.get('repl', '')))
+        elif 'strip' in step:
+            ops.append(('strip',))
+        elif 'rstrip' in step:
+            ops.append(('rstrip', step['rstrip']))
+        else:
+            raise ValueError(f"無法辨識的改寫規則：{step}")
+    return ops
+
+
+def load_rules(path=RULES_PATH):
+    """讀取並編譯規則檔"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return compile_rules(json.load(f)['steps'])
+
+
+def _condition_holds(condition, q):
+    all_of, any_of, none_of = condition
+    return (all(s in q for s in all_of)
+            and (not any_of or any(s in q for s in any_of))
+            and not any(s in q for s in none_of))
+
+
+def apply_rules(q, ops):
+    """依序套用編譯後的規則"""
+    for op in ops:
+        kind = op[0]
+        if kind == 'replace':
+            q = q.replace(op[1], op[2])
+        elif kind == 'multi':
+            # 大多數題目不含該段任何樣式，先以同一個正規表示式搜尋，命中才替換
+            if op[1].search(q) is not None:
+                q = op[1].sub(op[2], q)
+        elif kind == 'group':
+            if op[1].search(q) is not None:
+                q = apply_rules(q, op[2])
+        elif kind == 'sub':
+            q = op[1].sub(op[2], q)
+        elif kind == 'when':
+            if _condition_holds(op[1], q):
+                q = apply_rules(q, op[2])
+        elif kind == 'prefix':
+            q = op[1] + q
+        elif kind == 'strip':
+            q = q.strip()
+        elif kind == 'rstrip':
+            q = q.rstrip(op[1])
+    return q
+
+
+def rules_version(path=RULES_PATH):
+    """規則檔內容雜湊，作為標準化結果記憶的版本"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+_default_rules = None
+
+
+@memoized('normalize_question_v2', version=rules_version())
+def _normalize_with_default_rules(q):
+    global _default_rules
+    if _default_rules is None:
+        _default_rules = load_rules()
+    return apply_rules(q, _default_rules)
+
+
+def normalize_question_v2(q):
+    """
+    更激進的標準化：移除所有身分標記和冗餘詞彙（規則見 normalize_rules.json）
+    結果依題目文字與規則檔版本記憶（text_memo），已處理過的題目不再重新套用規則
+    """
+    if not isinstance(q, str):
+        return q
+    return _normalize_with_default_rules(q)
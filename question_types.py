@@ -0,0 +1,54 @@
+"""
+題型登錄表（每份資料建立一次）
+- 每題分類為 multiselect（複選）、numeric（數值）、likert（同意程度量表）或 categorical（單選類別）；
+  報告推薦、深度分析、逐題顯示與 Word 報告都讀這張表，不再各自以 str.contains('\n') 與
+  pd.to_numeric 重新掃描整欄，判斷結果在各畫面之間一致
+- 數值題保存轉換後的數值向量（保留原 index，已去除缺失與無法轉換的值）
+- 複選題的選項拆解由長表（long_answers）負責，這裡只記錄題型
+- likert 題在各處仍以單選類別方式呈現，另提供分數對照供信度分析使用
+"""
+import pandas as pd
+
+# 數值可轉換比例超過此門檻時視為數值題
+NUMERIC_RATIO_THRESHOLD = 0.7
+# 同意程度量表（與信度分析相同的 1–5 分對照）
+LIKERT_SCORES = {'非常不同意': 1, '不同意': 2, '普通': 3, '同意': 4, '非常同意': 5}
+
+
+def classify_question(series):
+    """
+    判斷單一題目的題型
+    回傳 dict：type、n（有效樣本數）、numeric（數值題的數值向量，其他題型為 None）
+    """
+    values = series.dropna()
+    info = {'type': 'categorical', 'n': len(values), 'numeric': None}
+    if values.empty:
+        return info
+    if values.dtype == 'object' and values.astype(str).str.contains('\n', na=False).any():
+        info['type'] = 'multiselect'
+        return info
+    if pd.api.types.is_numeric_dtype(values):
+        info['type'] = 'numeric'
+        info['numeric'] = values
+        return info
+    numeric_version = pd.to_numeric(values, errors='coerce').dropna()
+    if len(numeric_version) > 0 and len(numeric_version) / len(values) > NUMERIC_RATIO_THRESHOLD:
+        info['type'] = 'numeric'
+        info['numeric'] = numeric_version
+        return info
+    if values.astype(str).str.strip().isin(LIKERT_SCORES).all():
+        info['type'] = 'likert'
+    return info
+
+
+def build_question_types(df, question_cols):
+    """建立題型登錄表 {題目: classify_question 的結果}；不存在於 df 的題目略過"""
+    return {col: classify_question(df[col]) for col in dict.fromkeys(question_cols) if col in df.columns}
+
+
+def question_type(types, df, col):
+    """查詢題型；登錄表未提供或沒有該題時當場判斷（結果不寫回）"""
+    if types is not None and col in types:
+        return types[col]
+    return classify_question(df[col])
+
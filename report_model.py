@@ -0,0 +1,376 @@
+"""
+報告中介模型（計算與輸出分離）
+- 逐題分析只計算一次，結果寫成依序排列的區塊：標題、段落（可含粗體／字級／顏色的文字片段）、
+  項目符號、統計表（欄名與已格式化的儲存格文字）、圖表規格（Plotly 圖表 JSON）、分隔線與分頁
+- 模型只含 JSON 可序列化的資料，可存檔後重複使用；Word、Markdown、HTML 都由同一份模型輸出，
+  輸出時不再計算交叉表或統計檢定
+- 描述性統計 Word 報告的逐題分析、標準業務報告（cloud_app.build_professional_model）與
+  政府統計風格報告（professional_report_enhanced.build_government_model）都先建立模型再輸出
+- 表格編號在輸出時才依出現順序編列（Word 報告與前面章節的表格共用同一個計數器）
+- 模型以 (資料集指紋, 題目清單, 模型版本, 分析程式版本) 為鍵存放於 .survey_cache/report_models/；
+  分析程式版本由呼叫端以 analysis_version() 取得相依模組原始碼與套件版本的雜湊，
+  與 CSV 解析快取共用 SURVEY_CACHE 開關；讀回的模型先檢查區塊格式與圖表 JSON，無法輸出時視為未命中
+"""
+import os
+import re
+import json
+import hashlib
+import inspect
+import threading
+from html import escape as html_escape
+
+from survey_loader import CACHE_ENABLED, CACHE_DIR_NAME
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_DIR_NAME, 'report_models')
+# 區塊格式變更時請遞增，讓舊的模型檔自動失效
+REPORT_MODEL_VERSION = 1
+# 各區塊類型的必要欄位（讀回模型時檢查）
+BLOCK_FIELDS = {
+    'heading': ('text', 'level'),
+    'paragraph': ('text',),
+    'table': ('title', 'columns', 'data'),
+    'chart': ('figure',),
+    'page_break': (),
+    'rule': (),
+}
+# 表格預設的資料來源註記
+DEFAULT_TABLE_SOURCE = '問卷調查資料'
+
+
+class ReportModel:
+    """依序記錄報告區塊；to_dict() / from_dict() 與 JSON 互轉"""
+
+    def __init__(self, blocks=None):
+        self.blocks = list(blocks) if blocks else []
+
+    def add_heading(self, text, level=1):
+        self.blocks.append({'type': 'heading', 'text': str(text), 'level': int(level)})
+
+    def add_paragraph(self, text='', style=None, runs=None):
+        """
+        新增段落；runs 為文字片段列表 [{'text', 'bold', 'italic', 'size', 'color'}]（size 為 pt，color 為 (r, g, b)），
+        純文字片段可直接給字串；提供時取代 text
+        style: Word 段落樣式；'List Bullet' / 'List Bullet 2' 為第一、二層項目符號
+        """
+        block = {'type': 'paragraph', 'text': str(text), 'style': style}
+        if runs:
+            runs = [{'text': run} if isinstance(run, str) else run for run in runs]
+            block['runs'] = [
+                {'text': str(run['text']), 'bold': bool(run.get('bold')), 'italic': bool(run.get('italic')),
+                 'size': run.get('size'), 'color': list(run['color']) if run.get('color') else None}
+                for run in runs
+            ]
+        self.blocks.append(block)
+
+    def add_bullet(self, text='', runs=None, level=1):
+        """新增項目符號段落（level 1 或 2）"""
+        self.add_paragraph(text, style='List Bullet' if level <= 1 else 'List Bullet 2', runs=runs)
+
+    def add_table(self, data_dict, title='', source=DEFAULT_TABLE_SOURCE):
+        """
+        新增統計表（與 add_statistics_table 相同的 data_dict；儲存格先轉為文字）
+        source: 表格下方的資料來源註記；空字串表示不加註記
+        資料列欄數超過欄名時拋出 ValueError（與 add_statistics_table 相同），在分析階段就由該題的例外處理接手
+        """
+        for row in data_dict['data']:
+            if len(row) > len(data_dict['columns']):
+                raise ValueError(f"表格「{title}」的資料列有 {len(row)} 欄，超過欄名的 {len(data_dict['columns'])} 欄")
+        self.blocks.append({
+            'type': 'table',
+            'title': str(title),
+            'columns': [str(c) for c in data_dict['columns']],
+            'data': [[str(v) for v in row] for row in data_dict['data']],
+            'source': str(source or ''),
+        })
+
+    def add_chart(self, fig, failure_text=None):
+        """新增圖表（保存 Plotly 圖表 JSON，輸出時才渲染）"""
+        self.blocks.append({'type': 'chart', 'figure': json.loads(fig.to_json()), 'failure_text': failure_text})
+
+    def add_page_break(self):
+        self.blocks.append({'type': 'page_break'})
+
+    def add_rule(self):
+        """新增分隔線（章節之間，不分頁）"""
+        self.blocks.append({'type': 'rule'})
+
+    def extend(self, other):
+        self.blocks.extend(other.blocks)
+
+    def to_dict(self):
+        return {'version': REPORT_MODEL_VERSION, 'blocks': self.blocks}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('blocks', []))
+
+
+def bold(text):
+    """粗體文字片段（ReportModel.add_paragraph 的 runs）"""
+    return {'text': str(text), 'bold': True}
+
+
+def italic(text):
+    """斜體文字片段（ReportModel.add_paragraph 的 runs）"""
+    return {'text': str(text), 'italic': True}
+
+
+def chart_title(block):
+    """圖表區塊的標題文字"""
+    title = block['figure'].get('layout', {}).get('title', '')
+    if isinstance(title, dict):
+        title = title.get('text', '')
+    return str(title or '')
+
+
+def _numbered_title(title, table_counter):
+    """與 add_statistics_table 相同的表格編號規則"""
+    if table_counter is None or not title:
+        return title
+    table_counter['count'] += 1
+    if re.match(r'^表\s*\d+', title):
+        return re.sub(r'^表\s*\d+', f'表 {table_counter["count"]}', title)
+    return f"表 {table_counter['count']}：{title}"
+
+
+def _markdown_run(run):
+    text = run['text']
+    if run.get('italic'):
+        text = f"*{text}*"
+    if run['bold']:
+        text = f"**{text}**"
+    return text
+
+
+def _markdown_cell(text):
+    return text.replace('|', '\\|').replace('\r', ' ').replace('\n', '<br>')
+
+
+def render_markdown(model, table_counter=None):
+    """輸出 Markdown 文字；圖表以標題註記（Markdown 不內嵌互動圖表）"""
+    if table_counter is None:
+        table_counter = {'count': 0}
+    lines = []
+    in_list = False
+    for block in model.blocks:
+        kind = block['type']
+        is_bullet = kind == 'paragraph' and (block.get('style') or '').startswith('List Bullet')
+        if in_list and not is_bullet:
+            # 清單結束後空一行，避免下一段被併入最後一個項目
+            lines.append('')
+        in_list = is_bullet
+        if kind == 'heading':
+            lines.append(f"{'#' * min(block['level'] + 1, 6)} {block['text']}\n")
+        elif kind == 'paragraph':
+            if block.get('runs'):
+                text = ''.join(_markdown_run(r) for r in block['runs'])
+            else:
+                text = block['text']
+            if not text:
+                continue
+            if is_bullet:
+                indent = '   ' if block['style'] == 'List Bullet 2' else ''
+                lines.append(f"{indent}- {text}")
+            elif (block.get('style') or '').startswith('Heading'):
+                lines.append(f"**{text}**\n")
+            else:
+                lines.append(f"{text}\n")
+        elif kind == 'table':
+            title = _numbered_title(block['title'], table_counter)
+            if title:
+                lines.append(f"**{title}**\n")
+            lines.append('| ' + ' | '.join(_markdown_cell(c) for c in block['columns']) + ' |')
+            lines.append('|' + '|'.join(['---'] + ['---:'] * (len(block['columns']) - 1)) + '|')
+            for row in block['data']:
+                cells = list(row) + [''] * (len(block['columns']) - len(row))
+                lines.append('| ' + ' | '.join(_markdown_cell(c) for c in cells) + ' |')
+            source = block.get('source', DEFAULT_TABLE_SOURCE)
+            lines.append(f"\n資料來源：{source}\n" if source else '')
+        elif kind == 'chart':
+            lines.append(f"*圖：{chart_title(block)}*\n")
+        elif kind in ('page_break', 'rule'):
+            lines.append('\n---\n')
+    return '\n'.join(lines)
+
+
+def _html_runs(block):
+    if not block.get('runs'):
+        return html_escape(block['text'])
+    parts = []
+    for run in block['runs']:
+        style = []
+        if run.get('size'):
+            style.append(f"font-size:{run['size']}pt")
+        if run.get('color'):
+            style.append('color:#{:02x}{:02x}{:02x}'.format(*run['color']))
+        text = html_escape(run['text'])
+        if run.get('italic'):
+            text = f"<em>{text}</em>"
+        if run['bold']:
+            text = f"<strong>{text}</strong>"
+        parts.append(f'<span style="{";".join(style)}">{text}</span>' if style else text)
+    return ''.join(parts)
+
+
+def render_html(model, table_counter=None, title='問卷描述性統計報告'):
+    """輸出完整 HTML 文件；圖表以 Plotly 互動圖表內嵌（plotly.js 由 CDN 載入一次）"""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    if table_counter is None:
+        table_counter = {'count': 0}
+    body = []
+    include_js = 'cdn'
+    in_list = False
+    for block in model.blocks:
+        kind = block['type']
+        is_bullet = kind == 'paragraph' and (block.get('style') or '').startswith('List Bullet')
+        if in_list and not is_bullet:
+            body.append('</ul>')
+            in_list = False
+        if kind == 'heading':
+            level = min(block['level'] + 1, 6)
+            body.append(f"<h{level}>{html_escape(block['text'])}</h{level}>")
+        elif kind == 'paragraph':
+            text = _html_runs(block)
+            if is_bullet:
+                if not in_list:
+                    body.append('<ul>')
+                    in_list = True
+                body.append(f'<li class="sub">{text}</li>' if block['style'] == 'List Bullet 2' else f"<li>{text}</li>")
+            elif (block.get('style') or '').startswith('Heading'):
+                body.append(f"<h5>{text}</h5>")
+            elif text:
+                body.append(f"<p>{text}</p>")
+        elif kind == 'table':
+            table_title = _numbered_title(block['title'], table_counter)
+            rows = ['<table class="stat">']
+            if table_title:
+                rows.append(f"<caption>{html_escape(table_title)}</caption>")
+            rows.append('<tr>' + ''.join(f"<th>{html_escape(c)}</th>" for c in block['columns']) + '</tr>')
+            for row in block['data']:
+                cells = [f"<td>{html_escape(v)}</td>" if i == 0 else f'<td class="num">{html_escape(v)}</td>'
+                         for i, v in enumerate(row)]
+                cells += ['<td></td>'] * (len(block['columns']) - len(row))
+                rows.append('<tr>' + ''.join(cells) + '</tr>')
+            rows.append('</table>')
+            source = block.get('source', DEFAULT_TABLE_SOURCE)
+            if source:
+                rows.append(f'<p class="note"><strong>資料來源：</strong>{html_escape(source)}</p>')
+            body.append('\n'.join(rows))
+        elif kind == 'chart':
+            try:
+                fig = go.Figure(block['figure'])
+                body.append(pio.to_html(fig, full_html=False, include_plotlyjs=include_js))
+                include_js = False
+            except Exception:
+                body.append(f"<p>{html_escape(block.get('failure_text') or '（圖表生成時發生錯誤）')}</p>")
+        elif kind == 'page_break':
+            body.append('<hr class="page-break">')
+        elif kind == 'rule':
+            body.append('<hr>')
+    if in_list:
+        body.append('</ul>')
+
+    return (
+        '<!DOCTYPE html>\n<html lang="zh-Hant">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{html_escape(title)}</title>\n"
+        '<style>'
+        'body{font-family:"Noto Sans CJK TC","Microsoft JhengHei",sans-serif;max-width:960px;margin:auto;}'
+        'table.stat{border-collapse:collapse;margin:1em auto;}'
+        'table.stat caption{font-weight:bold;margin-bottom:.5em;}'
+        'table.stat th,table.stat td{border:1px solid #8eaadb;padding:4px 8px;}'
+        'table.stat th{background:#d9e2f3;text-align:center;}'
+        'td.num{text-align:right;}p.note{font-size:9pt;}'
+        'hr.page-break{page-break-after:always;border:0;}li.sub{margin-left:1.5em;}'
+        '</style>\n</head>\n<body>\n'
+        + '\n'.join(body)
+        + '\n</body>\n</html>\n'
+    )
+
+
+def analysis_version(*parts):
+    """
+    分析程式版本：函式或模組原始碼的雜湊；字串（例如套件版本）直接納入
+    （含 lambda 的函式位元組碼常數帶有記憶體位址，不能跨次執行比對，所以改用原始碼）
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, str):
+            h.update(part.encode('utf-8'))
+        else:
+            try:
+                h.update(inspect.getsource(part).encode('utf-8'))
+            except (OSError, TypeError):
+                h.update(repr(part).encode('utf-8'))
+        h.update(b'\x1e')
+    return h.hexdigest()[:16]
+
+
+def report_model_key(fingerprint, topics, version=''):
+    """模型快取鍵：資料集指紋、題目清單（欄位、標題、說明、完整題目）與分析程式版本"""
+    h = hashlib.sha1()
+    h.update(f"v{REPORT_MODEL_VERSION}|{version}|{fingerprint}".encode('utf-8'))
+    for topic in topics:
+        h.update('\x1f'.join(str(topic.get(k, '')) for k in ('col', 'title', 'description', 'question')).encode('utf-8'))
+        h.update(b'\x1e')
+    return h.hexdigest()
+
+
+def _model_path(key):
+    return os.path.join(MODEL_DIR, f"{key[:40]}.json")
+
+
+def validate_model(data):
+    """
+    檢查模型資料可以輸出：區塊為 dict 列表、類型已知且含必要欄位、圖表 JSON 可還原為 Plotly 圖表
+    不符合時拋出 ValueError（plotly 還原失敗時為其原本的例外）
+    """
+    import plotly.graph_objects as go
+
+    blocks = data.get('blocks')
+    if not isinstance(blocks, list):
+        raise ValueError('blocks 不是列表')
+    for i, block in enumerate(blocks):
+        if not isinstance(block, dict) or block.get('type') not in BLOCK_FIELDS:
+            raise ValueError(f'第 {i} 個區塊格式不符')
+        missing = [field for field in BLOCK_FIELDS[block['type']] if field not in block]
+        if missing:
+            raise ValueError(f"第 {i} 個區塊（{block['type']}）缺少欄位：{', '.join(missing)}")
+        if block['type'] == 'chart':
+            go.Figure(block['figure'])
+
+
+def load_report_model(key):
+    """讀回保存的模型；未命中、關閉快取、檔案損毀或內容無法通過檢查（validate_model）時回傳 None"""
+    if not CACHE_ENABLED or key is None:
+        return None
+    try:
+        with open(_model_path(key), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != REPORT_MODEL_VERSION or data.get('key') != key:
+            return None
+        validate_model(data)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"報告模型快取無法使用，重新分析：{e}")
+        return None
+    return ReportModel.from_dict(data)
+
+
+def save_report_model(key, model):
+    """保存模型（先寫暫存檔再置換，避免並行讀取到不完整的檔案）"""
+    if not CACHE_ENABLED or key is None:
+        return
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        path = _model_path(key)
+        data = model.to_dict()
+        data['key'] = key
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+    except Exception as e:
+        print(f"寫入報告模型快取失敗（不影響報告產生）：{e}")
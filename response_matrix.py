@@ -0,0 +1,120 @@
+"""
+問卷作答整數編碼矩陣
+- 將載入（及題目合併）後的問卷轉為 受訪者 × 題目 的小整數代碼矩陣，缺失值為 -1
+- 每題一份代碼簿（代碼 → 答案文字，依答案首次出現順序編碼）
+- respondent_type 與階段欄位以類別代碼保存
+- 次數分配與交叉表以 NumPy bincount 計算，不需反覆 astype(str) / dropna / value_counts
+- 建立時一併建立次數立方體（題目 × 答案 × respondent_type × 階段，見 count_cube），
+  各題的交叉表與卡方檢定輸入都由立方體切片取得
+"""
+import numpy as np
+import pandas as pd
+
+from survey_loader import PHASE_COLUMN_NAME
+from count_cube import build_count_cube, cube_totals, cube_table, cube_stack
+
+MISSING_CODE = -1
+
+
+def _code_dtype(max_codes):
+    """依最大代碼數選擇最小的整數型別（保留 -1 作為缺失值）"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_codes <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def build_response_matrix(df, question_cols, group_cols=('respondent_type', PHASE_COLUMN_NAME)):
+    """
+    建立整數編碼矩陣
+    答案以 astype(str) 後的文字編碼（與各分析流程原本的字串處理一致）
+    回傳 dict：
+      codes: ndarray (受訪者數, 題數)，欄優先排列，缺失值為 -1
+      questions: 題目名稱列表（與 codes 欄位順序相同）
+      column_index: 題目名稱 → 欄位位置
+      codebooks: 題目名稱 → 答案文字陣列（索引即代碼）
+      groups: 分組欄位名稱 → pd.Categorical（缺失值代碼為 -1）
+      cube: 次數立方體（題目 × 答案 × 各分組欄位）
+      index: 原 DataFrame 的 index
+    """
+    questions = [c for c in dict.fromkeys(question_cols) if c in df.columns]
+    n = len(df)
+
+    codebooks = {}
+    column_codes = []
+    for col in questions:
+        series = df[col]
+        mask = series.notna().to_numpy()
+        codes = np.full(n, MISSING_CODE, dtype=np.int64)
+        col_codes, uniques = pd.factorize(series[mask].astype(str))
+        codes[mask] = col_codes
+        codebooks[col] = np.asarray(uniques, dtype=object)
+        column_codes.append(codes)
+
+    max_codes = max((len(cb) for cb in codebooks.values()), default=0)
+    matrix = np.empty((n, len(questions)), dtype=_code_dtype(max_codes), order='F')
+    for j, codes in enumerate(column_codes):
+        matrix[:, j] = codes
+
+    groups = {}
+    for col in group_cols:
+        if col in df.columns:
+            groups[col] = pd.Categorical(df[col])
+
+    cube = build_count_cube(
+        ((col, matrix[:, j], None, codebooks[col]) for j, col in enumerate(questions)), groups)
+
+    return {
+        'codes': matrix,
+        'questions': questions,
+        'column_index': {q: j for j, q in enumerate(questions)},
+        'codebooks': codebooks,
+        'groups': groups,
+        'cube': cube,
+        'index': df.index,
+    }
+
+
+def question_codes(matrix, question):
+    """取得單一題目的代碼向量與代碼簿"""
+    j = matrix['column_index'][question]
+    return matrix['codes'][:, j], matrix['codebooks'][question]
+
+
+def _kept_codes(codebook, keep_label):
+    if keep_label is None:
+        return np.ones(len(codebook), dtype=bool)
+    return np.array([bool(keep_label(label)) for label in codebook], dtype=bool)
+
+
+def answer_counts(matrix, question, keep_label=None):
+    """
+    單題次數分配（排序結果與 Series.value_counts() 相同：次數由高到低）
+    keep_label: 篩選答案文字的函式，回傳 False 的答案不列入
+    """
+    counts, codebook = cube_totals(matrix['cube'], question)
+    keep = _kept_codes(codebook, keep_label) & (counts > 0)
+    # 代碼依首次出現順序編號，與 value_counts 排序前的順序相同
+    result = pd.Series(counts[keep], index=pd.Index(codebook[keep], dtype=object))
+    return result.sort_values(ascending=False)
+
+
+def answer_group_table(matrix, question, group, keep_label=None, missing_group_label=None, normalize=False, margins=False):
+    """
+    單題答案 × 分組 的交叉表（列、欄依文字排序，與 pd.crosstab 相同）
+    missing_group_label: 分組缺失值改以此標籤計入；None 表示排除該受訪者
+    normalize / margins: 同 pd.crosstab(normalize='columns') / pd.crosstab(margins=True)
+    """
+    return cube_table(matrix['cube'], question, group, keep_label=keep_label,
+                      missing_group_label=missing_group_label, normalize=normalize, margins=margins)
+
+
+def answer_group_counts(matrix, group, questions=None, keep_label=None):
+    """
+    多題一次取得 答案 × 分組 次數，補零成 3-D 陣列 (題數, 最大答案數, 組數)，可直接交給
+    batch_stats.chi_square_batch；組別缺失的受訪者不計入，keep_label 篩掉的答案列為 0
+    回傳 (questions, counts)
+    """
+    if questions is None:
+        questions = matrix['questions']
+    return cube_stack(matrix['cube'], group, questions, keep_label=keep_label)
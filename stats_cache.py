@@ -0,0 +1,96 @@
+"""
+統計結果共用快取
+- 以 (資料集指紋, 題目, 分組欄位, 篩選條件, 檢定類型) 為鍵保存檢定結果，app 的報告推薦、
+  逐題統計分析與深度分析先查快取，同一份資料的同一檢定只計算一次
+- Word 報告的資料前處理不同（自行合併題目、clean_and_merge_categories、'phase' 欄），鍵不會與 app 重疊，
+  因此不使用此快取；重複產生時改由報告模型快取（report_model）整份讀回
+- 存放於模組層級，Streamlit 重新執行腳本時仍保留（模組不會重新載入）
+- 筆數上限以 LRU 淘汰（環境變數 STATS_CACHE_SIZE，預設 4096），並記錄命中／未命中次數
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+STATS_CACHE_SIZE = int(os.environ.get('STATS_CACHE_SIZE', 4096))
+
+_lock = threading.Lock()
+_results = OrderedDict()
+_counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def dataset_fingerprint(df):
+    """資料集指紋：欄位名稱與所有儲存格內容（含 index）的雜湊；資料有任何變動指紋即不同"""
+    h = hashlib.sha1()
+    h.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    h.update(np.ascontiguousarray(pd.util.hash_pandas_object(df, index=True).to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+def get_or_compute(fingerprint, question, group, filter_key, kind, compute):
+    """
+    查詢快取，未命中時呼叫 compute() 計算並存入
+    fingerprint 為 None 時不使用快取（直接計算）
+    """
+    if fingerprint is None:
+        return compute()
+    key = (fingerprint, question, group, filter_key, kind)
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            _counters['hits'] += 1
+            return _results[key]
+        _counters['misses'] += 1
+
+    value = compute()
+
+    with _lock:
+        _results[key] = value
+        _results.move_to_end(key)
+        while len(_results) > STATS_CACHE_SIZE:
+            _results.popitem(last=False)
+            _counters['evictions'] += 1
+    return value
+
+
+def lookup(fingerprint, question, group, filter_key, kind):
+    """只查詢不計算；回傳 (是否命中, 結果)"""
+    if fingerprint is None:
+        return False, None
+    key = (fingerprint, question, group, filter_key, kind)
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            _counters['hits'] += 1
+            return True, _results[key]
+        _counters['misses'] += 1
+    return False, None
+
+
+def store(fingerprint, question, group, filter_key, kind, value):
+    """直接存入結果（批次計算後逐題寫入）"""
+    if fingerprint is None:
+        return
+    key = (fingerprint, question, group, filter_key, kind)
+    with _lock:
+        _results[key] = value
+        _results.move_to_end(key)
+        while len(_results) > STATS_CACHE_SIZE:
+            _results.popitem(last=False)
+            _counters['evictions'] += 1
+
+
+def cache_info():
+    """快取使用狀況：命中、未命中、淘汰次數與目前筆數"""
+    with _lock:
+        return dict(_counters, size=len(_results), maxsize=STATS_CACHE_SIZE)
+
+
+def clear_cache():
+    with _lock:
+        _results.clear()
+        for k in _counters:
+            _counters[k] = 0
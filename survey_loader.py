@@ -0,0 +1,265 @@
+"""
+問卷 CSV 載入模組
+- 解析 STANDARD_... 匯出檔（處理檔名前導列、編碼、欄位名稱清理）
+- 標記階段欄位與 _source_file
+- 以檔案內容雜湊為鍵，將解析結果快取於資料旁的 .survey_cache 目錄
+
+cloud_app.py 與 master_report_generator.py 共用此模組，冷啟動時若檔案內容未變更，
+直接載入快取的 DataFrame，不需重新解析 CSV。
+"""
+import io
+import os
+import re
+import csv
+import time
+import codecs
+import pickle
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+PHASE_COLUMN_NAME = "請問公司目前主要處於哪個發展階段？："
+
+# 快取設定：可設定環境變數 SURVEY_CACHE=0 關閉快取
+CACHE_ENABLED = str(os.environ.get('SURVEY_CACHE', '1')).lower() not in ('0', 'false', 'no')
+CACHE_DIR_NAME = '.survey_cache'
+# 解析邏輯變更時請遞增版本號，讓舊快取自動失效
+CACHE_VERSION = 2
+
+# 編碼偵測：只讀取檔案開頭取樣；有 UTF-8 BOM 時直接採用 utf-8-sig
+SNIFF_SAMPLE_BYTES = 64 * 1024
+SNIFF_MAX_BYTES = 4 * 1024 * 1024
+SNIFF_ENCODINGS = ('utf-8', 'cp950')
+
+# 多檔並行載入：SURVEY_LOAD_WORKERS 設定執行緒數（1 表示依序載入）；
+# SURVEY_LOAD_TIMING=1 時於載入後列出每個檔案的耗時
+LOAD_WORKERS = int(os.environ.get('SURVEY_LOAD_WORKERS', min(8, os.cpu_count() or 1)))
+LOAD_TIMING_REPORT = str(os.environ.get('SURVEY_LOAD_TIMING', '0')).lower() in ('1', 'true', 'yes')
+
+
+def file_content_hash(path):
+    """計算檔案內容的 SHA-256（快取鍵）"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_variant(dtype=None):
+    return f"v{CACHE_VERSION}-{'str' if dtype is str else 'auto'}"
+
+
+def _cache_path(path, digest, dtype=None):
+    """快取檔路徑：<資料目錄>/.survey_cache/<檔名>.<雜湊>.<解析選項>.pkl"""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{digest[:32]}.{_cache_variant(dtype)}.pkl")
+
+
+def _load_cached(cache_file):
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        # 快取損毀或版本不相容時，視同未命中
+        return None
+
+
+def _store_cached(cache_file, df, source_name, dtype=None):
+    """寫入快取（先寫暫存檔再置換，避免並行讀取到不完整的檔案），並清除同一來源檔的舊快取"""
+    try:
+        cache_dir = os.path.dirname(cache_file)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+
+        # 來源檔內容變更後，舊雜湊的快取已不會再命中，直接刪除
+        stale_pattern = re.compile(re.escape(source_name) + r'\.[0-9a-f]{32}\.' + re.escape(_cache_variant(dtype)) + r'\.pkl$')
+        for name in os.listdir(cache_dir):
+            stale = os.path.join(cache_dir, name)
+            if stale != cache_file and stale_pattern.match(name):
+                try:
+                    os.remove(stale)
+                except Exception:
+                    pass
+    except Exception as e:
+        print(f"寫入快取失敗（不影響資料載入）：{e}")
+
+
+def _decode_sample(raw, encoding):
+    """以增量解碼器解碼取樣位元組（取樣尾端被截斷的多位元組字元不視為錯誤）"""
+    return codecs.getincrementaldecoder(encoding)(errors='strict').decode(raw, final=False)
+
+
+def sniff_survey_csv(path, sample_size=SNIFF_SAMPLE_BYTES):
+    """
+    只讀取檔案開頭一次，判斷編碼與是否需跳過檔名前導列
+    回傳 (encoding, skiprows)；無法以候選編碼解碼時拋出 ValueError，不再靜默退回 latin1
+    """
+    with open(path, 'rb') as f:
+        raw = f.read(sample_size)
+        at_eof = len(raw) < sample_size
+
+    if raw.startswith(codecs.BOM_UTF8):
+        candidates = ('utf-8-sig',)
+    else:
+        candidates = SNIFF_ENCODINGS
+
+    text, encoding, last_error = None, None, None
+    for enc in candidates:
+        try:
+            text = _decode_sample(raw, enc)
+            encoding = enc
+            break
+        except UnicodeDecodeError as e:
+            last_error = e
+    if encoding is None:
+        raise ValueError(f"無法判斷檔案編碼（已嘗試 {', '.join(candidates)}）：{os.path.basename(path)}：{last_error}")
+
+    # 取前兩筆紀錄（欄位名稱內可能含引號包住的換行，因此以 csv 模組解析而非逐行切割）
+    rows = []
+    reader = csv.reader(io.StringIO(text))
+    try:
+        for row in reader:
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == 2:
+                break
+    except csv.Error:
+        pass
+    if len(rows) < 2 and not at_eof and sample_size < SNIFF_MAX_BYTES:
+        # 標題列超過取樣範圍時擴大取樣再判斷一次
+        return sniff_survey_csv(path, sample_size=sample_size * 4)
+
+    first_col = rows[0][0] if rows else ''
+    first_row = rows[1] if len(rows) > 1 else []
+    first_val = first_row[0] if first_row else ''
+
+    # 如果第一列第一個值看起來像檔名，或第一欄名稱包含STANDARD_，則跳過第一行
+    skip = 0
+    if 'STANDARD_' in first_col or 'STANDARD_' in first_val:
+        skip = 1
+    # 或者檢查是否第一列所有值都是空白（表示第一行只是檔名）
+    elif first_row and all(v.strip() == '' for v in first_row):
+        skip = 1
+    return encoding, skip
+
+
+def _parse_survey_csv(path, dtype=None):
+    """解析單一問卷 CSV 並完成欄位清理、階段擷取與來源標記；無法解析時拋出例外"""
+    encoding, skiprows = sniff_survey_csv(path)
+    # 只開啟一次檔案並完整解析一次
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        df = pd.read_csv(f, skiprows=skiprows, dtype=dtype)
+
+    df.columns = df.columns.str.replace(r'【.*?】', '', regex=True).str.strip()
+    df.columns = df.columns.str.replace('\n', ' ', regex=False)
+
+    if PHASE_COLUMN_NAME in df.columns:
+        extracted = df[PHASE_COLUMN_NAME].astype(str).str.extract(r'(第一階段|第二階段|第三階段)', expand=False)
+        df[PHASE_COLUMN_NAME] = extracted.where(extracted.notna(), df[PHASE_COLUMN_NAME])
+    else:
+        m = re.search(r'(第一階段|第二階段|第三階段)', os.path.basename(path))
+        if m:
+            df[PHASE_COLUMN_NAME] = m.group(1)
+    df['_source_file'] = os.path.basename(path)
+    return df
+
+
+def read_survey_csv(path, dtype=None, use_cache=True):
+    """
+    讀取單一問卷 CSV（含快取）
+    快取鍵為檔案內容雜湊，檔案內容一旦變更即自動重新解析
+    dtype: 傳入 str 時所有欄位以字串讀取（master_report_generator 使用）
+    無法判斷編碼或解析失敗時拋出例外，由呼叫端決定如何處理
+    """
+    if not use_cache or not CACHE_ENABLED:
+        return _parse_survey_csv(path, dtype=dtype)
+
+    try:
+        cache_file = _cache_path(path, file_content_hash(path), dtype=dtype)
+    except OSError:
+        return _parse_survey_csv(path, dtype=dtype)
+
+    if os.path.exists(cache_file):
+        df = _load_cached(cache_file)
+        if isinstance(df, pd.DataFrame):
+            return df
+
+    df = _parse_survey_csv(path, dtype=dtype)
+    _store_cached(cache_file, df, os.path.basename(path), dtype=dtype)
+    return df
+
+
+def _timed_load(path, loader):
+    """載入單一檔案並記錄耗時；例外不往外拋，記錄於結果中由呼叫端處理"""
+    start = time.perf_counter()
+    df, error = None, None
+    try:
+        df = loader(path)
+    except Exception as e:
+        error = e
+    return df, {
+        'file': os.path.basename(path),
+        'path': path,
+        'rows': len(df) if df is not None else 0,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+def load_files_concurrently(file_paths, loader=read_survey_csv, max_workers=None):
+    """
+    以執行緒池同時載入多個檔案
+    loader: 接收檔案路徑、回傳 DataFrame 的函式（例如 read_survey_csv、master_report_generator.load_and_tag）
+    max_workers: 執行緒數，預設為 LOAD_WORKERS；1 表示依序載入
+    回傳 (frames, timings)：兩者皆依 file_paths 的順序排列，因此合併結果與依序載入相同；
+    不存在的檔案不會出現在結果中，載入失敗的檔案 frame 為 None，例外記錄於 timings[i]['error']
+    """
+    paths = [p for p in file_paths if isinstance(p, str) and p.strip() != "" and os.path.exists(p)]
+    workers = max(1, min(max_workers or LOAD_WORKERS, len(paths) or 1))
+    if workers == 1:
+        results = [_timed_load(p, loader) for p in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map 依輸入順序回傳結果
+            results = list(pool.map(lambda p: _timed_load(p, loader), paths))
+    frames = [df for df, _ in results]
+    timings = [timing for _, timing in results]
+    return frames, timings
+
+
+def format_load_timings(timings, total_seconds=None):
+    """將每個檔案的載入耗時整理成文字報告（依耗時由高到低排列）"""
+    if total_seconds is None:
+        total_seconds = sum(t['seconds'] for t in timings)
+    lines = [f"檔案載入耗時（{len(timings)} 個檔案，總計 {total_seconds:.2f} 秒）："]
+    for t in sorted(timings, key=lambda t: t['seconds'], reverse=True):
+        status = f"失敗：{type(t['error']).__name__}: {t['error']}" if t['error'] is not None else f"{t['rows']} 列"
+        lines.append(f"  {t['seconds']:7.3f} 秒  {status}  {t['file']}")
+    return "\n".join(lines)
+
+
+def load_survey_files(file_paths, dtype=None, max_workers=None, report_timings=None):
+    """
+    並行載入多個問卷 CSV 並依輸入順序合併；不存在的檔案會被略過，無法解析的檔案會列出原因後略過
+    report_timings: 是否列出每個檔案的載入耗時，預設依環境變數 SURVEY_LOAD_TIMING
+    """
+    start = time.perf_counter()
+    frames, timings = load_files_concurrently(
+        file_paths, loader=lambda p: read_survey_csv(p, dtype=dtype), max_workers=max_workers)
+    for t in timings:
+        if t['error'] is not None:
+            print(f"⚠️ 無法載入 {t['file']}：{type(t['error']).__name__}: {t['error']}")
+    all_dfs = [df for df in frames if df is not None]
+    if report_timings is None:
+        report_timings = LOAD_TIMING_REPORT
+    if report_timings:
+        print(format_load_timings(timings, time.perf_counter() - start))
+    if not all_dfs:
+        return pd.DataFrame()
+    return pd.concat(all_dfs, ignore_index=True, sort=False)
@@ -0,0 +1,139 @@
+"""
+題目文字處理的持久化記憶（memo）
+- 題目標準化（normalize_question_v2）與相似度（calculate_similarity）的結果以輸入文字為鍵保存，
+  同一批欄位名稱在 Streamlit 重新執行、合併除錯畫面與 Word 報告中不必重複計算
+- 鍵包含版本：標準化以規則檔內容雜湊、相似度以函式程式碼雜湊，規則或程式一改即自動失效
+- 保存於 .survey_cache/text_memo.pkl，應用程式重新啟動後仍可使用；
+  每個表的筆數上限以 LRU 淘汰（環境變數 TEXT_MEMO_SIZE，預設 50000）
+- 與 CSV 解析快取共用 SURVEY_CACHE 開關：關閉時只保留記憶體內的結果，不讀寫磁碟
+"""
+import os
+import atexit
+import pickle
+import hashlib
+import inspect
+import threading
+from functools import wraps
+from collections import OrderedDict
+
+from survey_loader import CACHE_ENABLED, CACHE_DIR_NAME
+
+TEXT_MEMO_SIZE = int(os.environ.get('TEXT_MEMO_SIZE', 50000))
+MEMO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_DIR_NAME, 'text_memo.pkl')
+# 檔案格式變更時請遞增
+MEMO_FORMAT_VERSION = 1
+
+_lock = threading.RLock()
+_tables = None
+_dirty = False
+_counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _code_digest(h, code):
+    """位元組碼雜湊；巢狀的程式碼物件（lambda、內層函式、推導式）遞迴展開，不使用含記憶體位址的 repr"""
+    h.update(code.co_code)
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            _code_digest(h, const)
+        else:
+            h.update(repr(const).encode('utf-8'))
+    h.update(repr(code.co_names).encode('utf-8'))
+
+
+def function_version(func, extra=''):
+    """
+    函式版本雜湊：以原始碼計算（程式內容相同的函式得到相同版本，跨次執行穩定），
+    取不到原始碼時改以位元組碼計算；extra 可加入規則檔版本等附加資訊
+    """
+    h = hashlib.sha1()
+    try:
+        h.update(inspect.getsource(func).encode('utf-8'))
+    except (OSError, TypeError):
+        _code_digest(h, func.__code__)
+    h.update(str(extra).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _load_tables():
+    global _tables
+    if _tables is not None:
+        return _tables
+    _tables = {}
+    if CACHE_ENABLED and os.path.exists(MEMO_PATH):
+        try:
+            with open(MEMO_PATH, 'rb') as f:
+                stored = pickle.load(f)
+            if stored.get('format') == MEMO_FORMAT_VERSION:
+                _tables = {name: OrderedDict(items) for name, items in stored['tables'].items()}
+        except Exception:
+            # 記憶檔損毀或版本不相容時，視同沒有記憶
+            _tables = {}
+    return _tables
+
+
+def _table(name):
+    tables = _load_tables()
+    if name not in tables:
+        tables[name] = OrderedDict()
+    return tables[name]
+
+
+def memoized(name, version=None):
+    """
+    裝飾器：以 (版本, 引數) 為鍵記憶函式結果，引數須可雜湊
+    name: 記憶表名稱；version: 版本字串，未指定時以函式程式碼雜湊
+    """
+    def decorator(func):
+        func_version = version if version is not None else function_version(func)
+
+        @wraps(func)
+        def wrapper(*args):
+            global _dirty
+            key = (func_version,) + args
+            with _lock:
+                table = _table(name)
+                if key in table:
+                    table.move_to_end(key)
+                    _counters['hits'] += 1
+                    return table[key]
+                _counters['misses'] += 1
+            value = func(*args)
+            with _lock:
+                table[key] = value
+                _dirty = True
+                while len(table) > TEXT_MEMO_SIZE:
+                    table.popitem(last=False)
+                    _counters['evictions'] += 1
+            return value
+        return wrapper
+    return decorator
+
+
+def save_memo():
+    """有新結果時寫回磁碟（先寫暫存檔再置換）；回傳是否有寫入"""
+    global _dirty
+    with _lock:
+        if not _dirty or not CACHE_ENABLED or _tables is None:
+            return False
+        snapshot = {name: list(table.items()) for name, table in _tables.items()}
+        _dirty = False
+    try:
+        os.makedirs(os.path.dirname(MEMO_PATH), exist_ok=True)
+        tmp_file = f"{MEMO_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({'format': MEMO_FORMAT_VERSION, 'tables': snapshot}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, MEMO_PATH)
+        return True
+    except Exception as e:
+        print(f"寫入題目文字記憶失敗（不影響分析）：{e}")
+        return False
+
+
+def memo_info():
+    """記憶使用狀況：命中、未命中、淘汰次數與各表筆數"""
+    with _lock:
+        sizes = {name: len(table) for name, table in _load_tables().items()}
+        return dict(_counters, tables=sizes, maxsize=TEXT_MEMO_SIZE)
+
+
+atexit.register(save_memo)